@@ -1,18 +1,45 @@
 from tkinter import filedialog, messagebox
+import tkinter
 import pygame
+import queue
 import random
 import sys
+import threading
 import time
 import os
 import colorsys
-import json
-
-pygame.init()
-pygame.mixer.init()
+import re
+from array import array
+from collections import OrderedDict, defaultdict
+from collections.abc import MutableSequence
+from bisect import bisect_left, bisect_right, insort
+from itertools import accumulate
+from Flashcards_Storage import (APPENDABLE_FORMATS, EXPORT_FORMATS, BackgroundWriter, DuplicateIndex, PagedCards, card_key,
+                                detect_export_format, export_cards, import_cards, open_store, stream_records)
+from Flashcards_Grading import AnswerGrader
+from Flashcards_Review import (DAY, GRADE_AGAIN, GRADE_EASY, GRADE_GOOD, GRADE_HARD, MODE_REVIEW, MODE_TEST, MODE_TRACK,
+                               NEW_CARDS_PER_SESSION, ReviewLog, ReviewScheduler, WeightedSampler, downsample_minmax,
+                               sampling_weight, updated_history)
+
+try:
+    import numpy as np  # Optional: batches per-card color math
+except ImportError:
+    np = None
+
+pygame.font.init()  # Fonts are built at import; the window and mixer open in start_app()
 
 # Screen settings
 WIDTH, HEIGHT = 800, 600  # Window dimensions
 FPS = 180  # Frames per second
+CURSOR_BLINK_MS = 500  # Time between text cursor blinks
+SHUFFLE_ANIMATED_CARDS = 20  # Cards animated by the shuffle; the rest are shuffled without animation
+SHUFFLE_ROTATION_STEP = 2  # Degrees between cached rotations of a shuffling card
+FLIP_DURATION = 0.45  # Seconds a card flip takes, however fast frames are drawn
+REVERSE_DURATION = 0.5  # Seconds the reverse animation takes
+CHART_SIZE = (700, 130)  # Statistics chart surfaces, labels included
+FORECAST_DAYS = 30  # Days of due load shown by the statistics screen
+TEST_SEED = None  # Seed for Test Yourself card selection; set it to replay a session (None picks a fresh one)
+DEBUG_FRAME_STATS = False  # Print frame timing statistics to stderr on exit
 
 # Color presets (RGB format)
 WHITE  = (255, 255, 255)
@@ -25,25 +52,165 @@ GRAY   = (200, 200, 200)
 # Font settings
 FONT = pygame.font.Font(None, 36)  # Standard font
 BIG_FONT = pygame.font.Font(None, 48)  # Larger font for emphasis
+SMALL_FONT = pygame.font.Font(None, 24)  # Chart labels
+
+# Surface cache settings
+TEXT_CACHE_BUDGET = 16 * 1024 * 1024  # Max bytes of cached text surfaces
+ROTATION_CACHE_BUDGET = 48 * 1024 * 1024  # Max bytes of rotated card sprites per shuffle
+LAYER_CACHE_BUDGET = 24 * 1024 * 1024  # Max bytes of cached static screen layers
+CARD_FRAME_CACHE_BUDGET = 16 * 1024 * 1024  # Max bytes of cached card faces and animation frames
+
+class SurfaceCache:
+    """Size-bounded LRU cache of surfaces with hit/miss counters and a memory budget."""
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes  # Memory budget in bytes
+        self.entries = OrderedDict()  # Key -> surface, least recently used first
+        self.used_bytes = 0  # Bytes held by cached surfaces
+        self.hits = 0  # Lookups served from the cache
+        self.misses = 0  # Lookups that had to build a new surface
+
+    def get(self, key, build):
+        """Return the surface cached under key, calling build() to create it on a miss."""
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)  # Mark as most recently used
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = build()
+        size = surface.get_pitch() * surface.get_height()
+        if size <= self.max_bytes:  # Oversized surfaces are returned but never cached
+            self.entries[key] = surface
+            self.used_bytes += size
+            self.evict()
+        return surface
+
+    def evict(self):
+        """Drop least recently used surfaces until the cache fits its budget."""
+        while self.used_bytes > self.max_bytes and self.entries:
+            _, surface = self.entries.popitem(last=False)
+            self.used_bytes -= surface.get_pitch() * surface.get_height()
+
+    def set_budget(self, max_bytes):
+        """Change the memory budget, evicting entries if the cache is now too large."""
+        self.max_bytes = max_bytes
+        self.evict()
+
+    def clear(self):
+        """Remove every cached surface and reset the counters."""
+        self.entries.clear()
+        self.used_bytes = self.hits = self.misses = 0
+
+    def stats(self):
+        """Return hit/miss counters and memory usage."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+            "used_bytes": self.used_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+class TextSurfaceCache(SurfaceCache):
+    """Surface cache for rendered text, keyed on (text, font, color, antialias)."""
+    def __init__(self, max_bytes=TEXT_CACHE_BUDGET):
+        super().__init__(max_bytes)
+
+    def render(self, text, font, color, antialias=True):
+        """Return a rendered surface for text, reusing a cached one when possible."""
+        key = (text, font, tuple(color), antialias)
+        return self.get(key, lambda: font.render(text, antialias, color))
+
+TEXT_CACHE = TextSurfaceCache()  # Shared by all text rendering helpers
+
+def render_text(text, font=FONT, color=BLACK, antialias=True):
+    """Render text through the shared surface cache."""
+    return TEXT_CACHE.render(text, font, color, antialias)
 
 def show_feedback(message, duration=1500, color=RED, y_offset=0):
     """Display feedback message on screen for a short duration."""
     screen.fill(WHITE)  # Clear the screen
-    text = FONT.render(message, True, color)  # Render text
+    text = render_text(message, FONT, color)  # Render text
     text_rect = text.get_rect(center=(WIDTH//2, HEIGHT//2 + y_offset))  # Center text
     screen.blit(text, text_rect)  # Display message
     pygame.display.flip()  # Update screen
     pygame.time.wait(duration)  # Pause for specified duration
+    scheduler.invalidate()  # Restore the underlying screen afterwards
 
 def create_button(text, x, y, width, height, color=GRAY):
     """Create a button with given parameters."""
     button = pygame.Rect(x, y, width, height)  # Define button rectangle
     return {"rect": button, "text": text, "color": color}  # Return button properties
 
-def draw_button_list(buttons):
+def draw_button_list(buttons, target_surface=None):
     """Render a list of buttons on the screen."""
     for button in buttons:
-        draw_button(button["text"], button["rect"], button["color"])  # Draw each button
+        draw_button(button["text"], button["rect"], button["color"], target_surface)  # Draw each button
+
+def lighten(color, amount=0.4):
+    """Blend a color toward white, used for hover highlights."""
+    return tuple(int(c + (255 - c) * amount) for c in color)
+
+def rotate_hue(color, amount):
+    """Rotate the hue of an RGB color by amount (a fraction of the color wheel)."""
+    h, s, v = colorsys.rgb_to_hsv(*(channel / 255.0 for channel in color))
+    r, g, b = colorsys.hsv_to_rgb((h + amount) % 1.0, s, v)
+    return (int(r * 255), int(g * 255), int(b * 255))
+
+def rotate_hues(colors, amounts):
+    """Rotate the hue of many RGB colors at once; amounts is one fraction or one per color."""
+    if np is None:
+        if not isinstance(amounts, (list, tuple)):
+            amounts = [amounts] * len(colors)
+        return [rotate_hue(color, amount) for color, amount in zip(colors, amounts)]
+    if not len(colors):
+        return []
+
+    # RGB -> HSV, following colorsys so both paths give identical colors
+    rgb = np.asarray(colors, dtype=np.float64).reshape(-1, 3) / 255.0
+    r, g, b = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+    maxc, minc = rgb.max(axis=1), rgb.min(axis=1)
+    rangec = maxc - minc
+    grey = rangec == 0
+    safe_range = np.where(grey, 1.0, rangec)
+    s = np.where(grey, 0.0, rangec / np.where(maxc == 0, 1.0, maxc))
+    rc, gc, bc = (maxc - r) / safe_range, (maxc - g) / safe_range, (maxc - b) / safe_range
+    h = np.where(r == maxc, bc - gc, np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+    h = np.where(grey, 0.0, (h / 6.0) % 1.0)
+
+    # Rotate, then HSV -> RGB
+    h = (h + np.asarray(amounts, dtype=np.float64)) % 1.0
+    v = maxc
+    sector = np.floor(h * 6.0)
+    f = h * 6.0 - sector
+    p, q, t = v * (1.0 - s), v * (1.0 - s * f), v * (1.0 - s * (1.0 - f))
+    sector = sector.astype(np.int64) % 6
+    channels = np.stack([
+        np.choose(sector, [v, q, p, p, t, v]),
+        np.choose(sector, [t, v, v, q, p, p]),
+        np.choose(sector, [p, p, t, v, v, q]),
+    ], axis=1)
+    channels[grey] = v[grey, None]
+    return [tuple(color) for color in (channels * 255).astype(np.int64).tolist()]
+
+def find_hovered_button(buttons, pos):
+    """Return the button under pos, or None."""
+    for button in buttons:
+        if button["rect"].collidepoint(pos):
+            return button
+    return None
+
+def update_hover(buttons, hovered, pos):
+    """Return the button now under pos, invalidating the old and new hover regions if it changed."""
+    new_hovered = find_hovered_button(buttons, pos)
+    if new_hovered is not hovered:
+        for button in (hovered, new_hovered):
+            if button is not None:
+                scheduler.invalidate(button["rect"])  # Only the affected buttons redraw
+    return new_hovered
 
 def handle_button_click(button_rect, flashcards, action_fn, empty_message="Please enter flashcards first!"):
     """Execute action on button click, ensuring flashcards exist if required."""
@@ -55,7 +222,7 @@ def handle_button_click(button_rect, flashcards, action_fn, empty_message="Pleas
 
 def create_text_surface(text, font=FONT, color=BLACK, centered=True):
     """Create a text surface for rendering."""
-    text_surface = font.render(text, True, color)  # Render text
+    text_surface = render_text(text, font, color)  # Render text
     return text_surface, text_surface.get_rect(center=(WIDTH//2, HEIGHT//2)) if centered else text_surface  # Return position
 
 def get_wrapped_text_height(text, font, max_width):
@@ -67,7 +234,7 @@ def render_wrapped_text(text, font, max_width, start_x, start_y, color=BLACK, ce
     lines = wrap_text(text, font, max_width)  # Split text into lines
     total_height = 0  # Track total rendered height
     for line in lines:
-        text_surface = font.render(line, True, color)  # Render line
+        text_surface = render_text(line, font, color)  # Render line
         x = start_x + (max_width - text_surface.get_width()) // 2 if centered else start_x  # Align text
         screen.blit(text_surface, (x, start_y + total_height))  # Display line
         total_height += font.get_height()  # Update height
@@ -87,60 +254,709 @@ def handle_scroll(current_offset, max_scroll, event):
 def check_quit_event(event):
     """Exit the program if the quit event is triggered."""
     if event.type == pygame.QUIT:
-        pygame.quit()
-        sys.exit()
+        quit_app()
 
 def center_rect(width, height, y_offset=0):
     """Generate a rectangle centered on the screen."""
     return pygame.Rect((WIDTH - width) // 2, (HEIGHT - height) // 2 + y_offset, width, height)
 
-# Initialize display
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Flashcard App")  # Window title
+# Display
+screen = None  # App window, opened by start_app()
 clock = pygame.time.Clock()  # Frame timing
 
+class FrameScheduler:
+    """Redraws screens only when invalidated and sleeps on the event queue while the app is idle."""
+    PASSIVE_EVENTS = {pygame.MOUSEMOTION, pygame.ACTIVEEVENT, pygame.WINDOWMOVED, pygame.NOEVENT}
+
+    def __init__(self):
+        self.dirty = True  # Whether the current screen must be redrawn in full
+        self.dirty_rects = []  # Regions to redraw when only part of the screen changed
+        self.frame_rects = None  # Regions for the frame being drawn (None means the whole screen)
+        self.current_screen = None  # Screen that drew the last frame
+        self.screen_count = 0  # Source of unique screen ids
+        self.animating = 0  # Nesting depth of running animations
+        self.active_frames = 0  # Frames actually drawn
+        self.idle_frames = 0  # Loop passes that skipped drawing
+
+    def invalidate(self, rect=None):
+        """Mark the screen (or just rect) as changed so the next frame redraws it."""
+        if rect is None:
+            self.dirty = True
+        else:
+            self.dirty_rects.append(pygame.Rect(rect))
+
+    def enter_screen(self):
+        """Return a new screen id; a screen redraws whenever another one drew since its last frame."""
+        self.screen_count += 1
+        self.invalidate()
+        return self.screen_count
+
+    def begin_frame(self, screen_id):
+        """Return True if screen_id has to redraw this frame, counting the frame as active or idle."""
+        full = self.dirty or self.animating or self.current_screen != screen_id
+        if full or self.dirty_rects:
+            self.frame_rects = None if full else self.dirty_rects
+            self.dirty, self.dirty_rects = False, []
+            self.current_screen = screen_id
+            self.active_frames += 1
+            return True
+        self.idle_frames += 1
+        return False
+
+    def wait_events(self, timeout=None):
+        """Return pending events, blocking (up to timeout ms) while nothing needs drawing."""
+        if self.dirty or self.dirty_rects or self.animating:
+            clock.tick(FPS)  # Run at full frame rate only while something is changing
+            events = pygame.event.get()
+        else:
+            first = pygame.event.wait(max(1, int(timeout))) if timeout is not None else pygame.event.wait()
+            events = [first] + pygame.event.get()
+            clock.tick()  # Keep the clock's frame timing current after sleeping
+        if any(event.type not in self.PASSIVE_EVENTS for event in events):
+            self.invalidate()  # Input may have changed what is on screen
+        return [event for event in events if event.type != pygame.NOEVENT]
+
+    def animation_tick(self, fps=FPS):
+        """Advance one animation frame at up to fps frames per second."""
+        self.active_frames += 1
+        self.invalidate()  # Whatever screen is underneath must redraw afterwards
+        clock.tick(fps)
+
+    def start_animation(self):
+        """Switch to full frame rate until the matching stop_animation call."""
+        self.animating += 1
+
+    def stop_animation(self):
+        """Return to idle scheduling once the last running animation stops."""
+        self.animating = max(0, self.animating - 1)
+        self.invalidate()
+
+    def stats(self):
+        """Return idle vs. active frame counts."""
+        total = self.active_frames + self.idle_frames
+        return {
+            "active_frames": self.active_frames,
+            "idle_frames": self.idle_frames,
+            "idle_ratio": self.idle_frames / total if total else 0.0,
+        }
+
+scheduler = FrameScheduler()  # Shared by every screen loop
+
+class Compositor:
+    """Draws screens as a cached static layer plus dynamic content, pushing only dirty regions to the display."""
+    def __init__(self, max_bytes=LAYER_CACHE_BUDGET):
+        self.layers = SurfaceCache(max_bytes)  # Layer key -> pre-rendered static content
+
+    def static_layer(self, key, build):
+        """Return the static layer for key, calling build(surface) once to draw it."""
+        def render_layer():
+            layer = pygame.Surface((WIDTH, HEIGHT)).convert()
+            layer.fill(WHITE)
+            build(layer)
+            return layer
+        return self.layers.get(key, render_layer)
+
+    def present(self, layer, draw_dynamic=None, rects=None):
+        """Restore layer under rects (or the whole screen), redraw dynamic content there and update the display."""
+        if rects is None:
+            screen.blit(layer, (0, 0))
+            if draw_dynamic:
+                draw_dynamic()
+            pygame.display.flip()
+            return
+
+        for rect in rects:
+            screen.set_clip(rect)  # Dynamic content only touches this region
+            screen.blit(layer, rect, rect)
+            if draw_dynamic:
+                draw_dynamic()
+        screen.set_clip(None)
+        pygame.display.update(rects)
+
+compositor = Compositor()  # Shared static layer cache
+
+def quit_app():
+    """Finish pending saves and exit the program."""
+    if DEBUG_FRAME_STATS:
+        print(f"Frame stats: {scheduler.stats()}", file=sys.stderr)
+    DECK_WRITER.close()  # Finish queued saves
+    FLASHCARD_STORE.close()  # Let a running compaction finish
+    DUPLICATES.save()  # Matched against the deck files as they are now
+    pygame.quit()
+    sys.exit()
+
+# Review status of a card
+CARD_UNSEEN, CARD_KNOWN, CARD_UNKNOWN = 0, 1, 2
+TOKEN_PATTERN = re.compile(r"\w+")  # Words indexed for search
+SEARCH_RESULTS = 8  # Results shown by the search screen
+
 class Flashcard:
     """Represents a flashcard with a front and back side."""
-    def __init__(self, front, back):
+    def __init__(self, front, back, card_id=None):
         self.front = front  # Front text
         self.back = back  # Back text
+        self.card_id = card_id  # Id in the deck store (None until saved)
         self.showing_front = True  # Track current side
+        self.color = (0, 0, 0)  # Background color (black until assigned)
+        self.status = CARD_UNSEEN  # Known/unknown mark from track_progress_mode
     
     def flip(self):
         """Flip the flashcard to reveal the other side."""
         self.showing_front = not self.showing_front
 
-# Text rendering utilities
-def get_wrapped_lines(text, font, max_width):
-    """Break text into lines that fit within the given width."""
-    words = text.split()  # Split text into words
-    lines, current_line = [], ""
-    for word in words:
-        test_line = f"{current_line} {word}".strip()  # Simulate adding a word
-        if font.size(test_line)[0] <= max_width - 20:  # Ensure it fits within margin
-            current_line = test_line  # Update current line
+class CardView:
+    """Lightweight handle on one row of a Deck, with the same attributes as Flashcard."""
+    __slots__ = ("deck", "row")
+
+    def __init__(self, deck, row):
+        self.deck = deck
+        self.row = row  # Row in the deck's columns (stable while the deck is shuffled)
+
+    def __eq__(self, other):
+        return isinstance(other, CardView) and self.deck is other.deck and self.row == other.row
+
+    def __hash__(self):
+        return hash((id(self.deck), self.row))
+
+    @property
+    def front(self):
+        return self.deck.fronts[self.row]
+
+    @front.setter
+    def front(self, text):
+        self.deck.fronts[self.row] = text
+        self.deck.text_changed(self.row)
+
+    @property
+    def back(self):
+        return self.deck.backs[self.row]
+
+    @back.setter
+    def back(self, text):
+        self.deck.backs[self.row] = text
+        self.deck.text_changed(self.row)
+
+    @property
+    def card_id(self):
+        return self.deck.ids[self.row] or None
+
+    @card_id.setter
+    def card_id(self, card_id):
+        old_id = self.deck.ids[self.row]
+        self.deck.ids[self.row] = card_id or 0
+        self.deck.id_changed(self.row, old_id)
+
+    @property
+    def showing_front(self):
+        return not (self.deck.flags[self.row] & Deck.SHOWING_BACK) ^ self.deck.reversed
+
+    @showing_front.setter
+    def showing_front(self, showing):
+        if showing != self.showing_front:
+            self.flip()
+
+    def flip(self):
+        """Flip the flashcard to reveal the other side."""
+        self.deck.flags[self.row] ^= Deck.SHOWING_BACK
+
+    @property
+    def color(self):
+        packed = self.deck.colors[self.row]
+        return ((packed >> 16) & 255, (packed >> 8) & 255, packed & 255)
+
+    @color.setter
+    def color(self, color):
+        self.deck.colors[self.row] = (color[0] << 16) | (color[1] << 8) | color[2]
+
+    @property
+    def status(self):
+        return self.deck.statuses[self.row]
+
+    @status.setter
+    def status(self, status):
+        self.deck.statuses[self.row] = status
+
+class Deck(MutableSequence):
+    """List of flashcards stored as parallel columns, handing out CardView objects instead of holding Flashcards."""
+    SHOWING_BACK = 1  # Flag bit: the card shows its back (before the deck-wide reverse is applied)
+
+    def __init__(self, cards=()):
+        self.fronts, self.backs = [], []  # Card text
+        self.ids = array("q")  # Store ids (0 until saved)
+        self.colors = array("I")  # Packed 0xRRGGBB background colors
+        self.flags = array("B")  # Per-card flag bits
+        self.statuses = array("B")  # CARD_UNSEEN / CARD_KNOWN / CARD_UNKNOWN
+        self.order = array("I")  # Position -> row, so shuffles never move card data
+        self.reversed = False  # Deck-wide side flip, applied on top of each card's flag
+        self.index = None  # SearchIndex keyed by row, built on first search
+        self.replaced = set()  # Indexed rows overwritten by assignment, dropped from the index unless listed again
+        self.rows_by_id = None  # Store id -> row, built on first lookup by id
+        self.listed = None  # Row -> times it appears in order (0 once removed), kept alongside rows_by_id
+        for card in cards:
+            self.append(card)
+
+    @classmethod
+    def from_records(cls, records):
+        """Build a deck from store records ({"id", "front", "back"} plus optional "color" and "showing_front")."""
+        deck = cls()
+        for record in records:
+            row = deck.add_row(record["front"], record["back"], record.get("id"), record.get("color", (0, 0, 0)),
+                               record.get("showing_front", True), CARD_UNSEEN)
+            deck.order.append(row)
+        return deck
+
+    def add_row(self, front, back, card_id, color, showing_front, status):
+        """Store one card's data in the columns and return its row."""
+        self.fronts.append(front)
+        self.backs.append(back)
+        self.ids.append(card_id or 0)
+        self.colors.append((color[0] << 16) | (color[1] << 8) | color[2])
+        self.flags.append(0 if showing_front != self.reversed else self.SHOWING_BACK)
+        self.statuses.append(status)
+        if self.index is not None:
+            self.index.add(len(self.fronts) - 1, front, back)
+        if self.rows_by_id is not None:
+            self.listed.append(0)
+            if card_id:
+                self.rows_by_id[card_id] = len(self.fronts) - 1
+        return len(self.fronts) - 1
+
+    def extend_pairs(self, pairs):
+        """Append cards from (front, back) pairs straight into the columns, without building card objects."""
+        start, count = len(self.fronts), len(pairs)
+        self.fronts.extend(front for front, _ in pairs)
+        self.backs.extend(back for _, back in pairs)
+        self.ids.extend(array("q", [0]) * count)
+        self.colors.extend(array("I", [0]) * count)
+        self.flags.extend(array("B", [self.SHOWING_BACK if self.reversed else 0]) * count)
+        self.statuses.extend(array("B", [CARD_UNSEEN]) * count)
+        self.order.extend(range(start, start + count))
+        if self.listed is not None:
+            self.listed.extend(array("I", [1]) * count)
+        if self.index is not None:
+            for row in range(start, start + count):
+                self.index.add(row, self.fronts[row], self.backs[row])
+
+    def row_for(self, card):
+        """Return the row holding card, copying it into the columns if it came from elsewhere."""
+        if isinstance(card, CardView) and card.deck is self:
+            return card.row
+        return self.add_row(card.front, card.back, card.card_id, card.color, card.showing_front, card.status)
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [CardView(self, row) for row in self.order[index]]
+        return CardView(self, self.order[index])
+
+    def __setitem__(self, index, cards):
+        if isinstance(index, slice):
+            replaced, rows = self.order[index], array("I", map(self.row_for, cards))
+            self.order[index] = rows
+        else:
+            replaced, rows = [self.order[index]], [self.row_for(cards)]
+            self.order[index] = rows[0]  # Rows of removed cards stay until the deck is discarded
+        self.count_listed(replaced, -1)
+        self.count_listed(rows, 1)
+        if self.index is not None:
+            kept = set(rows)
+            self.replaced.update(row for row in replaced if row not in kept)  # A swap may list them again
+            for row in kept:
+                if row not in self.index.words:  # A view of this deck moved here from another position
+                    self.index.add(row, self.fronts[row], self.backs[row])
+
+    def __delitem__(self, index):
+        rows = self.order[index] if isinstance(index, slice) else [self.order[index]]
+        if self.index is not None:
+            for row in rows:
+                self.index.remove(row)
+        self.count_listed(rows, -1)
+        del self.order[index]
+
+    def insert(self, index, card):
+        row = self.row_for(card)
+        self.order.insert(index, row)
+        self.count_listed([row], 1)
+
+    def count_listed(self, rows, change):
+        """Keep the listing counts behind row_of in step as rows enter or leave order."""
+        if self.listed is not None:
+            for row in rows:
+                self.listed[row] += change
+
+    def row_of(self, card_id):
+        """Return the row of the listed card with a store id, or None; the lookup is built on first use, then kept."""
+        if self.rows_by_id is None:
+            self.rows_by_id = {card_id: row for row, card_id in enumerate(self.ids) if card_id}
+            self.listed = array("I", [0]) * len(self.ids)
+            for row in self.order:
+                self.listed[row] += 1
+        row = self.rows_by_id.get(card_id)
+        return row if row is not None and self.listed[row] else None
+
+    def id_changed(self, row, old_id):
+        """Move a row in the lookup by id after its store id was set or cleared."""
+        if self.rows_by_id is not None:
+            if self.rows_by_id.get(old_id) == row:
+                del self.rows_by_id[old_id]
+            if self.ids[row]:
+                self.rows_by_id[self.ids[row]] = row
+
+    def shuffle(self):
+        """Shuffle by permuting the order array; card data never moves."""
+        if np is not None and self.order:
+            order = np.frombuffer(self.order, dtype=np.uint32).copy()
+            np.random.default_rng(random.getrandbits(64)).shuffle(order)
+            self.order = array("I", order.tobytes())
+        else:
+            random.shuffle(self.order)
+
+    def remove_duplicates(self):
+        """Drop every card whose normalized text repeats an earlier card's, in one pass.
+
+        Returns (removed row, kept row) pairs; a kept card that was never reviewed takes the removed card's status.
+        """
+        kept_rows = {}  # card_key -> first row with it
+        order, pairs = array("I"), []
+        for row in self.order:
+            kept = kept_rows.setdefault(card_key(self.fronts[row], self.backs[row]), row)
+            if kept == row:
+                order.append(row)
+            else:
+                pairs.append((row, kept))
+                self.count_listed([row], -1)
+                if self.statuses[kept] == CARD_UNSEEN:
+                    self.statuses[kept] = self.statuses[row]
+                if self.index is not None:
+                    self.index.remove(row)
+        self.order = order
+        return pairs
+
+    def text_changed(self, row):
+        """Re-index a row after its front or back was edited."""
+        if self.index is not None:
+            self.index.remove(row)
+            self.index.add(row, self.fronts[row], self.backs[row])
+
+    def search_index(self):
+        """Return the deck's SearchIndex, building it on first use; rows are its keys."""
+        if self.index is None:
+            self.index = SearchIndex((row, self.fronts[row], self.backs[row]) for row in self.order)
+        elif self.replaced:
+            listed = set(self.order)  # One pass for any number of assignments, however they were swapped
+            for row in self.replaced - listed:
+                self.index.remove(row)
+        self.replaced.clear()
+        return self.index
+
+    def flip_all(self):
+        """Show the other side of every card in O(1)."""
+        self.reversed = not self.reversed
+
+    def recolor(self, colors):
+        """Replace every card's color at once, given colors in deck order."""
+        for row, color in zip(self.order, colors):
+            self.colors[row] = (color[0] << 16) | (color[1] << 8) | color[2]
+
+    def all_colors(self):
+        """Return every card's color in deck order."""
+        colors = self.colors
+        return [((colors[row] >> 16) & 255, (colors[row] >> 8) & 255, colors[row] & 255) for row in self.order]
+
+class SearchIndex:
+    """Inverted index from lowercased word to the keys of the cards using it, searched by word prefix."""
+    FRONT_EXACT, BACK_EXACT, FRONT_PREFIX, BACK_PREFIX = 4, 3, 2, 1  # Match weights, best first
+    COUNTED_WORDS = 64  # Completions whose postings are counted exactly when picking the search driver
+
+    def __init__(self, documents=()):
+        self.postings = (defaultdict(set), defaultdict(set))  # Per side (front, back): word -> set of keys
+        self.words = {}  # Key -> (front words, back words), for removal and multi-word matching
+        front_postings, back_postings = self.postings
+        tokenize = self.tokenize
+        for key, front, back in documents:  # Bulk build: the vocabulary is sorted once at the end
+            sides = self.words[key] = (frozenset(tokenize(front)), frozenset(tokenize(back)))
+            for word in sides[0]:
+                front_postings[word].add(key)
+            for word in sides[1]:
+                back_postings[word].add(key)
+        self.vocabulary = sorted(front_postings.keys() | back_postings.keys())  # Every indexed word, for prefix ranges
+
+    @staticmethod
+    def tokenize(text):
+        return TOKEN_PATTERN.findall(text.casefold())
+
+    def add(self, key, front, back):
+        """Index a card."""
+        sides = self.words[key] = (frozenset(self.tokenize(front)), frozenset(self.tokenize(back)))
+        for side, words in enumerate(sides):
+            for word in words:
+                if word not in self.postings[0] and word not in self.postings[1]:
+                    insort(self.vocabulary, word)
+                self.postings[side][word].add(key)
+
+    def remove(self, key):
+        """Drop a card from the index."""
+        sides = self.words.pop(key, None)
+        if sides is None:
+            return
+        for side, words in enumerate(sides):
+            postings = self.postings[side]
+            for word in words:
+                keys = postings[word]
+                keys.discard(key)
+                if not keys:
+                    del postings[word]
+                    if word not in self.postings[1 - side]:
+                        del self.vocabulary[bisect_left(self.vocabulary, word)]
+
+    def completions(self, prefix):
+        """Yield the indexed words starting with prefix, in order."""
+        vocabulary = self.vocabulary
+        for position in range(bisect_left(vocabulary, prefix), len(vocabulary)):
+            if not vocabulary[position].startswith(prefix):
+                return
+            yield vocabulary[position]
+
+    def ranked_matches(self, term):
+        """Yield (key, weight) for every card matching term, tier by tier: exact before prefix, front before back."""
+        seen = set()
+        tiers = ((self.FRONT_EXACT, 0, (term,)), (self.BACK_EXACT, 1, (term,)),
+                 (self.FRONT_PREFIX, 0, self.completions(term)), (self.BACK_PREFIX, 1, self.completions(term)))
+        for weight, side, words in tiers:
+            postings = self.postings[side]
+            for word in words:
+                for key in postings.get(word, ()):
+                    if key not in seen:
+                        seen.add(key)
+                        yield key, weight
+
+    def weight(self, key, term):
+        """Return how well a card matches one search term (0 when it does not)."""
+        front, back = self.words[key]
+        if term in front:
+            return self.FRONT_EXACT
+        if term in back:
+            return self.BACK_EXACT
+        if any(word.startswith(term) for word in front):
+            return self.FRONT_PREFIX
+        if any(word.startswith(term) for word in back):
+            return self.BACK_PREFIX
+        return 0
+
+    def completion_count(self, prefix):
+        """Return how many indexed words start with prefix (two binary searches)."""
+        return bisect_left(self.vocabulary, prefix + "\U0010ffff") - bisect_left(self.vocabulary, prefix)
+
+    def posting_count(self, prefix, cap):
+        """Return how many postings the words starting with prefix have, stopping early once past cap.
+
+        Past COUNTED_WORDS completions the rest count one posting each, a lower bound that keeps common
+        prefixes cheap to size.
+        """
+        words = self.completion_count(prefix)
+        if words > cap:
+            return words  # Every word has at least one posting
+        front_postings, back_postings = self.postings
+        total = 0
+        for counted, word in enumerate(self.completions(prefix)):
+            if total > cap or counted == self.COUNTED_WORDS:
+                return total + words - counted
+            total += len(front_postings.get(word, ())) + len(back_postings.get(word, ()))
+        return total
+
+    def search(self, query, limit=SEARCH_RESULTS):
+        """Return (best keys, whether more cards matched); every query word must start a word of the card.
+
+        Candidates come from the most selective word in rank order, so the walk stops as soon as limit
+        cards have matched instead of scoring every candidate.
+        """
+        terms = list(dict.fromkeys(self.tokenize(query)))
+        if not terms:
+            return [], False
+        driver, fewest = None, float("inf")
+        for term in terms:  # Smallest total posting size: the fewest candidates to walk
+            count = self.posting_count(term, fewest)
+            if count < fewest:
+                driver, fewest = term, count
+        others = [term for term in terms if term != driver]
+        matches = []  # (score, key) in discovery order
+        for key, weight in self.ranked_matches(driver):
+            weights = [self.weight(key, term) for term in others]
+            if all(weights):
+                if len(matches) == limit:
+                    break
+                matches.append((weight + sum(weights), key))
         else:
-            lines.append(current_line)  # Store full line
-            current_line = word  # Start new line
-    if current_line:
-        lines.append(current_line)  # Add last line
-    return lines  # Return processed lines
+            return [key for _, key in sorted(matches, key=lambda match: -match[0])], False
+        return [key for _, key in sorted(matches, key=lambda match: -match[0])], True
+
+# Text rendering utilities
+class TextLayoutEngine:
+    """Greedy word-wrap engine that measures each word once per font and memoizes whole layouts."""
+    WRAP_MARGIN = 20  # Horizontal margin reserved by margin-mode layouts
+    WORD_PATTERN = re.compile(r"[^ ]+")  # Words are separated by spaces only
+    KERNING_SLACK = 2  # Per-word pixel error allowed before a summed width is re-measured exactly
+
+    def __init__(self, max_layouts=2048, max_words=50000):
+        self.max_layouts = max_layouts  # Cached layouts kept before LRU eviction
+        self.max_words = max_words  # Measured words kept per font before resetting
+        self.layouts = OrderedDict()  # (text, font, max_width, margin) -> tuple of lines
+        self.word_widths = {}  # Font -> {word: pixel width}
+
+    def width_table(self, font):
+        """Return the font's {word: width} table, restarting it once it grows past max_words."""
+        widths = self.word_widths.get(font)
+        if widths is None or len(widths) > self.max_words:
+            widths = self.word_widths[font] = {}
+        return widths
+
+    def measure(self, word, font):
+        """Return the rendered width of a single word, measuring it at most once per font."""
+        widths = self.width_table(font)
+        width = widths.get(word)
+        if width is None:
+            width = widths[word] = font.size(word)[0]
+        return width
+
+    def wrap(self, text, font, max_width, margin=False):
+        """Return the wrapped lines for text, reusing the cached layout if nothing changed."""
+        key = (text, font, max_width, margin)
+        lines = self.layouts.get(key)
+        if lines is not None:
+            self.layouts.move_to_end(key)  # Mark as most recently used
+            return lines
+
+        lines = self.layout_margin(text, font, max_width) if margin else self.layout_plain(text, font, max_width)
+        self.layouts[key] = lines
+        if len(self.layouts) > self.max_layouts:
+            self.layouts.popitem(last=False)  # Evict least recently used layout
+        return lines
+
+    def layout_margin(self, text, font, max_width):
+        """Wrap on any whitespace, joining words with single spaces inside a margin."""
+        limit = max_width - self.WRAP_MARGIN
+        space = self.measure(" ", font)
+        lines, current, current_width = [], [], 0
+        for word in text.split():
+            word_width = self.measure(word, font)
+            test_width = current_width + space + word_width if current else word_width
+            if current and abs(test_width - limit) <= self.KERNING_SLACK * (len(current) + 1):  # Too close to call
+                test_width = font.size(" ".join(current + [word]))[0]
+            if test_width <= limit or not current:
+                current.append(word)
+                current_width = test_width
+            else:
+                lines.append(" ".join(current))  # Store full line
+                current, current_width = [word], word_width  # Start new line
+        if current:
+            lines.append(" ".join(current))  # Add last line
+        return tuple(lines)
+
+    def layout_plain(self, text, font, max_width):
+        """Wrap on single spaces, keeping a trailing space after every word."""
+        space = self.measure(" ", font)
+        lines, current, current_width, count = [], "", 0, 0
+        for word in text.split(" "):
+            word_width = self.measure(word, font) + space
+            test_width = current_width + word_width
+            if current and abs(test_width - max_width) <= self.KERNING_SLACK * (count + 1):  # Too close to call
+                test_width = font.size(current + word + " ")[0]
+            if test_width > max_width and current != "":  # If too wide, start new line
+                lines.append(current)
+                current, current_width, count = word + " ", word_width, 1
+            else:
+                current += word + " "
+                current_width, count = test_width, count + 1
+        lines.append(current)  # Add the final line
+        return tuple(lines)
+
+    def break_offsets(self, text, font, max_width, base=0):
+        """Yield base plus the offset of each line break when text is wrapped to max_width (spaces hang at line ends)."""
+        spans = [match.span() for match in self.WORD_PATTERN.finditer(text)]
+        if not spans:
+            return
+        space = self.measure(" ", font)
+        table = self.width_table(font)
+        words = [text[start:end] for start, end in spans]
+        widths = [table[word] if word in table else self.measure(word, font) for word in words]
+        gaps = [spans[0][0]] + [start - end for (start, _), (_, end) in zip(spans[1:], spans)]
+        rights = list(accumulate(gap * space + width for gap, width in zip(gaps, widths)))  # Right edge of each word
+        count = len(spans)
+
+        def fits(word):
+            return font.size(text[line_start:spans[word][1]])[0] <= max_width
+
+        first, line_start, line_left = 0, 0, 0  # First word, text offset and estimated x of the current line
+        while first < count:
+            if not fits(first):
+                # Hard-break words wider than the line
+                while not fits(first):
+                    line_start += self.fit_chars(text[line_start:spans[first][1]], font, max_width)
+                    yield base + line_start
+                line_left = rights[first] - font.size(text[line_start:spans[first][1]])[0]
+
+            # Estimate the last word that fits from the summed widths, then correct it near the limit
+            last = max(first, bisect_right(rights, line_left + max_width, first) - 1)
+            slack = self.KERNING_SLACK * (last - first + 2)
+            if rights[last] - line_left > max_width - slack:
+                while last > first and not fits(last):
+                    last -= 1
+            while last + 1 < count and rights[last + 1] - line_left <= max_width + slack and fits(last + 1):
+                last += 1
+
+            first = last + 1
+            if first < count:
+                line_start = spans[first][0]
+                line_left = rights[first] - widths[first]
+                yield base + line_start  # The next word starts a new line
+
+    def fit_chars(self, text, font, width):
+        """Return how many leading characters of text fit in width (at least one)."""
+        low, high = 1, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if font.size(text[:mid])[0] <= width:
+                low = mid
+            else:
+                high = mid - 1
+        return low
+
+    def nearest_offset(self, text, font, x):
+        """Return the character boundary in text closest to horizontal position x."""
+        low, high = 0, len(text)
+        while low < high:  # Binary search over character boundaries
+            mid = (low + high) // 2
+            left, right = font.size(text[:mid])[0], font.size(text[:mid + 1])[0]
+            if (left + right) / 2 < x:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+TEXT_LAYOUT = TextLayoutEngine()  # Shared by all text wrapping helpers
+
+def wrap_text(text, font, max_width, margin=False):
+    """Split text into lines that fit within max_width (inside a 20px margin if margin is set)."""
+    return TEXT_LAYOUT.wrap(text, font, max_width, margin)
 
 def calculate_text_dimensions(lines, font):
     """Calculate the total height of multi-line text."""
     return font.get_height(), len(lines) * font.get_height()
 
-def draw_text_in_box(text, rect, font, color, scroll_offset=0, target_surface=screen):
-    """Render wrapped text within a defined box."""
+def draw_text_in_box(text, rect, font, color, scroll_offset=0, target_surface=None):
+    """Render wrapped text within a defined box (on the screen unless target_surface is given)."""
+    target_surface = target_surface or screen
     x, y, width, height = rect
-    lines = get_wrapped_lines(text, font, width)  # Get text lines
+    lines = wrap_text(text, font, width, margin=True)  # Get text lines
     line_height, total_text_height = calculate_text_dimensions(lines, font)  # Determine dimensions
 
     # Adjust start position based on text height
     start_y = y + (height - total_text_height) // 2 - scroll_offset if total_text_height < height else y - scroll_offset
 
     for line in lines:
-        rendered_line = font.render(line, True, color)  # Render text line
+        rendered_line = render_text(line, font, color)  # Render text line
         target_surface.blit(rendered_line, (x + (width - rendered_line.get_width()) // 2, start_y))  # Center text
         start_y += line_height  # Move to next line
 
@@ -148,8 +964,7 @@ def draw_flashcard(card, pos=(100, 200), size=(600, 200), scroll_offset=0):
     """Draw a flashcard at the specified position."""
     x, y = pos
     w, h = size
-    bg_color = getattr(card, "color", (0, 0, 0))  # Get card's background color
-    pygame.draw.rect(screen, bg_color, (x, y, w, h))  # Draw card rectangle
+    pygame.draw.rect(screen, card.color, (x, y, w, h))  # Card background
     text = card.front if card.showing_front else card.back  # Display front or back text
     draw_text_in_box(text, (x, y, w, h), FONT, WHITE, scroll_offset)  # Render text
 
@@ -163,405 +978,906 @@ def create_button_pair(y_pos, width=200, height=50, spacing=200):
     right_rect = pygame.Rect(left_rect.right + spacing, y_pos, width, height)
     return left_rect, right_rect
 
-def draw_button(text, rect, color=GRAY):
+def draw_button(text, rect, color=GRAY, target_surface=None):
     """Render a button with text."""
-    pygame.draw.rect(screen, color, rect)
-    pygame.draw.rect(screen, WHITE, rect, 3)  # Outline
-    text_rendered = FONT.render(text, True, BLACK)  # Render button text
+    target_surface = target_surface or screen
+    pygame.draw.rect(target_surface, color, rect)
+    pygame.draw.rect(target_surface, WHITE, rect, 3)  # Outline
+    text_rendered = render_text(text, FONT, BLACK)  # Render button text
     text_rect = text_rendered.get_rect(center=rect.center)  # Center text
-    screen.blit(text_rendered, text_rect)  # Draw text on button
+    target_surface.blit(text_rendered, text_rect)  # Draw text on button
 
 def render_flashcard_surface(card, size=(600, 200)):
     """Create a separate surface for flashcard rendering."""
     surface = pygame.Surface(size, pygame.SRCALPHA)  # Transparent background
-    bg_color = getattr(card, "color", (0, 0, 0))  # Get flashcard color
-    surface.fill(bg_color)  # Fill surface with color
+    surface.fill(card.color)  # Fill surface with the card's color
     text = card.front if card.showing_front else card.back  # Get flashcard text
     draw_text_in_box(text, (0, 0, size[0], size[1]), FONT, WHITE, 0, target_surface=surface)  # Render text
     return surface
 
-def wrap_text(text, font, max_width):
-    """Splits text into lines that fit within the max width."""
-    words = text.split(' ')  # Split text into words
-    lines = []
-    current_line = ""
-    for word in words:
-        test_line = current_line + word + " "  # Simulate adding the word
-        width, _ = font.size(test_line)  # Check the rendered width
-        if width > max_width and current_line != "":  # If too wide, start new line
-            lines.append(current_line)
-            current_line = word + " "
-        else:
-            current_line = test_line
-    lines.append(current_line)  # Add the final line
-    return lines
+CARD_FRAMES = SurfaceCache(CARD_FRAME_CACHE_BUDGET)  # Card text layers and full-size faces
+
+def card_text_layer(text, size=(600, 200)):
+    """Return a card's wrapped white text on a transparent surface, rendered once per text and size."""
+    def build():
+        layer = pygame.Surface(size, pygame.SRCALPHA)
+        draw_text_in_box(text, (0, 0, size[0], size[1]), FONT, WHITE, 0, target_surface=layer)
+        return layer
+    return CARD_FRAMES.get(("text", text, size), build)
+
+def card_face(text, color, size=(600, 200), border=0):
+    """Return a full-size card face in color, optionally with a white border."""
+    def build():
+        face = pygame.Surface(size)
+        face.fill(color)
+        if border:
+            pygame.draw.rect(face, WHITE, (0, 0, size[0], size[1]), border)
+        face.blit(card_text_layer(text, size), (0, 0))
+        return face
+    return CARD_FRAMES.get(("face", text, tuple(color), size, border), build)
+
+class SurfacePool:
+    """Small pool of reusable scratch surfaces, keyed by size."""
+    def __init__(self, max_per_size=2):
+        self.max_per_size = max_per_size  # Free surfaces kept for each size
+        self.free = {}  # Size -> list of free surfaces
+
+    def acquire(self, size):
+        """Return a free surface of the given size, creating one if none is available."""
+        surfaces = self.free.get(size)
+        return surfaces.pop() if surfaces else pygame.Surface(size)
+
+    def release(self, surface):
+        """Give a surface back to the pool for reuse."""
+        surfaces = self.free.setdefault(surface.get_size(), [])
+        if len(surfaces) < self.max_per_size:
+            surfaces.append(surface)
+
+SCRATCH_SURFACES = SurfacePool()  # Scratch space for squeezed animation frames
+
+def play_flip(face_at, pos, duration, draw_background=None):
+    """Squeeze a card shut and open again over duration seconds; face_at(progress) returns the full-size face."""
+    size = face_at(0.0).get_size()
+    scratch = SCRATCH_SURFACES.acquire(size)
+    start = time.time()
+    progress = 0.0
+    while progress < 1.0:
+        progress = min(1.0, (time.time() - start) / duration)  # Based on elapsed time, not frame count
+        width = max(1, int(size[0] * abs(1 - 2 * progress)))  # Squash effect
+        frame = scratch.subsurface((0, 0, width, size[1]))
+        pygame.transform.scale(face_at(progress), (width, size[1]), frame)
 
+        screen.fill(WHITE)
+        if draw_background:
+            draw_background()
+        screen.blit(frame, (pos[0] + (size[0] - width) // 2, pos[1]))  # Centering effect
+        pygame.display.flip()
+        scheduler.animation_tick()
+    SCRATCH_SURFACES.release(scratch)
 
 # Input handling utilities
-def handle_text_input(event, current_text, cursor_pos):
-    """Handles text input events such as typing, deleting, and moving cursor."""
-    if event.key == pygame.K_BACKSPACE and cursor_pos > 0:
-        return current_text[:cursor_pos-1] + current_text[cursor_pos:], cursor_pos - 1
-    elif event.key == pygame.K_DELETE and cursor_pos < len(current_text):
-        return current_text[:cursor_pos] + current_text[cursor_pos+1:], cursor_pos
-    elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
-        return None, None  # Finish input
-    elif event.key == pygame.K_LEFT:
-        return current_text, max(0, cursor_pos - 1)  # Move cursor left
-    elif event.key == pygame.K_RIGHT:
-        return current_text, min(len(current_text), cursor_pos + 1)  # Move cursor right
-    elif event.key == pygame.K_HOME:
-        return current_text, 0  # Move cursor to start
-    elif event.key == pygame.K_END:
-        return current_text, len(current_text)  # Move cursor to end
-    else:
-        return current_text[:cursor_pos] + event.unicode + current_text[cursor_pos:], cursor_pos + len(event.unicode)
+clipboard_fallback = ""  # Used when the system clipboard is unavailable
+
+def clipboard_get():
+    """Return text from the system clipboard."""
+    try:
+        return pygame.scrap.get_text() or ""
+    except (pygame.error, AttributeError):
+        return clipboard_fallback
+
+def clipboard_put(text):
+    """Copy text to the system clipboard."""
+    global clipboard_fallback
+    clipboard_fallback = text
+    try:
+        pygame.scrap.put_text(text)
+    except (pygame.error, AttributeError):
+        pass
+
+
+class GapBuffer:
+    """Character buffer with a movable gap at the edit point, so typing doesn't copy the whole text."""
+    def __init__(self, text="", capacity=64):
+        self.chars = list(text) + [""] * capacity  # Text before the gap, the gap, then text after it
+        self.gap_start = len(text)
+        self.gap_end = len(self.chars)
+
+    def __len__(self):
+        return len(self.chars) - (self.gap_end - self.gap_start)
+
+    def move_gap(self, pos):
+        """Move the gap so it starts at pos."""
+        if pos < self.gap_start:
+            count = self.gap_start - pos
+            self.chars[self.gap_end - count:self.gap_end] = self.chars[pos:self.gap_start]
+            self.gap_start, self.gap_end = pos, self.gap_end - count
+        elif pos > self.gap_start:
+            count = pos - self.gap_start
+            self.chars[self.gap_start:pos] = self.chars[self.gap_end:self.gap_end + count]
+            self.gap_start, self.gap_end = pos, self.gap_end + count
+
+    def insert(self, pos, text):
+        """Insert text at pos."""
+        self.move_gap(pos)
+        if len(text) > self.gap_end - self.gap_start:  # Grow the gap geometrically
+            extra = max(len(text), len(self.chars))
+            self.chars[self.gap_end:self.gap_end] = [""] * extra
+            self.gap_end += extra
+        self.chars[self.gap_start:self.gap_start + len(text)] = text
+        self.gap_start += len(text)
+
+    def delete(self, start, end):
+        """Remove the characters in [start, end)."""
+        self.move_gap(start)
+        self.gap_end += end - start  # Deleted characters simply join the gap
+
+    def get(self, start, end):
+        """Return the text in [start, end)."""
+        gap = self.gap_end - self.gap_start
+        if end <= self.gap_start:
+            return "".join(self.chars[start:end])
+        if start >= self.gap_start:
+            return "".join(self.chars[start + gap:end + gap])
+        return "".join(self.chars[start:self.gap_start]) + "".join(self.chars[self.gap_end:end + gap])
+
+    def text(self):
+        """Return the whole text."""
+        return self.get(0, len(self))
+
+
+class TextEditor:
+    """Word-wrapped text field backed by a gap buffer, with selection, clipboard and incremental re-wrap."""
+    PADDING = 10  # Space between the field border and the text
+
+    def __init__(self, rect, font=FONT, text=""):
+        self.rect = pygame.Rect(rect)
+        self.font = font
+        self.wrap_width = self.rect.width - 2 * self.PADDING
+        self.buffer = GapBuffer()
+        self.line_starts = [0]  # Offset of the first character of every wrapped line
+        self.cursor = 0  # Caret position
+        self.anchor = 0  # Other end of the selection (equal to cursor when nothing is selected)
+        self.first_line = 0  # First wrapped line shown in the field
+        self.visible_lines = max(1, (self.rect.height - self.PADDING) // font.get_height())
+        if text:
+            self.replace(0, 0, text)
+
+    @property
+    def text(self):
+        return self.buffer.text()
+
+    def selection(self):
+        """Return the selected range as (start, end)."""
+        return min(self.cursor, self.anchor), max(self.cursor, self.anchor)
+
+    def selected_text(self):
+        start, end = self.selection()
+        return self.buffer.get(start, end)
+
+    # Layout
+    def line_of(self, pos):
+        """Return the wrapped line containing pos."""
+        return bisect_right(self.line_starts, pos) - 1
+
+    def line_range(self, line):
+        """Return (start, end) offsets of a wrapped line."""
+        end = self.line_starts[line + 1] if line + 1 < len(self.line_starts) else len(self.buffer)
+        return self.line_starts[line], end
+
+    def wrap_from(self, start):
+        """Yield the start offsets of the wrapped lines that follow the line beginning at start."""
+        return TEXT_LAYOUT.break_offsets(self.buffer.get(start, len(self.buffer)), self.font, self.wrap_width, start)
+
+    def rewrap(self, edit_start, edit_end, delta):
+        """Re-wrap from the line before an edit until the new line breaks line up with the old ones again."""
+        old_starts = self.line_starts
+        line = max(0, self.line_of(edit_start) - 1)  # An edit can pull words back onto the previous line
+        new_starts = old_starts[:line + 1]
+        first_unchanged = bisect_left(old_starts, edit_end)  # Old lines starting after the edited text
+        for start in self.wrap_from(old_starts[line]):
+            if start >= edit_end + delta:
+                old = bisect_left(old_starts, start - delta, first_unchanged)
+                if old < len(old_starts) and old_starts[old] == start - delta:
+                    new_starts.extend(o + delta for o in old_starts[old:])  # Rest of the layout is unchanged
+                    break
+            new_starts.append(start)
+        self.line_starts = new_starts
+
+    # Editing
+    def replace(self, start, end, text):
+        """Replace [start, end) with text and re-wrap the affected lines."""
+        text = text.replace("\r\n", " ").replace("\n", " ").replace("\r", " ").replace("\t", " ")
+        if start != end:
+            self.buffer.delete(start, end)
+        if text:
+            self.buffer.insert(start, text)
+        self.rewrap(start, end, len(text) - (end - start))
+        self.cursor = self.anchor = start + len(text)
+        self.scroll_to_cursor()
+
+    def insert(self, text):
+        """Type or paste text at the caret, replacing any selection."""
+        start, end = self.selection()
+        self.replace(start, end, text)
+
+    def delete_selection_or(self, start, end):
+        """Delete the selection if there is one, otherwise [start, end)."""
+        if self.cursor != self.anchor:
+            start, end = self.selection()
+        if start < end:
+            self.replace(start, end, "")
+
+    def move_cursor(self, pos, extend=False):
+        """Move the caret, extending the selection when extend is set."""
+        self.cursor = max(0, min(pos, len(self.buffer)))
+        if not extend:
+            self.anchor = self.cursor
+        self.scroll_to_cursor()
+
+    def scroll_to_cursor(self):
+        """Scroll the field so the caret's line is visible."""
+        line = self.line_of(self.cursor)
+        if line < self.first_line:
+            self.first_line = line
+        elif line >= self.first_line + self.visible_lines:
+            self.first_line = line - self.visible_lines + 1
+
+    # Coordinate mapping
+    def cursor_position(self):
+        """Return the screen (x, y) of the caret."""
+        line = self.line_of(self.cursor)
+        start, _ = self.line_range(line)
+        x = self.rect.left + self.PADDING + self.font.size(self.buffer.get(start, self.cursor))[0]
+        y = self.rect.top + self.PADDING // 2 + (line - self.first_line) * self.font.get_height()
+        return x, y
+
+    def cursor_rect(self):
+        """Return the screen area covered by the caret."""
+        x, y = self.cursor_position()
+        return pygame.Rect(x - 1, y, 3, self.font.get_height())
+
+    def index_at(self, point):
+        """Return the text offset closest to a screen point."""
+        x, y = point
+        line = self.first_line + (y - self.rect.top - self.PADDING // 2) // self.font.get_height()
+        line = max(0, min(line, len(self.line_starts) - 1))
+        return self.index_in_line(line, x - self.rect.left - self.PADDING)
+
+    def index_in_line(self, line, x):
+        """Return the offset in a wrapped line closest to horizontal position x."""
+        start, end = self.line_range(line)
+        text = self.buffer.get(start, end)
+        if line + 1 < len(self.line_starts):
+            text = text.rstrip(" ") or text[:1]  # Trailing spaces of a wrapped line can't hold the caret
+        return start + TEXT_LAYOUT.nearest_offset(text, self.font, x)
+
+    # Events
+    def handle_event(self, event):
+        """Apply a keyboard or mouse event to the field."""
+        if event.type == pygame.KEYDOWN:
+            self.handle_key(event)
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.rect.collidepoint(event.pos):
+            self.move_cursor(self.index_at(event.pos), extend=bool(pygame.key.get_mods() & pygame.KMOD_SHIFT))
+        elif event.type == pygame.MOUSEMOTION and event.buttons[0] and self.rect.collidepoint(event.pos):
+            self.move_cursor(self.index_at(event.pos), extend=True)  # Drag to select
+            scheduler.invalidate(self.rect)
+        elif event.type == pygame.MOUSEWHEEL:
+            self.first_line = max(0, min(self.first_line - event.y, len(self.line_starts) - self.visible_lines))
+
+    def handle_key(self, event):
+        """Handles typing, deleting, cursor movement, selection and clipboard shortcuts."""
+        shift = bool(event.mod & pygame.KMOD_SHIFT)
+        ctrl = bool(event.mod & (pygame.KMOD_CTRL | pygame.KMOD_META))
+        if ctrl and event.key == pygame.K_a:
+            self.anchor, self.cursor = 0, len(self.buffer)  # Select all
+        elif ctrl and event.key in (pygame.K_c, pygame.K_x):
+            if self.cursor != self.anchor:
+                clipboard_put(self.selected_text())
+                if event.key == pygame.K_x:
+                    self.delete_selection_or(self.cursor, self.cursor)
+        elif ctrl and event.key == pygame.K_v:
+            self.insert(clipboard_get())
+        elif event.key == pygame.K_BACKSPACE:
+            self.delete_selection_or(max(0, self.cursor - 1), self.cursor)
+        elif event.key == pygame.K_DELETE:
+            self.delete_selection_or(self.cursor, min(len(self.buffer), self.cursor + 1))
+        elif event.key == pygame.K_LEFT:
+            self.move_cursor(self.cursor - 1, shift)  # Move cursor left
+        elif event.key == pygame.K_RIGHT:
+            self.move_cursor(self.cursor + 1, shift)  # Move cursor right
+        elif event.key in (pygame.K_UP, pygame.K_DOWN):
+            line = self.line_of(self.cursor) + (-1 if event.key == pygame.K_UP else 1)
+            if 0 <= line < len(self.line_starts):
+                x = self.cursor_position()[0] - self.rect.left - self.PADDING
+                self.move_cursor(self.index_in_line(line, x), shift)
+        elif event.key == pygame.K_HOME:
+            self.move_cursor(0, shift)  # Move cursor to start
+        elif event.key == pygame.K_END:
+            self.move_cursor(len(self.buffer), shift)  # Move cursor to end
+        elif event.unicode and event.unicode.isprintable():
+            self.insert(event.unicode)
+
+    # Rendering
+    def draw(self, surface, show_cursor=True, color=BLACK):
+        """Render the visible lines, the selection highlight and the caret."""
+        line_height = self.font.get_height()
+        left, top = self.rect.left + self.PADDING, self.rect.top + self.PADDING // 2
+        sel_start, sel_end = self.selection()
+        previous_clip = surface.get_clip()
+        surface.set_clip(self.rect.clip(previous_clip))
+        last_line = min(len(self.line_starts), self.first_line + self.visible_lines + 1)
+        for line in range(self.first_line, last_line):
+            start, end = self.line_range(line)
+            text = self.buffer.get(start, end)
+            y = top + (line - self.first_line) * line_height
+            if sel_start < end and sel_end > start:  # Highlight the selected part of this line
+                x1 = left + self.font.size(text[:max(0, sel_start - start)])[0]
+                x2 = left + self.font.size(text[:min(end, sel_end) - start])[0]
+                pygame.draw.rect(surface, (170, 190, 255), (x1, y, max(1, x2 - x1), line_height))
+            surface.blit(render_text(text, self.font, color), (left, y))
+        if show_cursor:
+            x, y = self.cursor_position()
+            pygame.draw.line(surface, color, (x, y), (x, y + line_height), 2)
+        surface.set_clip(previous_clip)
 
 
-def get_text_input(prompt):
-    """Handles user input for text fields with blinking cursor effect."""
-    input_text = ""
-    cursor_pos = 0
+def get_text_input(prompt, text=""):
+    """Handles user input for text fields with blinking cursor effect, starting from text."""
     active = True
-    blink_timer = 0
     show_cursor = True
+    next_blink = pygame.time.get_ticks() + CURSOR_BLINK_MS
+    screen_id = scheduler.enter_screen()
 
-    while active:
-        screen.fill(WHITE)  # Clear screen
-        prompt_surface = FONT.render(prompt, True, BLACK)
-        prompt_x = (WIDTH - prompt_surface.get_width()) // 2
-        prompt_y = (HEIGHT - prompt_surface.get_height()) // 2 - 50
-        screen.blit(prompt_surface, (prompt_x, prompt_y))
-
-        # Create input box
-        input_rect = pygame.Rect((WIDTH - 700) // 2, prompt_y + prompt_surface.get_height() + 20, 700, 150)
-        pygame.draw.rect(screen, GRAY, input_rect)  # Background
-        pygame.draw.rect(screen, BLACK, input_rect, 2)  # Border
-
-        # Wrap text at cursor position
-        full_text_wrapped = wrap_text(input_text, FONT, input_rect.width - 20)
-
-        # Draw text and cursor
-        y_offset = input_rect.top + 5
-        current_pos = 0
-        cursor_x, cursor_y = input_rect.left + 10, y_offset
-
-        for line in full_text_wrapped:
-            line_surf = FONT.render(line, True, BLACK)
-            screen.blit(line_surf, (input_rect.left + 10, y_offset))
+    # Prompt and input box layout
+    prompt_surface = render_text(prompt, FONT, BLACK)
+    prompt_x = (WIDTH - prompt_surface.get_width()) // 2
+    prompt_y = (HEIGHT - prompt_surface.get_height()) // 2 - 50
+    input_rect = pygame.Rect((WIDTH - 700) // 2, prompt_y + prompt_surface.get_height() + 20, 700, 150)
+    editor = TextEditor(input_rect, text=text)
 
-            # Find cursor position within wrapped text
-            if current_pos + len(line) >= cursor_pos and current_pos <= cursor_pos:
-                cursor_x = input_rect.left + 10 + FONT.size(line[:cursor_pos - current_pos])[0]
-                cursor_y = y_offset
+    def draw_static(layer):
+        layer.blit(prompt_surface, (prompt_x, prompt_y))
+        pygame.draw.rect(layer, GRAY, input_rect)  # Background
+        pygame.draw.rect(layer, BLACK, input_rect, 2)  # Border
 
-            current_pos += len(line)
-            y_offset += FONT.get_height()
+    def draw_dynamic():
+        editor.draw(screen, show_cursor)
 
+    while active:
         # Blink cursor effect
-        blink_timer += 1
-        if blink_timer >= FPS // 2:
+        if pygame.time.get_ticks() >= next_blink:
             show_cursor = not show_cursor
-            blink_timer = 0
-        if show_cursor:
-            pygame.draw.line(screen, BLACK, (cursor_x, cursor_y), 
-                           (cursor_x, cursor_y + FONT.get_height()), 2)
+            next_blink = pygame.time.get_ticks() + CURSOR_BLINK_MS
+            scheduler.invalidate(editor.cursor_rect())  # Only the cursor changes
 
-        pygame.display.flip()
+        if scheduler.begin_frame(screen_id):
+            layer = compositor.static_layer(("text_input", prompt), draw_static)
+            compositor.present(layer, draw_dynamic, scheduler.frame_rects)
 
-        # Handle events
-        for event in pygame.event.get():
+        # Handle events, sleeping until the next cursor blink at most
+        for event in scheduler.wait_events(next_blink - pygame.time.get_ticks()):
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_RETURN:
-                    active = False
-                    break
-                input_text, cursor_pos = handle_text_input(event, input_text, cursor_pos)
-                show_cursor = True
-                blink_timer = 0
-
-        clock.tick(FPS)
+                quit_app()
+            elif event.type == pygame.KEYDOWN and event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+                active = False
+                break
+            else:
+                editor.handle_event(event)
+                if event.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+                    show_cursor = True
+                    next_blink = pygame.time.get_ticks() + CURSOR_BLINK_MS
 
-    return input_text
+    return editor.text
 
 
 def get_answer_input(question):
     """Displays a question and captures user input as an answer."""
-    input_text = ""
     active = True
-    while active:
-        screen.fill(WHITE)
-        question_surface = BIG_FONT.render(question, True, BLACK)
+    show_cursor = True
+    next_blink = pygame.time.get_ticks() + CURSOR_BLINK_MS
+    screen_id = scheduler.enter_screen()
+    input_rect = pygame.Rect(150, 290, 500, 50)  # Input field
+    editor = TextEditor(input_rect)
+
+    def draw_static(layer):
+        question_surface = render_text(question, BIG_FONT, BLACK)
         qs_rect = question_surface.get_rect(center=(WIDTH // 2, 150))
-        screen.blit(question_surface, qs_rect.topleft)
+        layer.blit(question_surface, qs_rect.topleft)
 
         # Answer label
-        answer_label = FONT.render("Answer:", True, BLACK)
-        screen.blit(answer_label, (50, 300))
+        answer_label = render_text("Answer:", FONT, BLACK)
+        layer.blit(answer_label, (50, 300))
 
-        # Input field
-        input_rect = pygame.Rect(150, 290, 500, 50)
-        pygame.draw.rect(screen, GRAY, input_rect)
-        pygame.draw.rect(screen, BLACK, input_rect, 2)
+        pygame.draw.rect(layer, GRAY, input_rect)
+        pygame.draw.rect(layer, BLACK, input_rect, 2)
 
-        # Render input text
-        input_surface = FONT.render(input_text, True, BLACK)
-        screen.blit(input_surface, (input_rect.x + 10, input_rect.y + 10))
-        pygame.display.flip()
+    def draw_dynamic():
+        editor.draw(screen, show_cursor)  # Render input text
+
+    while active:
+        if pygame.time.get_ticks() >= next_blink:
+            show_cursor = not show_cursor
+            next_blink = pygame.time.get_ticks() + CURSOR_BLINK_MS
+            scheduler.invalidate(editor.cursor_rect())
+
+        if scheduler.begin_frame(screen_id):
+            layer = compositor.static_layer(("answer_input", question), draw_static)
+            compositor.present(layer, draw_dynamic, scheduler.frame_rects)
 
         # Handle user input
-        for event in pygame.event.get():
+        for event in scheduler.wait_events(next_blink - pygame.time.get_ticks()):
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_RETURN:
-                    active = False
-                    break
-                elif event.key == pygame.K_BACKSPACE:
-                    input_text = input_text[:-1]  # Remove last character
-                else:
-                    input_text += event.unicode  # Add new character
-
-        clock.tick(FPS)
+                quit_app()
+            elif event.type == pygame.KEYDOWN and event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+                active = False
+                break
+            else:
+                editor.handle_event(event)
+                if event.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+                    show_cursor = True
+                    next_blink = pygame.time.get_ticks() + CURSOR_BLINK_MS
 
-    return input_text
+    return editor.text
 
 
 # Flashcard storage
-FLASHCARD_FILE = "flashcards.json"
-
-def save_flashcards(flashcards):
-    """Saves flashcards to a JSON file."""
-    data = [{"front": card.front, "back": card.back} for card in flashcards]
-    with open(FLASHCARD_FILE, "w") as f:
-        json.dump(data, f)
+FLASHCARD_FILE = "flashcards.json"  # .jsonl streams the deck lazily; .deck is memory-mapped; .db/.sqlite uses SQLite
+
+FLASHCARD_STORE = None  # Journal store, or SQLite for .db files; opened by start_app()
+
+SAVE_EVENT = pygame.event.custom_type()  # Posted by the writer thread with .label and .error
+
+def notify_saved(label, error):
+    pygame.event.post(pygame.event.Event(SAVE_EVENT, label=label, error=error))
+
+DECK_WRITER = None  # BackgroundWriter that does all disk writes; started by start_app()
+
+DUPLICATES = DuplicateIndex(FLASHCARD_FILE)  # card_key counts of the stored deck, saved beside it on exit
+
+REVIEWS = None  # ReviewScheduler with the SM-2 state of every reviewed card
+
+REVIEW_LOG = None  # ReviewLog of every graded answer, for statistics
+
+def review_scheduler():
+    """Return the review scheduler, reading its file on first use."""
+    if not REVIEWS.loaded:
+        REVIEWS.load()
+    return REVIEWS
+
+def record_grade(card, grade, mode, shown_at):
+    """Log an answer (GRADE_AGAIN..GRADE_EASY) given since shown_at and schedule the card's next review."""
+    latency = time.monotonic() - shown_at
+    if card.card_id is not None:
+        REVIEW_LOG.append(card.card_id, mode, grade, latency)
+        review_scheduler().review(card.card_id, grade)
+
+def duplicate_index():
+    """Return the stored deck's duplicate index, waiting if the load queued at startup is still running."""
+    DUPLICATES.wait()
+    if not DUPLICATES.ready:  # The load failed and the writer reported why; retry it behind the queued saves
+        DUPLICATES.open_later(DECK_WRITER, lambda: stream_records(FLASHCARD_STORE))
+        DUPLICATES.wait()
+    return DUPLICATES
+
+def save_new_flashcard(card):
+    """Queues one added flashcard (paged decks queue cards as they are appended)."""
+    save_new_flashcards([card])
+
+def save_new_flashcards(cards):
+    """Queues added flashcards as one batched insert, giving them their ids now so nothing waits for it."""
+    for card in cards:
+        DUPLICATES.add(card_key(card.front, card.back))
+    new = [card for card in cards if card.card_id is None]  # Paged decks have already queued theirs
+    if new:
+        ids = FLASHCARD_STORE.reserve_ids(len(new))
+        for card, card_id in zip(new, ids):
+            card.card_id = card_id
+        DECK_WRITER.submit(lambda: FLASHCARD_STORE.add_many([(card.front, card.back) for card in new], ids), "Flashcards saved!")
+    review_scheduler().introduce([card.card_id for card in cards])  # Listed as new for review sessions
+
+def save_edited_flashcard(card, old_front, old_back):
+    """Queues the new text of an edited flashcard."""
+    DUPLICATES.remove(card_key(old_front, old_back))
+    DUPLICATES.add(card_key(card.front, card.back))
+    def edit():
+        if card.card_id is not None:  # Cleared once a queued delete has removed the card
+            FLASHCARD_STORE.edit(card.card_id, card.front, card.back)
+    DECK_WRITER.submit(edit, "Flashcard saved!", key=("edit", card.card_id))  # Reads the text when it runs, so edits coalesce
+
+def delete_saved_flashcards(cards):
+    """Queues the removal of flashcards as one batch."""
+    for card in cards:
+        DUPLICATES.remove(card_key(card.front, card.back))
+    if REVIEWS.loaded:
+        REVIEWS.forget([card.card_id for card in cards if card.card_id is not None])
+    DECK_WRITER.submit(lambda: FLASHCARD_STORE.delete([card.card_id for card in cards if card.card_id is not None]),
+                       "Flashcards removed!")
+
+def save_event_message(event):
+    """Return the message to show for a SAVE_EVENT, or None for a quiet success."""
+    return f"Save failed: {event.error}" if event.error else event.label
+
+def flashcard_from_record(record):
+    card = Flashcard(record["front"], record["back"], record["id"])
+    card.showing_front = record.get("showing_front", True)
+    if "color" in record:  # Binary decks keep card colors
+        card.color = record["color"]
+    return card
+
+LOADED_DECKS = {}  # Store -> its deck, read once; every later change is made to it as well as queued for the store
 
 def load_flashcards():
-    """Loads flashcards from a JSON file, handling errors."""
-    try:
-        with open(FLASHCARD_FILE, "r") as f:
-            data = json.load(f)
-        return [Flashcard(item["front"], item["back"]) for item in data]
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+    """Loads the deck from the store; JSON Lines, binary and SQLite decks are paged in lazily instead of read whole.
+
+    The store is read only the first time: after that its queued changes are served by the deck already in memory.
+    """
+    flashcards = LOADED_DECKS.get(FLASHCARD_STORE)
+    if flashcards is None:
+        if hasattr(FLASHCARD_STORE, "page"):
+            flashcards = PagedCards(FLASHCARD_STORE, flashcard_from_record, writer=DECK_WRITER)
+        else:
+            flashcards = Deck.from_records(FLASHCARD_STORE.load())
+        LOADED_DECKS[FLASHCARD_STORE] = flashcards
+    return flashcards
+
+# Virtualized list rendering
+class RowHeightIndex:
+    """Prefix-sum index of list row heights, kept in blocks so edits and lookups stay cheap on huge lists."""
+    BLOCK_SIZE = 256  # Rows per block; edits cost O(BLOCK_SIZE + rows / BLOCK_SIZE)
+
+    def __init__(self, heights=()):
+        heights = list(heights)
+        self.blocks = [heights[i:i + self.BLOCK_SIZE] for i in range(0, len(heights), self.BLOCK_SIZE)] or [[]]
+        self.block_sums = [sum(block) for block in self.blocks]  # Total height of each block
+        self.rebuild()
+
+    def rebuild(self):
+        """Recompute the per-block prefix sums of row counts and heights."""
+        self.block_rows, self.block_tops = [0], [0]  # Rows and pixels before each block
+        for block, block_sum in zip(self.blocks, self.block_sums):
+            self.block_rows.append(self.block_rows[-1] + len(block))
+            self.block_tops.append(self.block_tops[-1] + block_sum)
+
+    def __len__(self):
+        return self.block_rows[-1]
+
+    def total_height(self):
+        """Return the combined height of every row."""
+        return self.block_tops[-1]
+
+    def locate(self, row):
+        """Return (block number, position inside block) for a row index."""
+        block_no = min(bisect_right(self.block_rows, row) - 1, len(self.blocks) - 1)
+        return block_no, row - self.block_rows[block_no]
+
+    def height_of(self, row):
+        """Return the stored height of a row."""
+        block_no, pos = self.locate(row)
+        return self.blocks[block_no][pos]
+
+    def top_of(self, row):
+        """Return the y offset of a row from the top of the list."""
+        block_no, pos = self.locate(row)
+        return self.block_tops[block_no] + sum(self.blocks[block_no][:pos])
+
+    def row_at(self, y):
+        """Return (row, row top) for the row covering offset y, found by binary search over blocks."""
+        block_no = min(bisect_right(self.block_tops, y) - 1, len(self.blocks) - 1)
+        while block_no > 0 and not self.blocks[block_no]:
+            block_no -= 1  # Skip trailing empty blocks
+        top = self.block_tops[block_no]
+        block = self.blocks[block_no]
+        for pos, height in enumerate(block):
+            if top + height > y:
+                return self.block_rows[block_no] + pos, top
+            top += height
+        return self.block_rows[block_no] + len(block), top  # y is past the last row
+
+    def set_height(self, row, height):
+        """Change the height of one row."""
+        block_no, pos = self.locate(row)
+        self.block_sums[block_no] += height - self.blocks[block_no][pos]
+        self.blocks[block_no][pos] = height
+        self.rebuild()
+
+    def insert(self, row, height):
+        """Insert a row before index row (or append when row == len)."""
+        block_no, pos = self.locate(row)
+        block = self.blocks[block_no]
+        block.insert(pos, height)
+        self.block_sums[block_no] += height
+        if len(block) > 2 * self.BLOCK_SIZE:  # Split oversized blocks
+            half = len(block) // 2
+            self.blocks[block_no:block_no + 1] = [block[:half], block[half:]]
+            self.block_sums[block_no:block_no + 1] = [sum(block[:half]), sum(block[half:])]
+        self.rebuild()
+
+    def append(self, height):
+        """Add a row at the end of the list."""
+        self.insert(len(self), height)
+
+    def remove(self, row):
+        """Delete one row."""
+        block_no, pos = self.locate(row)
+        self.block_sums[block_no] -= self.blocks[block_no].pop(pos)
+        if not self.blocks[block_no] and len(self.blocks) > 1:  # Drop empty blocks
+            del self.blocks[block_no]
+            del self.block_sums[block_no]
+        self.rebuild()
+
+
+class VirtualCardList:
+    """Scrollable list of flashcards that only wraps and renders the rows inside its viewport."""
+    def __init__(self, cards, rect, font=FONT):
+        self.cards = cards  # Deck being displayed (shared with the caller)
+        self.rect = rect  # Viewport on screen
+        self.font = font
+        self.number_width = font.size("000000. ")[0]  # Gutter for row numbers
+        self.text_width = rect.width - self.number_width
+        self.scroll_offset = 0
+        # Rows start at one line high and get their real height the first time they are wrapped
+        self.index = RowHeightIndex([font.get_height()] * len(cards))
+        self.measured = bytearray(len(cards))  # 1 once a row's real height is in the index
+
+    def row_lines(self, row):
+        """Return the wrapped lines of a row, recording its real height on first use."""
+        card = self.cards[row]
+        lines = wrap_text(f"{card.front} → {card.back}", self.font, self.text_width)
+        if not self.measured[row]:
+            self.measured[row] = 1
+            self.index.set_height(row, len(lines) * self.font.get_height())
+        return lines
+
+    def max_scroll(self):
+        """Return the largest valid scroll offset."""
+        return max(0, self.index.total_height() - self.rect.height)
+
+    def scroll_to(self, offset):
+        """Scroll to offset, clamped to the list."""
+        self.scroll_offset = max(0, min(offset, self.max_scroll()))
+
+    def added(self):
+        """Update the index after a card was appended to the deck."""
+        self.index.append(self.font.get_height())
+        self.measured.append(0)
+
+    def removed(self, row):
+        """Update the index after the card at row was deleted from the deck."""
+        self.index.remove(row)
+        del self.measured[row]
+        self.scroll_to(self.scroll_offset)
+
+    def handle_event(self, event):
+        """Scroll in response to the mouse wheel or navigation keys."""
+        page = self.rect.height - self.font.get_height()
+        if event.type == pygame.MOUSEWHEEL:
+            self.scroll_to(self.scroll_offset - event.y * 30)
+        elif event.type == pygame.KEYDOWN:
+            if event.key in (pygame.K_UP, pygame.K_DOWN):
+                self.scroll_to(handle_scroll(self.scroll_offset, self.max_scroll(), event))
+            elif event.key == pygame.K_PAGEUP:
+                self.scroll_to(self.scroll_offset - page)
+            elif event.key == pygame.K_PAGEDOWN:
+                self.scroll_to(self.scroll_offset + page)
+            elif event.key == pygame.K_HOME:
+                self.scroll_to(0)
+            elif event.key == pygame.K_END:
+                self.scroll_to(self.index.total_height())
+
+    def draw(self, surface):
+        """Render the rows that intersect the viewport."""
+        line_height = self.font.get_height()
+        previous_clip = surface.get_clip()
+        surface.set_clip(self.rect.clip(previous_clip))
+        row, top = self.index.row_at(self.scroll_offset)
+        y = self.rect.top + top - self.scroll_offset
+        while row < len(self.cards) and y < self.rect.bottom:
+            surface.blit(render_text(f"{row + 1}.", self.font, BLACK), (self.rect.left, y))
+            lines = self.row_lines(row)
+            for i, line in enumerate(lines):
+                surface.blit(render_text(line, self.font, BLACK), (self.rect.left + self.number_width, y + i * line_height))
+            y += len(lines) * line_height
+            row += 1
+        surface.set_clip(previous_clip)
+
 
 def enter_flashcards():
     """Displays stored flashcards and allows adding/removing."""
     flashcards = load_flashcards()
-    scroll_offset = 0
-    max_scroll = max(0, (len(flashcards) * 30) - (HEIGHT - 250))  # Calculate max scroll
-    scroll_speed = 30  
     running = True
+    screen_id = scheduler.enter_screen()
 
-    while running:
-        screen.fill(WHITE)  # Clear the screen
+    # Button setup for adding/removing flashcards, pinned below the list
+    button_width, button_height, button_y = 240, 60, HEIGHT - 80
+    add_button = pygame.Rect(WIDTH // 2 - button_width * 3 // 2 - 20, button_y, button_width, button_height)
+    remove_button = pygame.Rect(WIDTH // 2 - button_width // 2, button_y, button_width, button_height)
+    exit_button = pygame.Rect(WIDTH // 2 + button_width // 2 + 20, button_y, button_width, button_height)
+    buttons = [{"rect": add_button, "text": "Add Flashcard", "color": GREEN},
+               {"rect": remove_button, "text": "Remove Flashcard", "color": RED},
+               {"rect": exit_button, "text": "Return", "color": GRAY}]
+    hovered = None  # Button under the mouse
+
+    card_list = VirtualCardList(flashcards, pygame.Rect(50, 70, WIDTH - 100, button_y - 90))
 
+    def draw_static(layer):
         # Display header text
-        header = FONT.render("Flashcards Entered:", True, BLACK)
-        screen.blit(header, (50, 30 - scroll_offset))
-
-        # Render flashcards with wrapping
-        for i, card in enumerate(flashcards):
-            card_text = f"{i+1}. {card.front} → {card.back}"
-            wrapped_text = wrap_text(card_text, FONT, WIDTH - 100)
-            y_pos = 60 + i * 30 - scroll_offset
-
-            for line in wrapped_text:
-                card_surface = FONT.render(line, True, BLACK)
-                screen.blit(card_surface, (50, y_pos))
-                y_pos += FONT.get_height()
-
-        # Button setup for adding/removing flashcards
-        button_width, button_height = 250, 80
-        dynamic_button_y = 120 + (len(flashcards) * 40)  # Adjust button position dynamically
-        add_button = pygame.Rect((WIDTH // 2) - (button_width + 20), dynamic_button_y, button_width, button_height)
-        remove_button = pygame.Rect((WIDTH // 2) + 10, dynamic_button_y, button_width, button_height)
-        exit_button = pygame.Rect((WIDTH // 2) - (button_width // 2), dynamic_button_y + 100, button_width, button_height) 
-
-        # Draw buttons
-        pygame.draw.rect(screen, GREEN, add_button)
-        pygame.draw.rect(screen, RED, remove_button)
-        pygame.draw.rect(screen, GRAY, exit_button)
-
-        # Display button labels
-        screen.blit(FONT.render("Add Flashcard", True, WHITE), add_button.topleft)
-        screen.blit(FONT.render("Remove Flashcard", True, WHITE), remove_button.topleft)
-        screen.blit(FONT.render("Return", True, WHITE), exit_button.topleft)
+        header = render_text("Flashcards Entered:", FONT, BLACK)
+        layer.blit(header, (50, 30))
+        draw_button_list(buttons, layer)
 
-        pygame.display.flip()
+    def draw_dynamic():
+        card_list.draw(screen)  # Render only the visible flashcards
+        if hovered is not None:
+            draw_button(hovered["text"], hovered["rect"], lighten(hovered["color"]))
+
+    while running:
+        if scheduler.begin_frame(screen_id):
+            layer = compositor.static_layer("enter_flashcards", draw_static)
+            compositor.present(layer, draw_dynamic, scheduler.frame_rects)
 
-        for event in pygame.event.get():
+        for event in scheduler.wait_events():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.MOUSEBUTTONDOWN:  # Handle button clicks
+                quit_app()
+            elif event.type == pygame.MOUSEMOTION:
+                hovered = update_hover(buttons, hovered, event.pos)
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button in (1, 2, 3):  # Handle button clicks
                 x, y = event.pos
                 if add_button.collidepoint(x, y):
                     front = get_text_input("Enter flashcard FRONT:")
                     back = get_text_input("Enter flashcard BACK:")
+                    if card_key(front, back) in duplicate_index():
+                        show_feedback("That flashcard is already in the deck!", color=RED)
+                        continue
                     flashcards.append(Flashcard(front, back))  # Add new flashcard
-                    save_flashcards(flashcards)
+                    card_list.added()
+                    save_new_flashcard(flashcards[-1])
                 elif remove_button.collidepoint(x, y) and flashcards:
                     index_str = get_text_input("Enter flashcard numbers to remove:")
                     try:
-                        indices = [int(i.strip()) - 1 for i in index_str.split(',')]  # Get selected flashcards
+                        indices = {int(i.strip()) - 1 for i in index_str.split(',')}  # Get selected flashcards
+                        if not all(0 <= i < len(flashcards) for i in indices):
+                            raise ValueError(index_str)
+                        removed = []
                         for i in sorted(indices, reverse=True):
-                            del flashcards[i]  # Remove selected flashcards
-                            save_flashcards(flashcards)
-                            show_feedback("Flashcards removed!", color=GREEN)
+                            removed.append(flashcards.pop(i))  # Remove selected flashcards
+                            card_list.removed(i)
+                        delete_saved_flashcards(removed)  # One journal write for the whole batch
+                        show_feedback("Flashcards removed!", color=GREEN)
                     except ValueError:
                         show_feedback("Invalid input, use comma-separated numbers.", color=RED)
                 elif exit_button.collidepoint(x, y):
-                    running = False  
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP:
-                    scroll_offset = max(0, scroll_offset - 10)  # Scroll up
-                elif event.key == pygame.K_DOWN:
-                    scroll_offset = min(scroll_offset + 10, max_scroll)  # Scroll down
+                    running = False
+            elif event.type == SAVE_EVENT and event.error:
+                show_feedback(save_event_message(event), duration=2000, color=RED)
+            else:
+                card_list.handle_event(event)
     return flashcards
 
 
 def animate_shuffle(flashcards):
     """Applies a shuffled animation effect to flashcards."""
-    import random
     if not flashcards:
         return flashcards
 
     existing_colors = set()
-    for card in flashcards:
-        while True:
-            r, g, b = random.randint(50, 255), random.randint(50, 255), random.randint(50, 255)
-            if g > 130 and r > 130 and b < 100:  # Avoid excessive brightness
+    colored = set()  # Cards already given a color by this shuffle
+
+    def assign_colors(cards):
+        """Give the animated cards distinct random colors; the rest of the deck is never touched."""
+        for card in cards:
+            if card in colored:
                 continue
-            new_color = (r, g, b)
-            if new_color not in existing_colors:
-                existing_colors.add(new_color)
-                card.color = new_color
-                break
+            colored.add(card)
+            while True:
+                r, g, b = random.randint(50, 255), random.randint(50, 255), random.randint(50, 255)
+                if g > 130 and r > 130 and b < 100:  # Avoid excessive brightness
+                    continue
+                new_color = (r, g, b)
+                if new_color not in existing_colors:
+                    existing_colors.add(new_color)
+                    card.color = new_color
+                    break
 
     scatter_duration, converge_duration = 1.2, 1.2
     base_x, base_y = 100, 200
-    num_cards = len(flashcards)
-    initial_positions = [(base_x + i * 3, base_y + i * 3) for i in range(num_cards)]
-    
+    num_animated = min(len(flashcards), SHUFFLE_ANIMATED_CARDS)  # Only the top of the deck moves
+    initial_positions = [(base_x + i * 3, base_y + i * 3) for i in range(num_animated)]
+
     # Scatter random positions and rotations
     scatter_positions = [(x + random.randint(-200, 200), y + random.randint(-150, 150)) for x, y in initial_positions]
-    scatter_rotations = [random.randint(-90, 90) for _ in range(num_cards)]
+    scatter_rotations = [random.randint(-90, 90) for _ in range(num_animated)]
     front_card = flashcards[0]
 
+    sprites = {}  # Card -> sprite, rendered once per shuffle
+    rotations = SurfaceCache(ROTATION_CACHE_BUDGET)  # (card, quantized angle) -> rotated sprite
+
+    def get_sprite(card):
+        if card not in sprites:
+            sprites[card] = render_flashcard_surface(card)
+        return sprites[card]
+
+    def get_rotated(card, angle):
+        angle = round(angle / SHUFFLE_ROTATION_STEP) * SHUFFLE_ROTATION_STEP  # Quantize so frames share sprites
+        return rotations.get((card, angle), lambda: pygame.transform.rotate(get_sprite(card), angle))
+
     def lerp(a, b, t): return a + (b - a) * t
     def lerp_tuple(a, b, t): return (lerp(a[0], b[0], t), lerp(a[1], b[1], t))
 
-    # Scatter animation phase
-    scatter_start = time.time()
-    while time.time() - scatter_start < scatter_duration:
-        t_frac = (time.time() - scatter_start) / scatter_duration
+    def draw_frame(cards, start_positions, end_positions, start_rotations, end_rotations, front_rotation, t_frac):
         screen.fill(WHITE)
-        for i, card in enumerate(flashcards):
-            cur_pos = lerp_tuple(initial_positions[i], scatter_positions[i], t_frac)
-            cur_rot = lerp(0, scatter_rotations[i], t_frac)
+        for i, card in enumerate(cards):
+            cur_pos = lerp_tuple(start_positions[i], end_positions[i], t_frac)
+            cur_rot = lerp(start_rotations[i], end_rotations[i], t_frac)
             if card == front_card:
-                cur_rot += 90 * t_frac
-            card_surface = render_flashcard_surface(card)
-            rotated_surface = pygame.transform.rotate(card_surface, cur_rot)
+                cur_rot += front_rotation
+            rotated_surface = get_rotated(card, cur_rot)
             rect = rotated_surface.get_rect(center=(cur_pos[0] + 300, cur_pos[1] + 100))
             screen.blit(rotated_surface, rect.topleft)
         pygame.display.flip()
-        clock.tick(FPS)
+        scheduler.animation_tick()
 
-    # Shuffle order
-    random.shuffle(flashcards)
-    final_positions = {card: (base_x + i * 3, base_y + i * 3) for i, card in enumerate(flashcards)}
+    # Scatter animation phase
+    animated_cards = flashcards[:num_animated]
+    assign_colors(animated_cards)
+    no_rotation = [0] * num_animated
+    scatter_start = time.time()
+    while time.time() - scatter_start < scatter_duration:
+        t_frac = (time.time() - scatter_start) / scatter_duration
+        draw_frame(animated_cards, initial_positions, scatter_positions, no_rotation, scatter_rotations,
+                   90 * t_frac, t_frac)
+
+    # Shuffle order (the whole deck, animated or not)
+    flashcards.shuffle()  # Permutes positions only; no card data moves or loads
+    animated_cards = flashcards[:num_animated]
+    assign_colors(animated_cards)
+    if isinstance(flashcards, PagedCards):
+        flashcards.pin(colored)  # Their new colors exist only in memory
 
     # Converge animation phase
     converge_start = time.time()
     while time.time() - converge_start < converge_duration:
         t_frac = (time.time() - converge_start) / converge_duration
-        screen.fill(WHITE)
-        for i, card in enumerate(flashcards):
-            start_pos = scatter_positions[i]
-            final_pos = final_positions[card]
-            cur_pos = lerp_tuple(start_pos, final_pos, t_frac)
-            cur_rot = lerp(scatter_rotations[i], 0, t_frac)
-            if card == front_card:
-                cur_rot += 90 * (1 - t_frac)
-            card_surface = render_flashcard_surface(card)
-            rotated_surface = pygame.transform.rotate(card_surface, cur_rot)
-            rect = rotated_surface.get_rect(center=(cur_pos[0] + 300, cur_pos[1] + 100))
-            screen.blit(rotated_surface, rect.topleft)
-        pygame.display.flip()
-        clock.tick(FPS)
-        flashcards[:] = new_order
+        draw_frame(animated_cards, scatter_positions, initial_positions, scatter_rotations, no_rotation,
+                   90 * (1 - t_frac), t_frac)
     return flashcards
 
 
-def animate_reverse(flashcards):
-    """Animates flipping flashcards in reverse with a color transition."""
-    
-    def rotate_color(color, factor):
-        """Rotates the hue of a color to create a smooth transition effect."""
-        r, g, b = color
-        r_norm, g_norm, b_norm = r / 255.0, g / 255.0, b / 255.0
-        h, s, v = colorsys.rgb_to_hsv(r_norm, g_norm, b_norm)
-        h_new = (h + 0.5 * factor) % 1.0  # Adjust hue
-        r_new, g_new, b_new = colorsys.hsv_to_rgb(h_new, s, v)
-        return (int(r_new * 255), int(g_new * 255), int(b_new * 255))
-
-    num_steps = 15  # Number of animation steps
-    for card in flashcards:
-        original_color = getattr(card, "color", (0, 0, 0))  # Store initial color
-        for i in range(num_steps):
-            screen.fill(WHITE)  # Clear screen
-            squeeze_factor = abs((i - num_steps / 2) / (num_steps / 2))  # Squash effect
-            new_width = max(1, int(600 * squeeze_factor))  # Adjust width dynamically
-            x = 100 + (600 - new_width) // 2  # Centering effect
-            t = i / (num_steps - 1)  # Normalized time factor
-            rotated_bg = rotate_color(original_color, t)  # Apply color transition
-
-            temp_surface = pygame.Surface((new_width, 200))  # Create card surface
-            temp_surface.fill(rotated_bg)  # Apply color
-            text = card.front if i < num_steps / 2 else card.back  # Determine displayed text
-
-            draw_text_in_box(text, (0, 0, new_width, 200), FONT, WHITE, 0, target_surface=temp_surface)
-            screen.blit(temp_surface, (x, 200))  # Display the animated card
-            pygame.display.flip()
-            clock.tick(30)  # Control animation speed
-        card.flip()
-        card.color = rotate_color(original_color, 1)  # Final color adjustment
-    
-    return flashcards
+def animate_reverse(flashcards, view_index=0):
+    """Reverses the whole deck in one pass, animating only the card in view."""
+    num_steps = 15  # Distinct colors in the hue transition
+    card = flashcards[view_index]
+    original_color = card.color
+    step_colors = rotate_hues([original_color] * num_steps, [0.5 * i / (num_steps - 1) for i in range(num_steps)])
 
+    shown, hidden = (card.front, card.back) if card.showing_front else (card.back, card.front)
 
-def animate_flip(card):
-    """Animates a card flipping with a squeeze effect."""
-    num_steps = 15
-    card_pos = (100, 200)
-    card_size = (600, 200)
+    def face_at(progress):
+        color = step_colors[min(num_steps - 1, int(progress * num_steps))]  # Apply color transition
+        return card_face(shown if progress < 0.5 else hidden, color)
 
-    for i in range(num_steps):
-        screen.fill(WHITE)
-        instruction = "Track Progress: SPACE to flip"
-        instr_surface = FONT.render(instruction, True, BLACK)
-        screen.blit(instr_surface, (WIDTH // 2 - instr_surface.get_width() // 2, 30))
+    play_flip(face_at, (100, 200), REVERSE_DURATION)
 
-        factor = abs((i - num_steps / 2) / (num_steps / 2))  # Squash effect
-        new_width = max(1, int(card_size[0] * factor))  # Adjust width
-        x = card_pos[0] + (card_size[0] - new_width) // 2  # Centering effect
+    # Flip every card and shift every color by half the color wheel in one batch
+    if isinstance(flashcards, Deck):
+        flashcards.recolor(rotate_hues(flashcards.all_colors(), 0.5))
+        flashcards.flip_all()
+    else:  # Paged decks change the cards in memory now and every other card as it loads
+        flashcards.recolor_all(lambda colors: rotate_hues(colors, 0.5))
+        flashcards.flip_all()
+    return flashcards
 
-        temp_surface = pygame.Surface((new_width, card_size[1]))  # Create surface
-        temp_surface.fill(getattr(card, "color", (0, 0, 0)))  # Use card color
-        pygame.draw.rect(temp_surface, WHITE, (0, 0, new_width, card_size[1]), 3)  # Border
 
-        text = card.front if i < num_steps / 2 else card.back  # Determine text side
-        draw_text_in_box(text, (0, 0, new_width, card_size[1]), FONT, WHITE, 0, target_surface=temp_surface)
+def animate_flip(card, instruction="Track Progress: SPACE to flip"):
+    """Animates a card flipping with a squeeze effect."""
+    color = card.color  # Use card color
+    shown, hidden = (card.front, card.back) if card.showing_front else (card.back, card.front)
+    front, back = card_face(shown, color, border=3), card_face(hidden, color, border=3)  # Rendered once
 
-        screen.blit(temp_surface, (x, card_pos[1]))  # Display card
-        pygame.display.flip()
-        pygame.time.wait(30)  # Control flip animation speed
+    def draw_instruction():
+        instr_surface = render_text(instruction, FONT, BLACK)
+        screen.blit(instr_surface, (WIDTH // 2 - instr_surface.get_width() // 2, 30))
 
+    play_flip(lambda progress: front if progress < 0.5 else back, (100, 200), FLIP_DURATION, draw_instruction)
     card.flip()  # Flip the card at the end
 
 
@@ -573,32 +1889,47 @@ def track_progress_mode(flashcards):
     scroll_offset = 0
     total_cards = len(flashcards)
 
-    # Assign random colors to flashcards
-    for card in flashcards:
-        if not hasattr(card, "color") or card.color == (0, 0, 0):
+    def give_color(card):
+        """Assign a random color to an uncolored card as it is shown, instead of loading the whole deck up front."""
+        if card.color == (0, 0, 0):
             card.color = (random.randint(50, 255), random.randint(50, 255), random.randint(50, 255))
-
-    while index < total_cards:
-        screen.fill(WHITE)
-
+            if isinstance(flashcards, PagedCards):
+                flashcards.pin([card])  # Its new color exists only in memory
+
+    if total_cards:
+        give_color(flashcards[0])
+    screen_id = scheduler.enter_screen()
+
+    # Create buttons for known/unknown categorization
+    known_rect = pygame.Rect(100, 450, 200, 50)
+    unknown_rect = pygame.Rect(500, 450, 200, 50)
+    buttons = [{"rect": known_rect, "text": "Known", "color": GREEN},
+               {"rect": unknown_rect, "text": "Unknown", "color": RED}]
+    hovered = None  # Button under the mouse
+    shown_at = time.monotonic()  # When the current card appeared, for answer latency
+
+    def draw_static(layer):
         instruction = "Track Progress: SPACE to flip"
-        instr_surface = FONT.render(instruction, True, BLACK)
-        screen.blit(instr_surface, (WIDTH // 2 - instr_surface.get_width() // 2, 30))
+        instr_surface = render_text(instruction, FONT, BLACK)
+        layer.blit(instr_surface, (WIDTH // 2 - instr_surface.get_width() // 2, 30))
+        draw_button_list(buttons, layer)
 
+    def draw_dynamic():
         draw_flashcard(flashcards[index], scroll_offset=scroll_offset)  # Display current flashcard
+        if hovered is not None:
+            draw_button(hovered["text"], hovered["rect"], lighten(hovered["color"]))
 
-        # Create buttons for known/unknown categorization
-        known_rect = pygame.Rect(100, 450, 200, 50)
-        unknown_rect = pygame.Rect(500, 450, 200, 50)
-        draw_button("Known", known_rect, GREEN)
-        draw_button("Unknown", unknown_rect, RED)
-        pygame.display.flip()
+    while index < total_cards:
+        if scheduler.begin_frame(screen_id):
+            layer = compositor.static_layer("track_progress", draw_static)
+            compositor.present(layer, draw_dynamic, scheduler.frame_rects)
 
         decision_made = False  # Track decision state
-        for event in pygame.event.get():
+        for event in scheduler.wait_events():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+                quit_app()
+            elif event.type == pygame.MOUSEMOTION:
+                hovered = update_hover(buttons, hovered, event.pos)
             elif event.type == pygame.MOUSEWHEEL:
                 scroll_offset = max(0, scroll_offset - event.y * 10)
             elif event.type == pygame.KEYDOWN:
@@ -610,6 +1941,9 @@ def track_progress_mode(flashcards):
                     animate_flip(flashcards[index])  # Flip flashcard
                 elif event.key in [pygame.K_LEFT, pygame.K_RIGHT]:  # Categorization
                     flashcards[index].color = GREEN if event.key == pygame.K_LEFT else RED
+                    flashcards[index].status = CARD_KNOWN if event.key == pygame.K_LEFT else CARD_UNKNOWN
+                    record_grade(flashcards[index], GRADE_GOOD if event.key == pygame.K_LEFT else GRADE_AGAIN,
+                                 MODE_TRACK, shown_at)
                     (known_cards if event.key == pygame.K_LEFT else unknown_cards).append(flashcards[index])
                     index += 1
                     scroll_offset = 0
@@ -618,12 +1952,16 @@ def track_progress_mode(flashcards):
                 x, y = event.pos
                 if known_rect.collidepoint(x, y):
                     flashcards[index].color = GREEN
+                    flashcards[index].status = CARD_KNOWN
+                    record_grade(flashcards[index], GRADE_GOOD, MODE_TRACK, shown_at)
                     known_cards.append(flashcards[index])
                     index += 1
                     scroll_offset = 0
                     decision_made = True
                 elif unknown_rect.collidepoint(x, y):
                     flashcards[index].color = RED
+                    flashcards[index].status = CARD_UNKNOWN
+                    record_grade(flashcards[index], GRADE_AGAIN, MODE_TRACK, shown_at)
                     unknown_cards.append(flashcards[index])
                     index += 1
                     scroll_offset = 0
@@ -631,12 +1969,14 @@ def track_progress_mode(flashcards):
 
         if decision_made:
             pygame.time.wait(200)  # Short delay after selection
-        clock.tick(FPS)
+            shown_at = time.monotonic()
+            if index < total_cards:
+                give_color(flashcards[index])
 
     # Summary screen
     screen.fill(WHITE)
     summary_text = f"Review complete! Known: {len(known_cards)} | Unknown: {len(unknown_cards)}"
-    summary_surface = BIG_FONT.render(summary_text, True, BLACK)
+    summary_surface = render_text(summary_text, BIG_FONT, BLACK)
     screen.blit(summary_surface, (WIDTH // 2 - summary_surface.get_width() // 2, HEIGHT // 2 - 50))
     pygame.display.flip()
     pygame.time.wait(2000)
@@ -644,15 +1984,16 @@ def track_progress_mode(flashcards):
     # Retry unknown flashcards if needed
     if unknown_cards:
         retry = None
+        screen_id = scheduler.enter_screen()
         while retry is None:
-            screen.fill(WHITE)
-            prompt_surface = FONT.render("Retry unknown flashcards? (Y/N)", True, BLACK)
-            screen.blit(prompt_surface, (WIDTH // 2 - prompt_surface.get_width() // 2, HEIGHT // 2))
-            pygame.display.flip()
-            for event in pygame.event.get():
+            if scheduler.begin_frame(screen_id):
+                screen.fill(WHITE)
+                prompt_surface = render_text("Retry unknown flashcards? (Y/N)", FONT, BLACK)
+                screen.blit(prompt_surface, (WIDTH // 2 - prompt_surface.get_width() // 2, HEIGHT // 2))
+                pygame.display.flip()
+            for event in scheduler.wait_events():
                 if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
+                    quit_app()
                 elif event.type == pygame.KEYDOWN:
                     retry = event.key == pygame.K_y if event.key in [pygame.K_y, pygame.K_n] else None
 
@@ -661,7 +2002,153 @@ def track_progress_mode(flashcards):
 
     return known_cards, unknown_cards
 
-def test_yourself_mode(flashcards):
+def review_due_mode(flashcards):
+    """Shows the cards the scheduler says are due, most overdue first, then a few new ones, grading each."""
+    if not flashcards:
+        flashcards = load_flashcards()  # Review the stored deck
+    reviews = review_scheduler()
+    if not reviews.seeded:  # Only a schedule file that predates the new list needs one pass over the deck
+        stored = load_flashcards()  # The schedule covers the stored deck
+        if isinstance(stored, Deck):
+            reviews.seed(stored.ids[row] for row in stored.order)
+        else:
+            reviews.seed(stored.card_ids())
+
+    # Due cards come from the scheduler's heap and new ones from its new list; each is then looked up by id
+    if isinstance(flashcards, Deck):
+        def card_for(card_id):
+            row = flashcards.row_of(card_id)
+            return None if row is None else CardView(flashcards, row)
+    else:
+        card_for = flashcards.card_with_id
+    new_left = NEW_CARDS_PER_SESSION
+    reviewed = 0
+
+    def next_card():
+        nonlocal new_left
+        while True:
+            card_id = reviews.next_due()
+            if card_id is None:
+                break
+            card = card_for(card_id)
+            if card is not None:
+                return card
+            reviews.forget([card_id])  # Deleted since it was scheduled
+        while new_left:
+            card_id = reviews.next_new()  # Leaves the list once graded
+            if card_id is None:
+                break
+            card = card_for(card_id)
+            if card is not None:
+                new_left -= 1
+                return card
+            reviews.forget([card_id])  # Deleted since it was saved
+        return None
+
+    card = next_card()
+    if card is None:
+        show_feedback("No flashcards are due right now!", color=GREEN)
+        return flashcards
+
+    instruction = "Review Due: SPACE to flip, 1-4 to grade"
+    buttons = [{"rect": pygame.Rect(40 + i * 190, 450, 150, 50), "text": text, "color": color, "grade": grade}
+               for i, (text, color, grade) in enumerate([("Again", RED, GRADE_AGAIN), ("Hard", GRAY, GRADE_HARD),
+                                                         ("Good", GREEN, GRADE_GOOD), ("Easy", BLUE, GRADE_EASY)])]
+    grade_keys = {pygame.K_1: GRADE_AGAIN, pygame.K_2: GRADE_HARD, pygame.K_3: GRADE_GOOD, pygame.K_4: GRADE_EASY}
+    hovered = None  # Button under the mouse
+    scroll_offset = 0
+    due_count = len(reviews.due_cards())
+    shown_at = None  # When the current card appeared, for answer latency
+    screen_id = scheduler.enter_screen()
+
+    def show(next_one):
+        nonlocal card, scroll_offset, shown_at
+        card, scroll_offset, shown_at = next_one, 0, time.monotonic()
+        if card is not None:
+            card.showing_front = True
+            if card.color == (0, 0, 0):
+                card.color = (random.randint(50, 255), random.randint(50, 255), random.randint(50, 255))
+    show(card)
+
+    def draw_static(layer):
+        instr_surface = render_text(instruction, FONT, BLACK)
+        layer.blit(instr_surface, (WIDTH // 2 - instr_surface.get_width() // 2, 30))
+        draw_button_list(buttons, layer)
+
+    def draw_dynamic():
+        counts = render_text(f"Due: {due_count} | New left: {new_left} | Reviewed: {reviewed}", FONT, BLACK)
+        screen.blit(counts, (WIDTH // 2 - counts.get_width() // 2, 100))
+        draw_flashcard(card, scroll_offset=scroll_offset)
+        if hovered is not None:
+            draw_button(hovered["text"], hovered["rect"], lighten(hovered["color"]))
+
+    while card is not None:
+        if scheduler.begin_frame(screen_id):
+            layer = compositor.static_layer("review_due", draw_static)
+            compositor.present(layer, draw_dynamic, scheduler.frame_rects)
+
+        grade = None
+        for event in scheduler.wait_events():
+            if event.type == pygame.QUIT:
+                quit_app()
+            elif event.type == pygame.MOUSEMOTION:
+                hovered = update_hover(buttons, hovered, event.pos)
+            elif event.type == pygame.MOUSEWHEEL:
+                scroll_offset = max(0, scroll_offset - event.y * 10)
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    return flashcards
+                elif event.key == pygame.K_SPACE:
+                    animate_flip(card, instruction)
+                elif event.key in grade_keys:
+                    grade = grade_keys[event.key]
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                button = find_hovered_button(buttons, event.pos)
+                if button is not None:
+                    grade = button["grade"]
+            if grade is not None:
+                break
+
+        if grade is not None:
+            record_grade(card, grade, MODE_REVIEW, shown_at)
+            reviewed += 1
+            due_count = len(reviews.due_cards())
+            show(next_card())
+
+    # Summary screen
+    screen.fill(WHITE)
+    summary_surface = render_text(f"Review complete! Reviewed: {reviewed}", BIG_FONT, BLACK)
+    screen.blit(summary_surface, (WIDTH // 2 - summary_surface.get_width() // 2, HEIGHT // 2 - 50))
+    pygame.display.flip()
+    pygame.time.wait(2000)
+    scheduler.invalidate()
+    return flashcards
+
+def card_history(flashcards):
+    """Return the decayed error counts, review counts and days unseen of every card position, from the review log."""
+    count = len(flashcards)
+    if np is None:
+        return [0.0] * count, [0.0] * count, [float("inf")] * count  # Every card counts as never seen, so all weigh the same
+    now = time.time()
+    stats = REVIEW_LOG.stats()  # Answers still queued for the log are included
+    try:
+        known, errors, reviews, last_seen = stats.card_history(now)
+    finally:
+        stats.close()
+    if not len(known):
+        return [0.0] * count, [0.0] * count, [float("inf")] * count
+    if isinstance(flashcards, Deck):
+        ids = np.frombuffer(flashcards.ids, dtype=np.int64)[np.frombuffer(flashcards.order, dtype=np.uint32)]
+    elif isinstance(flashcards, PagedCards):
+        ids = np.frombuffer(flashcards.card_ids(), dtype=np.int64)
+    else:
+        ids = np.array([card.card_id or 0 for card in flashcards], dtype=np.int64)
+    slots = np.minimum(np.searchsorted(known, ids), len(known) - 1)
+    found = (known[slots] == ids) & (ids != 0)  # Unsaved and never-reviewed cards have no history
+    return (np.where(found, errors[slots], 0.0).tolist(), np.where(found, reviews[slots], 0.0).tolist(),
+            np.where(found, (now - last_seen[slots]) / DAY, np.inf).tolist())
+
+def test_yourself_mode(flashcards, seed=None):
     """Allows users to test themselves on flashcards by typing answers."""
     if not flashcards:
         return
@@ -685,11 +2172,22 @@ def test_yourself_mode(flashcards):
         except ValueError:
             show_feedback("Please input a valid number.", color=RED)
 
-    test_cards = random.sample(flashcards, num_cards)  # Select flashcards randomly
+    # Select flashcards at random, favoring cards missed lately and cards not seen for a while
+    seed = seed if seed is not None else TEST_SEED if TEST_SEED is not None else random.getrandbits(64)
+    errors, reviews, days_unseen = card_history(flashcards)
+    if np is not None:
+        weights = sampling_weight(np.array(errors), np.array(reviews), np.array(days_unseen))
+    else:
+        weights = list(map(sampling_weight, errors, reviews, days_unseen))
+    sampler = WeightedSampler(weights, seed)
+    grader = AnswerGrader()  # Normalized accepted answers of the backs tested this session only
     score = 0
 
-    for card in test_cards:
+    for _ in range(num_cards):
+        position = sampler.draw()
+        card = flashcards[position]
         card.showing_front = True  # Display the front of the card
+        grader.prepare([card.back])  # Normalized now, so grading the typed answer is only comparisons
         screen.fill(WHITE)
 
         # Display the question
@@ -697,7 +2195,7 @@ def test_yourself_mode(flashcards):
         wrapped_question = wrap_text(question, FONT, WIDTH - 100)
         y_start = 100  
         for i, line in enumerate(wrapped_question):
-            line_surf = FONT.render(line, True, BLACK)
+            line_surf = render_text(line, FONT, BLACK)
             x = (WIDTH - line_surf.get_width()) // 2
             screen.blit(line_surf, (x, y_start + i * FONT.get_height()))
 
@@ -708,18 +2206,28 @@ def test_yourself_mode(flashcards):
         pygame.display.flip()
 
         # Capture user input
+        shown_at = time.monotonic()
         answer = get_text_input("Your Answer:")
 
-        # Check if answer is correct
-        if answer.strip().lower() == card.back.strip().lower():
+        # Check if answer is correct, forgiving accents, articles, punctuation and small typos
+        grade = grader.grade(answer, card.back)
+        record_grade(card, grade, MODE_TEST, shown_at)
+        if grade >= GRADE_HARD:
             score += 1
+            sampler.update(position, 0.0)  # Answered: not asked again this session
         else:
+            # Missed: weighted by its updated history, so it may come back later in the session
+            errors[position], reviews[position] = updated_history(errors[position], reviews[position],
+                                                                  days_unseen[position], True)
+            days_unseen[position] = 0.0
+            sampler.update(position, sampling_weight(errors[position], reviews[position], 0.0))
+        if grade != GRADE_GOOD:
             screen.fill(WHITE)
-            correct_text = f"Correct Answer: {card.back}"
+            correct_text = f"{'Close enough! ' if grade == GRADE_HARD else ''}Correct Answer: {card.back}"
             wrapped_correct = wrap_text(correct_text, BIG_FONT, WIDTH - 100)
             y_start = (HEIGHT - len(wrapped_correct) * BIG_FONT.get_height()) // 2
             for line in wrapped_correct:
-                line_surf = BIG_FONT.render(line, True, BLACK)
+                line_surf = render_text(line, BIG_FONT, BLACK)
                 x = (WIDTH - line_surf.get_width()) // 2
                 screen.blit(line_surf, (x, y_start))
                 y_start += BIG_FONT.get_height()
@@ -728,75 +2236,151 @@ def test_yourself_mode(flashcards):
 
     # Display final score
     screen.fill(WHITE)
-    result_surface = BIG_FONT.render(f"You scored {score} out of {num_cards}", True, BLACK)
+    result_surface = render_text(f"You scored {score} out of {num_cards}", BIG_FONT, BLACK)
     screen.blit(result_surface, ((WIDTH - result_surface.get_width()) // 2,
                                   (HEIGHT - result_surface.get_height()) // 2))
+    seed_surface = render_text(f"Session seed: {seed} (set TEST_SEED to replay it)", SMALL_FONT, BLACK)
+    screen.blit(seed_surface, ((WIDTH - seed_surface.get_width()) // 2, HEIGHT - 60))
     pygame.display.flip()
     pygame.time.wait(3000)
 
 
-def display_flashcards_text(flashcards):
-    """Displays flashcards as text for review with simple selection."""
-    items = [f"Front: {card.front}\nBack: {card.back}" for card in flashcards]
-    
-    # Print flashcards to console (for debugging purposes)
-    for item in items:
-        print(f"{item}\n")
-
-    scroll_offset = 0
-    active = True
-    selection_start = selection_end = 0
+class DocumentView:
+    """Read-only scrolling text view, laid out once into lines with a character-offset index for hit testing."""
+    def __init__(self, content, rect, font=FONT):
+        self.content = content
+        self.rect = pygame.Rect(rect)
+        self.font = font
+        self.line_height = font.get_height()
+        self.scroll_offset = 0
+        self.cursor = self.anchor = 0  # Selection ends as offsets into content
+        self.line_starts, self.line_ends = self.layout()
+
+    def layout(self):
+        """Wrap content once into lines, returning their start and end offsets (hard line breaks excluded)."""
+        starts, ends = [], []
+        width = self.rect.width
+        paragraph_start = 0
+        for paragraph in self.content.split("\n"):
+            paragraph_end = paragraph_start + len(paragraph)
+            if self.font.size(paragraph)[0] <= width:  # Fast path: most lines fit as they are
+                starts.append(paragraph_start)
+            else:
+                starts.append(paragraph_start)
+                starts.extend(TEXT_LAYOUT.break_offsets(paragraph, self.font, width, paragraph_start))
+            ends.extend(starts[len(ends) + 1:])
+            ends.append(paragraph_end)
+            paragraph_start = paragraph_end + 1  # Skip the newline
+        return starts, ends
+
+    def line_text(self, line):
+        return self.content[self.line_starts[line]:self.line_ends[line]]
+
+    def max_scroll(self):
+        """Return the largest valid scroll offset."""
+        return max(0, len(self.line_starts) * self.line_height - self.rect.height)
+
+    def scroll_to(self, offset):
+        """Scroll to offset, clamped to the document."""
+        self.scroll_offset = max(0, min(offset, self.max_scroll()))
+
+    def line_of(self, index):
+        """Return the line containing a character offset."""
+        return max(0, bisect_right(self.line_starts, index) - 1)
+
+    def index_at(self, point):
+        """Return the character offset closest to a screen point."""
+        x, y = point
+        line = (y - self.rect.top + self.scroll_offset) // self.line_height
+        line = max(0, min(line, len(self.line_starts) - 1))
+        return self.line_starts[line] + TEXT_LAYOUT.nearest_offset(self.line_text(line), self.font, x - self.rect.left)
+
+    def selection(self):
+        """Return the selected range as (start, end)."""
+        return min(self.cursor, self.anchor), max(self.cursor, self.anchor)
+
+    def selected_text(self):
+        start, end = self.selection()
+        return self.content[start:end]
+
+    def handle_event(self, event):
+        """Scroll and select in response to input; returns False for keys that should close the view."""
+        page = self.rect.height - self.line_height
+        if event.type == pygame.MOUSEWHEEL:
+            self.scroll_to(self.scroll_offset - event.y * 30)  # Scroll up/down
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.rect.collidepoint(event.pos):
+            self.cursor = self.index_at(event.pos)  # Start selection
+            if not pygame.key.get_mods() & pygame.KMOD_SHIFT:
+                self.anchor = self.cursor
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 3 and self.cursor != self.anchor:
+            clipboard_put(self.selected_text())  # Copy selected text
+        elif event.type == pygame.MOUSEMOTION and event.buttons[0]:
+            self.cursor = self.index_at(event.pos)  # Extend selection
+            scheduler.invalidate(self.rect)
+        elif event.type == pygame.KEYDOWN:
+            ctrl = event.mod & (pygame.KMOD_CTRL | pygame.KMOD_META)
+            if ctrl and event.key == pygame.K_a:
+                self.anchor, self.cursor = 0, len(self.content)  # Select everything
+            elif ctrl and event.key == pygame.K_c:
+                if self.cursor != self.anchor:
+                    clipboard_put(self.selected_text())
+            elif event.key in (pygame.K_UP, pygame.K_DOWN):
+                self.scroll_to(self.scroll_offset + (self.line_height if event.key == pygame.K_DOWN else -self.line_height))
+            elif event.key in (pygame.K_PAGEUP, pygame.K_PAGEDOWN):
+                self.scroll_to(self.scroll_offset + (page if event.key == pygame.K_PAGEDOWN else -page))
+            elif event.key == pygame.K_HOME:
+                self.scroll_to(0)
+            elif event.key == pygame.K_END:
+                self.scroll_to(self.max_scroll())
+            elif not ctrl and event.key not in (pygame.K_LSHIFT, pygame.K_RSHIFT, pygame.K_LCTRL, pygame.K_RCTRL):
+                return False
+        return True
+
+    def draw(self, surface):
+        """Render the visible lines and the selection highlight."""
+        previous_clip = surface.get_clip()
+        surface.set_clip(self.rect.clip(previous_clip))
+        sel_start, sel_end = self.selection()
+        first = self.scroll_offset // self.line_height
+        last = min(len(self.line_starts), first + self.rect.height // self.line_height + 2)
+        for line in range(first, last):
+            start, end = self.line_starts[line], self.line_ends[line]
+            text = self.content[start:end]
+            y = self.rect.top + line * self.line_height - self.scroll_offset
+            if sel_start <= end and sel_end > start:  # Highlight the selected part of this line
+                x1 = self.font.size(text[:max(0, sel_start - start)])[0]
+                x2 = self.font.size(text[:min(end, sel_end) - start])[0] + (4 if sel_end > end else 0)
+                pygame.draw.rect(surface, (170, 190, 255), (self.rect.left + x1, y, max(1, x2 - x1), self.line_height))
+            surface.blit(render_text(text, self.font, BLACK), (self.rect.left, y))
+        surface.set_clip(previous_clip)
 
-    while active:
-        screen.fill(WHITE)
-        title = BIG_FONT.render("Flashcards Text - Press any key to return", True, BLACK)
-        screen.blit(title, (WIDTH // 2 - title.get_width() // 2, 30))
 
-        text_surface = FONT.render(content, True, BLACK)
-        text_rect = text_surface.get_rect(topleft=(50, 100))
+def display_flashcards_text(flashcards):
+    """Displays flashcards as text for review with selection and copying."""
+    content = "\n\n".join(f"Front: {card.front}\nBack: {card.back}" for card in flashcards)
+    document = DocumentView(content, (50, 130, 700, 450))
+    active = True
+    screen_id = scheduler.enter_screen()
 
-        # Draw selection highlight
-        if selection_start != selection_end:
-            selection_rect = pygame.Rect(text_rect.left + FONT.size(content[:selection_start])[0],
-                                         text_rect.top + FONT.get_height() * (selection_start // 70),
-                                         FONT.size(content[selection_start:selection_end])[0],
-                                         FONT.get_height() * ((selection_end - selection_start) // 70 + 1))
-            pygame.draw.rect(screen, (100, 100, 255), selection_rect, 2)
+    def draw_static(layer):
+        title = render_text("Flashcards Text - Press any key to return", BIG_FONT, BLACK)
+        layer.blit(title, (WIDTH // 2 - title.get_width() // 2, 30))
+        hint = render_text("Drag to select, Ctrl+A to select all, Ctrl+C or right-click to copy", FONT, GRAY)
+        layer.blit(hint, (WIDTH // 2 - hint.get_width() // 2, 85))
 
-        draw_text_in_box(content, (50, 100, 700, 450), FONT, BLACK, scroll_offset)
-        pygame.display.flip()
+    while active:
+        if scheduler.begin_frame(screen_id):
+            layer = compositor.static_layer("flashcards_text", draw_static)
+            compositor.present(layer, lambda: document.draw(screen), scheduler.frame_rects)
 
-        for event in pygame.event.get():
+        for event in scheduler.wait_events():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
+                quit_app()
+            elif not document.handle_event(event):
                 active = False  # Exit screen on key press
-            elif event.type == pygame.MOUSEWHEEL:
-                scroll_offset += -event.y * 10  # Scroll up/down
-            elif event.type == pygame.MOUSEBUTTONDOWN:  # Selection handling
-                x, y = event.pos
-                char_index = (y - text_rect.top) // FONT.get_height() * 70 + (x - text_rect.left) // FONT.size(" ")[0]
-                if char_index < len(content):
-                    if event.button == 1:  
-                        selection_start = selection_end = char_index  # Start selection
-                    elif event.button == 3:  
-                        selected_text = content[selection_start:selection_end]  # Copy selected text
-                        screen.blit(FONT.render(selected_text, True, BLACK), (100, 500))
-                        pygame.display.flip()
-                        pygame.time.wait(500)
-                        selection_start = selection_end = 0  # Reset selection
-            elif event.type == pygame.MOUSEMOTION:
-                if event.buttons[0]:  
-                    x, y = event.pos
-                    char_index = (y - text_rect.top) // FONT.get_height() * 70 + (x - text_rect.left) // FONT.size(" ")[0]
-                    if char_index < len(content):
-                        selection_end = char_index  # Extend selection
-
-        clock.tick(FPS)
 
 def save_flashcards_to_file(flashcards):
-    """Handles saving flashcards to a text file via a UI selection process."""
+    """Handles exporting flashcards to a text, CSV, TSV, JSON Lines or binary deck file via a UI selection process."""
     
     # Define UI states for navigation
     state = "select_file"  # Possible states: "select_mode", "new_file", "save_file", "done"
@@ -804,9 +2388,9 @@ def save_flashcards_to_file(flashcards):
     file_path = None
     save_mode = None  # "a" for append, "w" for overwrite
 
-    # Retrieve existing .txt files
-    txt_files = [f for f in os.listdir() if f.endswith(".txt")]
-    options = txt_files + ["Create New File"] if txt_files else ["Create New File"]
+    # Retrieve existing export files (never the app's own deck file)
+    export_files = sorted(f for f in os.listdir() if os.path.splitext(f)[1].lower() in EXPORT_FORMATS and f != FLASHCARD_FILE)
+    options = export_files + ["Create New File"]
 
     def get_new_file_name(prompt):
         """Prompts user for a new filename using an input box."""
@@ -814,9 +2398,24 @@ def save_flashcards_to_file(flashcards):
         user_text = ""
         active = True
 
+        screen_id = scheduler.enter_screen()
+
         while active:
-            events = pygame.event.get()
-            for event in events:
+            if scheduler.begin_frame(screen_id):
+                screen.fill(WHITE)
+                prompt_surface = render_text(prompt, FONT, BLACK)
+                screen.blit(prompt_surface, (WIDTH // 2 - prompt_surface.get_width() // 2, HEIGHT // 2 - 50))
+
+                pygame.draw.rect(screen, BLACK, input_box, 2)  # Draw input box
+
+                # Wrap user input text within box width constraints
+                wrapped_lines = wrap_text(user_text, FONT, input_box.width - 10)
+                for i, line in enumerate(wrapped_lines):
+                    screen.blit(render_text(line, FONT, BLACK), (input_box.x + 5, input_box.y + 5 + i * FONT.get_height()))
+
+                pygame.display.flip()
+
+            for event in scheduler.wait_events():
                 check_quit_event(event)
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_RETURN:
@@ -826,109 +2425,122 @@ def save_flashcards_to_file(flashcards):
                     else:
                         user_text += event.unicode  # Add new character
 
-            screen.fill(WHITE)
-            prompt_surface = FONT.render(prompt, True, BLACK)
-            screen.blit(prompt_surface, (WIDTH // 2 - prompt_surface.get_width() // 2, HEIGHT // 2 - 50))
+        return user_text
 
-            pygame.draw.rect(screen, BLACK, input_box, 2)  # Draw input box
+    # Buttons for the file and mode selection states
+    button_width, button_height, margin, start_y = 400, 50, 20, 150
+    file_buttons = [create_button(option, (WIDTH - button_width) // 2, start_y + i * (button_height + margin), button_width, button_height) for i, option in enumerate(options)]
+    left_rect, right_rect = create_button_pair(220, width=150, height=50, spacing=100)
+    append_button = {"rect": left_rect, "text": "Append", "color": GRAY}
+    overwrite_button = {"rect": right_rect, "text": "Overwrite", "color": GRAY}
+    mode_buttons = [append_button, overwrite_button]
+    visible_buttons = file_buttons  # Buttons of the state currently on screen
+    hovered = None  # Button under the mouse
+
+    def draw_header(layer):
+        # Display header text
+        layer.blit(render_text("Export Flashcards to a File", BIG_FONT, BLACK), (WIDTH // 2 - 200, 50))
 
-            # Wrap user input text within box width constraints
-            wrapped_lines = wrap_text(user_text, FONT, input_box.width - 10)
-            for i, line in enumerate(wrapped_lines):
-                screen.blit(FONT.render(line, True, BLACK), (input_box.x + 5, input_box.y + 5 + i * FONT.get_height()))
+    def draw_select_file(layer):
+        draw_header(layer)
+        layer.blit(render_text("Select a file to save your flashcards:", FONT, BLACK), (WIDTH // 2 - 200, 110))
+        draw_button_list(file_buttons, layer)
 
-            pygame.display.flip()
-            clock.tick(FPS)
+    def draw_select_mode(layer):
+        draw_header(layer)
+        layer.blit(render_text(f"Selected File: {selected_file}", FONT, BLACK), (WIDTH // 2 - 200, 110))
+        layer.blit(render_text("Choose mode:", FONT, BLACK), (WIDTH // 2 - 100, 150))
+        draw_button_list(mode_buttons, layer)
 
-        return user_text
+    def draw_hover():
+        if hovered is not None:
+            draw_button(hovered["text"], hovered["rect"], lighten(hovered["color"]))
 
     running = True
+    screen_id = scheduler.enter_screen()
     while running:
-        events = pygame.event.get()
-        for event in events:
-            check_quit_event(event)
-        screen.fill(WHITE)
-
-        # Display header text
-        screen.blit(BIG_FONT.render("Save Flashcards as Text File", True, BLACK), (WIDTH // 2 - 200, 50))
-
-        if state == "select_file":
-            """STATE: Select a file to save flashcards or create a new one."""
-            screen.blit(FONT.render("Select a file to save your flashcards:", True, BLACK), (WIDTH // 2 - 200, 110))
-
-            button_width, button_height, margin, start_y = 400, 50, 20, 150
-            file_buttons = [create_button(option, (WIDTH - button_width) // 2, start_y + i * (button_height + margin), button_width, button_height) for i, option in enumerate(options)]
-            draw_button_list(file_buttons)
-
-            for event in events:
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    mouse_pos = pygame.mouse.get_pos()
-                    for button in file_buttons:
-                        if button["rect"].collidepoint(mouse_pos):
-                            state = "new_file" if button["text"] == "Create New File" else "select_mode"
-                            selected_file = button["text"]
-
-        elif state == "select_mode":
-            """STATE: Choose between Append or Overwrite for an existing file."""
-            screen.blit(FONT.render(f"Selected File: {selected_file}", True, BLACK), (WIDTH // 2 - 200, 110))
-            screen.blit(FONT.render("Choose mode:", True, BLACK), (WIDTH // 2 - 100, 150))
-
-            left_rect, right_rect = create_button_pair(220, width=150, height=50, spacing=100)
-            append_button = {"rect": left_rect, "text": "Append", "color": GRAY}
-            overwrite_button = {"rect": right_rect, "text": "Overwrite", "color": GRAY}
-            draw_button_list([append_button, overwrite_button])
-
-            for event in events:
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    mouse_pos = pygame.mouse.get_pos()
-                    if left_rect.collidepoint(mouse_pos):
-                        save_mode, file_path, state = "a", selected_file, "save_file"
-                    elif right_rect.collidepoint(mouse_pos):
-                        save_mode, file_path, state = "w", selected_file, "save_file"
-
-        elif state == "new_file":
+        if state == "new_file":
             """STATE: Prompt user for new filename."""
-            file_name = get_new_file_name("Enter new file name (without extension):").strip() or "flashcards"
-            file_path = f"{file_name}.txt" if not file_name.endswith(".txt") else file_name
+            file_name = get_new_file_name("File name (.txt, .csv, .tsv, .jsonl or .deck):").strip() or "flashcards"
+            file_path = file_name if os.path.splitext(file_name)[1].lower() in EXPORT_FORMATS else f"{file_name}.txt"
+            if file_path == FLASHCARD_FILE:
+                file_path = "export_" + file_path  # Never overwrite the live deck
             save_mode, state = "w", "save_file"
 
-        elif state == "save_file":
-            """STATE: Save flashcards to file."""
-            try:
-                with open(file_path, save_mode, encoding="utf-8") as f:
-                    for card in flashcards:
-                        f.write(f"Front: {card.front}\nBack:  {card.back}\n\n")
-                show_feedback("Flashcards saved successfully!", duration=1500, color=GREEN)
-            except Exception as e:
-                show_feedback(f"Error: {e}", duration=2000, color=RED)
+        if state == "save_file":
+            """STATE: Export the deck with a progress bar."""
+            export_flashcards(flashcards, file_path, save_mode)
             state = "done"
 
-        pygame.display.flip()
-        clock.tick(FPS)
-
         if state == "done":
             running = False  # Exit loop once completed
+            break
+
+        if scheduler.begin_frame(screen_id):
+            if state == "select_file":
+                """STATE: Select a file to save flashcards or create a new one."""
+                layer = compositor.static_layer(("save_file", tuple(options)), draw_select_file)
+                state_buttons = file_buttons
+            else:
+                """STATE: Choose between Append or Overwrite for an existing file."""
+                layer = compositor.static_layer(("save_mode", selected_file), draw_select_mode)
+                state_buttons = mode_buttons
+            if state_buttons is not visible_buttons:
+                visible_buttons, hovered = state_buttons, None  # The new state has different buttons
+            compositor.present(layer, draw_hover, scheduler.frame_rects)
+
+        for event in scheduler.wait_events():
+            check_quit_event(event)
+            if event.type == pygame.MOUSEMOTION:
+                hovered = update_hover(visible_buttons, hovered, event.pos)
+            if event.type != pygame.MOUSEBUTTONDOWN:
+                continue
+            if state == "select_file":
+                for button in file_buttons:
+                    if button["rect"].collidepoint(event.pos):
+                        state = "new_file" if button["text"] == "Create New File" else "select_mode"
+                        selected_file = button["text"]
+                        if state == "select_mode" and detect_export_format(selected_file) not in APPENDABLE_FORMATS:
+                            save_mode, file_path, state = "w", selected_file, "save_file"  # Only text formats can be appended to
+            elif state == "select_mode":
+                if left_rect.collidepoint(event.pos):
+                    save_mode, file_path, state = "a", selected_file, "save_file"
+                elif right_rect.collidepoint(event.pos):
+                    save_mode, file_path, state = "w", selected_file, "save_file"
 
 def save_flashcards_mode(flashcards):
     """Provides options to display or save flashcards."""
     active = True
+    screen_id = scheduler.enter_screen()
+
+    # Create buttons for display and file save options
+    button_display = pygame.Rect(WIDTH // 2 - 150, 150, 300, 50)
+    button_file = pygame.Rect(WIDTH // 2 - 150, 250, 300, 50)
+
+    buttons = [{"rect": button_display, "text": "Display for Copy/Paste", "color": GRAY},
+               {"rect": button_file, "text": "Save to File", "color": GRAY}]
+    hovered = None  # Button under the mouse
+
+    def draw_static(layer):
+        title = render_text("Save Flashcards", BIG_FONT, BLACK)
+        layer.blit(title, (WIDTH // 2 - title.get_width() // 2, 50))
+        draw_button_list(buttons, layer)
+
+    def draw_dynamic():
+        if hovered is not None:
+            draw_button(hovered["text"], hovered["rect"], lighten(hovered["color"]))
+
     while active:
-        screen.fill(WHITE)
-        title = BIG_FONT.render("Save Flashcards", True, BLACK)
-        screen.blit(title, (WIDTH // 2 - title.get_width() // 2, 50))
-
-        # Create buttons for display and file save options
-        button_display = pygame.Rect(WIDTH // 2 - 150, 150, 300, 50)
-        button_file = pygame.Rect(WIDTH // 2 - 150, 250, 300, 50)
-        draw_button("Display for Copy/Paste", button_display, GRAY)
-        draw_button("Save to File", button_file, GRAY)
-        pygame.display.flip()
+        if scheduler.begin_frame(screen_id):
+            layer = compositor.static_layer("save_flashcards_mode", draw_static)
+            compositor.present(layer, draw_dynamic, scheduler.frame_rects)
 
         # Handle user interaction
-        for event in pygame.event.get():
+        for event in scheduler.wait_events():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+                quit_app()
+            elif event.type == pygame.MOUSEMOTION:
+                hovered = update_hover(buttons, hovered, event.pos)
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 pos = event.pos
                 if button_display.collidepoint(pos):
@@ -936,52 +2548,382 @@ def save_flashcards_mode(flashcards):
                     active = False  
                 elif button_file.collidepoint(pos):
                     save_flashcards_to_file(flashcards)  # Save flashcards to a file
-                    active = False   
-        clock.tick(FPS)
+                    active = False
+
+
+def deduplicate_flashcards(flashcards):
+    """Removes repeated flashcards from the deck and the store, keeping the first copy and its review history."""
+    if not flashcards:
+        flashcards = load_flashcards()  # Deduplicate the stored deck
+    if isinstance(flashcards, Deck):
+        pairs = [(CardView(flashcards, removed), CardView(flashcards, kept)) for removed, kept in flashcards.remove_duplicates()]
+    else:
+        # Paged decks: one pass over the cards, then one queued delete of every later copy
+        first, pairs, positions = {}, [], []
+        for position, card in enumerate(flashcards):
+            kept = first.setdefault(card_key(card.front, card.back), card)
+            if kept is not card:
+                pairs.append((card, kept))
+                positions.append(position)
+    if not pairs:
+        show_feedback("No duplicate flashcards found!", color=GREEN)
+        return flashcards
+
+    # Every card has its id already, so the kept ids are known before any of this reaches the store
+    duplicates = {removed.card_id: kept.card_id for removed, kept in pairs
+                  if removed.card_id is not None and kept.card_id is not None}
+    if not isinstance(flashcards, Deck):
+        flashcards.remove_many(positions)  # Queued first, so the merge below finds these rows already gone
+    DECK_WRITER.submit(lambda: FLASHCARD_STORE.merge_duplicates(duplicates), "Duplicates removed!")
+    for removed, _ in pairs:
+        DUPLICATES.remove(card_key(removed.front, removed.back))
+    review_scheduler().merge(duplicates)
+    REVIEW_LOG.merge(duplicates)  # Their logged answers now count toward the kept cards
+    show_feedback(f"Removed {len(pairs)} duplicate flashcards!", color=GREEN)
+    return flashcards
+
+def search_flashcards_mode(flashcards):
+    """Search screen: finds cards by word prefix as the user types, with Edit and Delete on every result."""
+    if not flashcards:
+        flashcards = load_flashcards()  # Search the stored deck
+    screen.fill(WHITE)
+    message = render_text(f"Indexing {len(flashcards)} flashcards...", FONT, BLACK)
+    screen.blit(message, message.get_rect(center=(WIDTH // 2, HEIGHT // 2)))
+    pygame.display.flip()
+
+    if isinstance(flashcards, Deck):
+        index = flashcards.search_index()  # Kept up to date by the deck itself
+        positions = flashcards.order  # Position -> index key (the card's row)
+        card_for = lambda key: CardView(flashcards, key)
+    else:
+        # Paged decks: index by card id; this screen keeps the index and id list in step with its own changes
+        cards = {}
+        positions = array("q")
+        for card in flashcards:
+            positions.append(card.card_id)
+            cards[card.card_id] = card
+        index = SearchIndex((card_id, card.front, card.back) for card_id, card in cards.items())
+        card_for = cards.get
+
+    query = ""
+    results, more = [], False
+    row_height, list_top = 44, 180
+    input_rect = pygame.Rect(50, 80, WIDTH - 100, 50)
+    status_y = 145
+    return_button = {"rect": pygame.Rect(WIDTH // 2 - 100, HEIGHT - 65, 200, 50), "text": "Return", "color": GRAY}
+    hovered = None  # Button under the mouse
+    screen_id = scheduler.enter_screen()
+
+    def result_buttons():
+        buttons = []
+        for i, key in enumerate(results):
+            y = list_top + i * row_height
+            buttons.append({"rect": pygame.Rect(WIDTH - 230, y, 80, row_height - 8), "text": "Edit", "color": GREEN, "key": key})
+            buttons.append({"rect": pygame.Rect(WIDTH - 140, y, 90, row_height - 8), "text": "Delete", "color": RED, "key": key})
+        return buttons + [return_button]
+
+    buttons = result_buttons()
+
+    def draw_static(layer):
+        title = render_text("Search Flashcards", BIG_FONT, BLACK)
+        layer.blit(title, (WIDTH // 2 - title.get_width() // 2, 20))
+
+    def draw_dynamic():
+        pygame.draw.rect(screen, WHITE, input_rect)
+        pygame.draw.rect(screen, BLACK, input_rect, 2)
+        shown = query[-TEXT_LAYOUT.fit_chars(query[::-1], FONT, input_rect.width - 30):] if query else ""  # Keep the end in view
+        screen.blit(render_text(shown + "|", FONT, BLACK), (input_rect.x + 10, input_rect.y + 13))
+        if not query:
+            status = "Type to search fronts and backs"
+        elif results:
+            status = f"Best {len(results)} matches (type more to narrow down)" if more else f"{len(results)} matching flashcards"
+        else:
+            status = "No matching flashcards"
+        screen.blit(render_text(status, FONT, BLACK), (50, status_y))
+        for i, key in enumerate(results):
+            card = card_for(key)
+            line = f"{card.front} | {card.back}".replace("\n", " ")
+            width = WIDTH - 300
+            if FONT.size(line)[0] > width:
+                line = line[:TEXT_LAYOUT.fit_chars(line, FONT, width - FONT.size("...")[0])] + "..."
+            screen.blit(render_text(line, FONT, BLACK), (50, list_top + i * row_height + 8))
+        draw_button_list(buttons)
+        if hovered is not None:
+            draw_button(hovered["text"], hovered["rect"], lighten(hovered["color"]))
 
+    while True:
+        if scheduler.begin_frame(screen_id):
+            layer = compositor.static_layer("search_flashcards_mode", draw_static)
+            compositor.present(layer, draw_dynamic, scheduler.frame_rects)
+
+        for event in scheduler.wait_events():
+            if event.type == pygame.QUIT:
+                quit_app()
+            elif event.type == pygame.MOUSEMOTION:
+                hovered = update_hover(buttons, hovered, event.pos)
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    return flashcards
+                if event.key == pygame.K_BACKSPACE:
+                    query = query[:-1]
+                elif event.unicode and event.unicode.isprintable():
+                    query += event.unicode
+                else:
+                    continue
+                results, more = index.search(query)  # Answered from the index on every keystroke
+                buttons, hovered = result_buttons(), None
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                button = find_hovered_button(buttons, event.pos)
+                if button is None:
+                    continue
+                if button is return_button:
+                    return flashcards
+                key, card = button["key"], card_for(button["key"])
+                if button["text"] == "Edit":
+                    front = get_text_input("Edit flashcard FRONT:", card.front)
+                    back = get_text_input("Edit flashcard BACK:", card.back)
+                    if (front, back) != (card.front, card.back):
+                        old_front, old_back = card.front, card.back
+                        card.front, card.back = front, back  # Deck views re-index themselves
+                        if not isinstance(flashcards, Deck):
+                            index.remove(key)
+                            index.add(key, front, back)
+                        save_edited_flashcard(card, old_front, old_back)
+                else:
+                    position = positions.index(key)
+                    del flashcards[position]  # Deck rows leave the index with the card
+                    if not isinstance(flashcards, Deck):
+                        del positions[position]
+                        index.remove(key)
+                    delete_saved_flashcards([card])
+                results, more = index.search(query)
+                buttons, hovered = result_buttons(), None
+            elif event.type == SAVE_EVENT and event.error:
+                show_feedback(save_event_message(event), duration=2000, color=RED)
+
+def choose_import_file():
+    """Ask for the file to import with the system file picker, or by typing a path where Tk is unavailable."""
+    try:
+        root = tkinter.Tk()
+        root.withdraw()  # Only the dialog should show
+        try:
+            path = filedialog.askopenfilename(title="Import Flashcards", filetypes=[
+                ("Flashcard files", "*.csv *.tsv *.tab *.txt"), ("All files", "*.*")])
+        finally:
+            root.destroy()
+    except tkinter.TclError:
+        path = get_text_input("Enter the path of the file to import:").strip()
+    scheduler.invalidate()  # The dialog covered the window
+    return path
+
+def run_progress_screen(title, subtitle, work, apply=None):
+    """Run work(post, cancelled) on a thread behind a progress bar and Cancel button.
+
+    work reports with post("progress", (fraction, status text)); anything else it posts is handed to
+    apply(kind, value) on the UI thread. Returns (result of work, error raised by it, whether it was cancelled).
+    """
+    messages = queue.Queue()  # Posted by the worker thread, drained by the screen loop
+    cancel = threading.Event()
+
+    def run():
+        try:
+            messages.put(("done", work(lambda kind, value: messages.put((kind, value)), cancel.is_set)))
+        except Exception as error:  # Any failure must reach the screen loop, or it would wait forever
+            messages.put(("error", error))
+    threading.Thread(target=run, daemon=True).start()
+
+    screen_id = scheduler.enter_screen()
+    bar_rect = pygame.Rect(100, 250, WIDTH - 200, 40)
+    cancel_button = {"rect": pygame.Rect(WIDTH // 2 - 100, 350, 200, 50), "text": "Cancel", "color": RED}
+    hovered = None  # Button under the mouse
+    fraction, status = 0.0, ""
+    status_rect = pygame.Rect(0, bar_rect.y - 60, WIDTH, bar_rect.height + 120)  # Bar and status text
+
+    def draw_static(layer):
+        heading = render_text(title, BIG_FONT, BLACK)
+        layer.blit(heading, (WIDTH // 2 - heading.get_width() // 2, 50))
+        name = render_text(subtitle, FONT, BLACK)
+        layer.blit(name, (WIDTH // 2 - name.get_width() // 2, 120))
+        draw_button_list([cancel_button], layer)
+
+    def draw_dynamic():
+        pygame.draw.rect(screen, WHITE, status_rect)
+        pygame.draw.rect(screen, GREEN, (bar_rect.x, bar_rect.y, int(bar_rect.width * fraction), bar_rect.height))
+        pygame.draw.rect(screen, BLACK, bar_rect, 2)
+        status_text = render_text(status, FONT, BLACK)
+        screen.blit(status_text, (WIDTH // 2 - status_text.get_width() // 2, bar_rect.bottom + 20))
+        percent = render_text(f"{int(100 * fraction)}%", FONT, BLACK)
+        screen.blit(percent, (WIDTH // 2 - percent.get_width() // 2, bar_rect.y - 40))
+        if hovered is not None:
+            draw_button(hovered["text"], hovered["rect"], lighten(hovered["color"]))
+
+    while True:
+        try:
+            while True:
+                kind, value = messages.get_nowait()
+                if kind == "progress":
+                    fraction, status = value
+                    scheduler.invalidate(status_rect)
+                elif kind == "done":
+                    return value, None, cancel.is_set()
+                elif kind == "error":
+                    return None, value, cancel.is_set()
+                elif apply is not None:
+                    apply(kind, value)
+        except queue.Empty:
+            pass
+
+        if scheduler.begin_frame(screen_id):
+            layer = compositor.static_layer(("progress_screen", title, subtitle), draw_static)
+            compositor.present(layer, draw_dynamic, scheduler.frame_rects)
+
+        # Wake up regularly to pick up progress from the worker thread
+        for event in scheduler.wait_events(50):
+            if event.type == pygame.QUIT:
+                quit_app()
+            elif event.type == pygame.MOUSEMOTION:
+                hovered = update_hover([cancel_button], hovered, event.pos)
+            elif event.type == pygame.MOUSEBUTTONDOWN and cancel_button["rect"].collidepoint(event.pos):
+                cancel.set()  # The worker stops at its next batch
+
+def import_flashcards_mode(flashcards):
+    """Imports a CSV, TSV or Front:/Back: text file into the deck, showing progress while it is parsed."""
+    path = choose_import_file()
+    if not path:
+        return flashcards
+    if not os.path.isfile(path):
+        show_feedback("File not found!", color=RED)
+        return flashcards
+    if not flashcards:
+        flashcards = load_flashcards()  # Add to the stored deck rather than replace it
+    duplicates = duplicate_index()
+    skipped = 0  # Cards already in the deck (or earlier in the file)
+
+    def work(post, cancelled):
+        def progress(done, total, imported, rejected):
+            post("progress", (done / max(total, 1), f"{imported} imported, {rejected} rejected"))
+        return import_cards(path, lambda cards: post("cards", cards), progress, cancelled)
+
+    def add_cards(kind, cards):
+        # Parsed batches join the deck on the UI thread; the writer thread stores each with one insert
+        nonlocal skipped
+        fresh, keys = [], set()
+        for front, back in cards:
+            key = card_key(front, back)
+            if key in duplicates or key in keys:
+                skipped += 1
+            else:
+                keys.add(key)
+                fresh.append((front, back))
+        if isinstance(flashcards, Deck):
+            start = len(flashcards)
+            flashcards.extend_pairs(fresh)
+            save_new_flashcards(flashcards[start:])
+        else:
+            new = [Flashcard(front, back) for front, back in fresh]
+            flashcards.extend(new)  # Paged decks queue their own insert
+            save_new_flashcards(new)  # Only counts them: the paged deck has given them ids and queued their insert
+
+    result, error, cancelled = run_progress_screen("Importing Flashcards", os.path.basename(path), work, add_cards)
+    if error is not None:
+        show_feedback(f"Import failed: {error}", duration=2000, color=RED)
+    else:
+        imported, rejected = result
+        imported -= skipped
+        message = f"Cancelled after {imported} flashcards" if cancelled else f"Imported {imported} flashcards"
+        notes = []
+        if rejected:
+            notes.append(f"{rejected} rows rejected")
+        if skipped:
+            notes.append(f"{skipped} duplicates skipped")
+        show_feedback(message + (f" ({', '.join(notes)})" if notes else "") + "!", duration=2000, color=GREEN)
+    return flashcards
+
+def export_flashcards(flashcards, path, mode):
+    """Exports the deck to path on a worker thread, showing progress; the format comes from the file extension."""
+    if isinstance(flashcards, Deck):
+        cards = [(flashcards.fronts[row], flashcards.backs[row]) for row in flashcards.order]  # Snapshot of the columns
+    else:
+        cards = ((card.front, card.back) for card in flashcards)  # Paged decks are read page by page
+    total = len(flashcards)
+
+    def work(post, cancelled):
+        return export_cards(path, cards, total, mode=mode, cancelled=cancelled,
+                            on_progress=lambda done, total: post("progress", (done / total, f"{done} of {total} cards")))
+
+    count, error, _ = run_progress_screen("Exporting Flashcards", path, work)
+    if error is not None:
+        show_feedback(f"Export failed: {error}", duration=2000, color=RED)
+    elif count is None:
+        show_feedback("Export cancelled, file left unchanged.", color=RED)
+    else:
+        show_feedback(f"Exported {count} flashcards to {path}!", color=GREEN)
 
 def main_menu():
     """Main menu interface for flashcard application."""
-    flashcards = []
+    flashcards = Deck()
     feedback_message = ""
-    feedback_timer = 0
-
-    while True:
-        screen.fill(WHITE)
-        
+    feedback_color = RED
+    feedback_until = 0  # Tick count at which the feedback message disappears
+    screen_id = scheduler.enter_screen()
+
+    # Create menu buttons
+    button_list = [
+        create_button("Enter/Delete Flashcards", 50, 140, 300, 50),
+        create_button("Shuffle Flashcards", 450, 140, 300, 50),
+        create_button("Reverse Flashcards", 50, 215, 300, 50),
+        create_button("Track Progress", 450, 215, 300, 50),
+        create_button("Test Yourself", 50, 290, 300, 50),
+        create_button("Save Flashcards", 450, 290, 300, 50),
+        create_button("Import Flashcards", 50, 365, 300, 50),
+        create_button("Search Flashcards", 450, 365, 300, 50),
+        create_button("Remove Duplicates", 50, 440, 300, 50),
+        create_button("Review Due", 450, 440, 300, 50),
+        create_button("Statistics", 50, 515, 300, 50),
+        create_button("Exit", 450, 515, 300, 50)
+    ]
+
+    hovered = None  # Button under the mouse
+    feedback_rect = pygame.Rect(0, 80, WIDTH, FONT.get_height())  # Region used by feedback text
+
+    def draw_static(layer):
         # Display app title
-        title_surface = BIG_FONT.render("Flashcard App", True, BLACK)
-        screen.blit(title_surface, (WIDTH//2 - title_surface.get_width()//2, 30))
-        title_surface = BIG_FONT.render("(Press Return When Entering Text or Numbers)", True, BLACK)
-        screen.blit(title_surface, (WIDTH//2 - title_surface.get_width()//2, 75))
+        title_surface = render_text("Flashcard App", BIG_FONT, BLACK)
+        layer.blit(title_surface, (WIDTH//2 - title_surface.get_width()//2, 30))
+        title_surface = render_text("(Press Return When Entering Text or Numbers)", BIG_FONT, BLACK)
+        layer.blit(title_surface, (WIDTH//2 - title_surface.get_width()//2, 75))
+        draw_button_list(button_list, layer)
+
+    def draw_dynamic():
+        if hovered is not None:
+            draw_button(hovered["text"], hovered["rect"], lighten(hovered["color"]))
 
         # Display feedback message if one exists
         if feedback_message:
-            feedback_timer -= 1
-            if feedback_timer <= 0:
-                feedback_message = ""
-            else:
-                feedback_text = FONT.render(feedback_message, True, RED)
-                screen.blit(feedback_text, (WIDTH//2 - feedback_text.get_width()//2, 80))
-
-        # Create menu buttons
-        button_list = [
-            create_button("Enter/Delete Flashcards", 50, 150, 300, 50),
-            create_button("Shuffle Flashcards", 450, 150, 300, 50),
-            create_button("Reverse Flashcards", 50, 250, 300, 50),
-            create_button("Track Progress", 450, 250, 300, 50),
-            create_button("Test Yourself", 50, 350, 300, 50),
-            create_button("Save Flashcards", 450, 350, 300, 50),
-            create_button("Exit", 250, 450, 300, 50)
-        ]
-        draw_button_list(button_list)
-        pygame.display.flip()
+            feedback_text = render_text(feedback_message, FONT, feedback_color)
+            screen.blit(feedback_text, (WIDTH//2 - feedback_text.get_width()//2, 80))
 
-        # Handle user interaction
-        for event in pygame.event.get():
+    while True:
+        if feedback_message and pygame.time.get_ticks() >= feedback_until:
+            feedback_message = ""  # Feedback expired
+            scheduler.invalidate(feedback_rect)
+
+        if scheduler.begin_frame(screen_id):
+            layer = compositor.static_layer("main_menu", draw_static)
+            compositor.present(layer, draw_dynamic, scheduler.frame_rects)
+
+        # Handle user interaction, waking up only to expire the feedback message
+        timeout = feedback_until - pygame.time.get_ticks() if feedback_message else None
+        for event in scheduler.wait_events(timeout):
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+                quit_app()
+            elif event.type == pygame.MOUSEMOTION:
+                hovered = update_hover(button_list, hovered, event.pos)
+            elif event.type == SAVE_EVENT and save_event_message(event):
+                feedback_message = save_event_message(event)  # Background save finished
+                feedback_color = RED if event.error else GREEN
+                feedback_until = pygame.time.get_ticks() + 2000
+                scheduler.invalidate(feedback_rect)
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 pos = event.pos
                 for button in button_list:
@@ -998,11 +2940,158 @@ def main_menu():
                             handle_button_click(button["rect"], flashcards, test_yourself_mode)
                         elif button["text"] == "Save Flashcards":
                             handle_button_click(button["rect"], flashcards, save_flashcards_mode)
+                        elif button["text"] == "Import Flashcards":
+                            flashcards = import_flashcards_mode(flashcards)
+                        elif button["text"] == "Search Flashcards":
+                            flashcards = search_flashcards_mode(flashcards)
+                        elif button["text"] == "Remove Duplicates":
+                            flashcards = deduplicate_flashcards(flashcards)
+                        elif button["text"] == "Review Due":
+                            flashcards = review_due_mode(flashcards)
+                        elif button["text"] == "Statistics":
+                            statistics_mode()
                         elif button["text"] == "Exit":
-                            pygame.quit()
-                            sys.exit()
+                            quit_app()
                         break
-        clock.tick(FPS)
 
-# Start the application
-main_menu()
\ No newline at end of file
+STATISTICS_CHARTS = {}  # Review log version -> (summary line, chart surfaces), until new reviews arrive
+
+def statistics_version():
+    """Return a key that changes whenever reviews are logged, schedules change or the day rolls over."""
+    reviews = review_scheduler()
+    return REVIEW_LOG.appended, reviews.records, len(reviews.cards), time.strftime("%Y-%m-%d")
+
+def load_statistics(post, cancelled):
+    """Read the review log and schedule into per-column chart series (runs on a worker thread)."""
+    columns = CHART_SIZE[0]
+    post("progress", (0.0, "Reading the review log"))
+    stats = REVIEW_LOG.stats()
+    try:
+        summary = stats.summary()
+        post("progress", (0.5, "Counting reviews per day"))
+        dates, reviews, recalled = stats.daily_throughput()
+    finally:
+        stats.close()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        accuracy = recalled / reviews
+    accuracy[reviews == 0] = np.nan  # Days without reviews leave a gap
+    post("progress", (0.9, "Forecasting due cards"))
+    forecast = review_scheduler().due_forecast(FORECAST_DAYS)
+    first, last = (str(dates[0]), str(dates[-1])) if len(dates) else ("", "")
+    most = int(reviews.max()) if len(reviews) else 0
+    return summary, [
+        ("Reviews per day", downsample_minmax(reviews, columns), most, f"max {most}", first, last, BLUE),
+        ("Accuracy per day", downsample_minmax(accuracy, columns), 1.0, "100%", first, last, GREEN),
+        (f"Due in the next {FORECAST_DAYS} days", downsample_minmax(forecast, columns), max(forecast),
+         f"max {max(forecast)}", "today", f"+{FORECAST_DAYS - 1} days", RED),
+    ]
+
+def render_chart(title, series, top, top_label, first_label, last_label, color):
+    """Draw one downsampled series, scaled so top fills the plot, as a min/max column chart with its labels."""
+    chart = pygame.Surface(CHART_SIZE).convert()
+    chart.fill(WHITE)
+    label_height = SMALL_FONT.get_height()
+    plot = pygame.Rect(0, label_height + 2, CHART_SIZE[0], CHART_SIZE[1] - 2 * label_height - 4)
+    pygame.draw.rect(chart, GRAY, plot, 1)
+    chart.blit(render_text(title, SMALL_FONT, BLACK), (0, 0))
+    top_surface = render_text(top_label, SMALL_FONT, BLACK)
+    chart.blit(top_surface, (CHART_SIZE[0] - top_surface.get_width(), 0))
+    chart.blit(render_text(first_label, SMALL_FONT, BLACK), (0, plot.bottom + 2))
+    last_surface = render_text(last_label, SMALL_FONT, BLACK)
+    chart.blit(last_surface, (CHART_SIZE[0] - last_surface.get_width(), plot.bottom + 2))
+    lows, highs = series
+    present = ~np.isnan(highs)  # Columns covering only days without reviews stay empty
+    if not top or not present.any():
+        empty = render_text("No data yet", SMALL_FONT, BLACK)
+        chart.blit(empty, empty.get_rect(center=plot.center))
+        return chart
+
+    # Each pixel column shows the range of the values it covers, filled down to the baseline
+    scale = (plot.height - 2) / top
+    low_ys = (plot.bottom - 1 - np.nan_to_num(lows) * scale).astype(np.int64).tolist()
+    high_ys = (plot.bottom - 1 - np.nan_to_num(highs) * scale).astype(np.int64).tolist()
+    shade = lighten(color)
+    for x, (low_y, high_y, has_data) in enumerate(zip(low_ys, high_ys, present.tolist())):
+        if not has_data:
+            continue
+        pygame.draw.line(chart, shade, (x, plot.bottom - 1), (x, low_y))
+        pygame.draw.line(chart, color, (x, low_y), (x, high_y))
+    return chart
+
+def statistics_charts():
+    """Return the summary line and chart surfaces, recomputing them only when the review log has changed."""
+    version = statistics_version()
+    if version not in STATISTICS_CHARTS:
+        result, error, cancelled = run_progress_screen("Statistics", "Reading review history", load_statistics)
+        if error is not None or cancelled:
+            if error is not None:
+                show_feedback(f"Could not read statistics: {error}")
+            return None, None
+        summary, charts = result
+        if summary["reviews"]:
+            summary_line = (f"Reviews: {summary['reviews']} | Cards: {summary['cards']} | "
+                            f"Recall: {summary['recall']:.0%} | Avg time: {summary['latency']:.1f}s")
+        else:
+            summary_line = "No reviews yet"
+        STATISTICS_CHARTS.clear()  # Older versions are never shown again
+        STATISTICS_CHARTS[version] = summary_line, [render_chart(*chart) for chart in charts]
+    return version, STATISTICS_CHARTS[version]
+
+def statistics_mode():
+    """Shows review counts, accuracy and the coming due load as charts."""
+    if np is None:
+        show_feedback("Statistics need NumPy installed")
+        return
+    version, charts = statistics_charts()
+    if charts is None:
+        return
+    summary_line, surfaces = charts
+    back_button = {"rect": pygame.Rect(WIDTH // 2 - 100, 540, 200, 50), "text": "Back", "color": GRAY}
+    hovered = None  # Button under the mouse
+    screen_id = scheduler.enter_screen()
+
+    def draw_static(layer):
+        heading = render_text("Statistics", BIG_FONT, BLACK)
+        layer.blit(heading, (WIDTH // 2 - heading.get_width() // 2, 15))
+        summary_surface = render_text(summary_line, FONT, BLACK)
+        layer.blit(summary_surface, (WIDTH // 2 - summary_surface.get_width() // 2, 60))
+        for i, surface in enumerate(surfaces):
+            layer.blit(surface, ((WIDTH - CHART_SIZE[0]) // 2, 100 + i * (CHART_SIZE[1] + 15)))
+        draw_button_list([back_button], layer)
+
+    def draw_dynamic():
+        if hovered is not None:
+            draw_button(hovered["text"], hovered["rect"], lighten(hovered["color"]))
+
+    while True:
+        if scheduler.begin_frame(screen_id):
+            layer = compositor.static_layer(("statistics", version), draw_static)
+            compositor.present(layer, draw_dynamic, scheduler.frame_rects)
+
+        for event in scheduler.wait_events():
+            if event.type == pygame.QUIT:
+                quit_app()
+            elif event.type == pygame.MOUSEMOTION:
+                hovered = update_hover([back_button], hovered, event.pos)
+            elif event.type == pygame.KEYDOWN and event.key in [pygame.K_ESCAPE, pygame.K_RETURN]:
+                return
+            elif event.type == pygame.MOUSEBUTTONDOWN and back_button["rect"].collidepoint(event.pos):
+                return
+
+def start_app():
+    """Open the window, the deck store and its writer thread, then run the main menu."""
+    global screen, FLASHCARD_STORE, DECK_WRITER, REVIEWS, REVIEW_LOG
+    pygame.init()
+    pygame.mixer.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Flashcard App")  # Window title
+    FLASHCARD_STORE = open_store(FLASHCARD_FILE)
+    DECK_WRITER = BackgroundWriter(notify_saved)
+    REVIEWS = ReviewScheduler(FLASHCARD_FILE, writer=DECK_WRITER)
+    REVIEW_LOG = ReviewLog(FLASHCARD_FILE, writer=DECK_WRITER)
+    DUPLICATES.open_later(DECK_WRITER, lambda: stream_records(FLASHCARD_STORE))  # First job, before any change
+    main_menu()
+
+# Start the application (import workers re-run this file under another name)
+if __name__ == "__main__":
+    start_app()
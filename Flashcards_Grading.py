@@ -0,0 +1,111 @@
+import re
+import unicodedata
+
+from Flashcards_Review import GRADE_AGAIN, GRADE_GOOD, GRADE_HARD
+
+# Typed-answer grading shared by the flashcard apps (no pygame dependency)
+ARTICLES = frozenset(["a", "an", "the"])  # Words ignored when comparing answers
+APOSTROPHES = re.compile(r"['’`]")  # Dropped, so "don't" matches "dont"
+PUNCTUATION = re.compile(r"[^\w\s]+")  # Other punctuation separates words
+ALTERNATIVES = re.compile(r"\s*[;|]\s*")  # Separates accepted answers on a card back
+CHARS_PER_TYPO = 5  # Answer characters per tolerated typo
+MAX_TYPOS = 12  # Typos tolerated in even the longest answer
+
+
+def normalize_answer(text):
+    """Fold an answer for comparison: NFKD without accents, casefolded, no punctuation or articles."""
+    text = "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch)).casefold()
+    words = PUNCTUATION.sub(" ", APOSTROPHES.sub("", text)).split()
+    kept = [word for word in words if word not in ARTICLES]
+    return " ".join(kept or words)  # An answer that is only an article keeps it
+
+
+def typo_limit(expected):
+    """Return how many edits still count as a typo of expected."""
+    return min(MAX_TYPOS, len(expected) // CHARS_PER_TYPO)
+
+
+def bounded_distance(a, b, limit):
+    """Return the Levenshtein distance of a and b, or limit + 1 once it exceeds limit.
+
+    Only the diagonal band of 2 * limit + 1 cells per row is computed, so the cost is O(limit * len).
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    start = 0  # Shared prefix and suffix never need edits
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    a, b = a[start:end_a], b[start:end_b]
+    if len(a) > len(b):
+        a, b = b, a
+    if not a:
+        return len(b) if len(b) <= limit else limit + 1
+
+    # Band cell d of row i holds the distance of a[:i] and b[:i + d - limit]
+    over = limit + 1
+    width = 2 * limit + 1
+    previous = [d - limit if d >= limit else over for d in range(width)]
+    for i, char in enumerate(a, 1):
+        current = [over] * width
+        best = over
+        for d in range(width):
+            j = i + d - limit
+            if j < 0 or j > len(b):
+                continue
+            if j == 0:
+                value = i
+            else:
+                value = previous[d] + (char != b[j - 1])  # Substitution or match
+                if d and current[d - 1] + 1 < value:
+                    value = current[d - 1] + 1  # Insertion
+                if d + 1 < width and previous[d + 1] + 1 < value:
+                    value = previous[d + 1] + 1  # Deletion
+            if value < over:
+                current[d] = value
+                if value < best:
+                    best = value
+        if best == over:
+            return over  # Every path already needs more than limit edits
+        previous = current
+    return previous[len(b) - len(a) + limit]
+
+
+class AnswerGrader:
+    """Grades typed answers against card backs, normalizing each back's accepted answers only once.
+
+    The cache lives as long as the grader, so create one per study session rather than per deck or process.
+    """
+    def __init__(self):
+        self.accepted = {}  # Card back -> ((normalized answer, typo limit), ...)
+
+    def answers_for(self, back):
+        """Return the normalized accepted answers of a card back: the whole back and each ; or | separated part."""
+        answers = self.accepted.get(back)
+        if answers is None:
+            forms = dict.fromkeys(normalize_answer(part) for part in [back] + ALTERNATIVES.split(back.strip()))
+            answers = self.accepted[back] = tuple((form, typo_limit(form)) for form in forms if form)
+        return answers
+
+    def prepare(self, backs):
+        """Normalize the accepted answers of a deck's card backs ahead of a session."""
+        for back in backs:
+            self.answers_for(back)
+
+    def grade(self, answer, back):
+        """Return GRADE_GOOD for an accepted answer, GRADE_HARD for one within typo distance, else GRADE_AGAIN."""
+        return self.grade_normalized(normalize_answer(answer), back)
+
+    def grade_normalized(self, typed, back):
+        if not typed:
+            return GRADE_AGAIN
+        answers = self.answers_for(back)
+        if any(typed == form for form, _ in answers):
+            return GRADE_GOOD
+        for form, limit in answers:
+            if limit and bounded_distance(typed, form, limit) <= limit:
+                return GRADE_HARD
+        return GRADE_AGAIN
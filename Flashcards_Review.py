@@ -0,0 +1,591 @@
+import heapq
+import mmap
+import os
+import random
+import struct
+import threading
+import time
+from collections import deque
+
+from Flashcards_Storage import write_atomic
+
+try:
+    import numpy as np  # Optional: review statistics are computed over NumPy columns
+except ImportError:
+    np = None
+
+# Spaced-repetition scheduling shared by the flashcard apps (no pygame dependency)
+DAY = 24 * 60 * 60  # Seconds per day
+DEFAULT_EASE = 2.5  # SM-2 starting ease factor
+MIN_EASE = 1.3  # SM-2 lowest ease factor
+RELEARN_DELAY = 10 * 60  # Seconds before a forgotten card is shown again
+NEW_CARDS_PER_SESSION = 20  # Unscheduled cards introduced by one review session
+GRADE_AGAIN, GRADE_HARD, GRADE_GOOD, GRADE_EASY = 1, 3, 4, 5  # SM-2 answer quality (0-5 scale)
+MODE_TRACK, MODE_TEST, MODE_REVIEW = 1, 2, 3  # Study mode that produced a review event
+RETENTION_DAYS = 30  # Elapsed-day bins of the retention curve (the last bin holds longer gaps)
+ERROR_HALF_LIFE = 14 * DAY  # Age at which an answer counts half toward a card's recent error rate
+ERROR_BIAS = 4.0  # Extra selection weight of an always-missed card over an always-known one
+STALE_DAYS = 30  # Days unseen at which a card's staleness bonus reaches half its maximum
+
+
+class CardSchedule:
+    """SM-2 state of one card."""
+    __slots__ = ("due", "interval", "ease", "repetitions", "lapses")
+
+    def __init__(self, due=0.0, interval=0.0, ease=DEFAULT_EASE, repetitions=0, lapses=0):
+        self.due = due  # Unix time the card is next due
+        self.interval = interval  # Days between the last two reviews
+        self.ease = ease  # Interval multiplier, lowered by hard answers
+        self.repetitions = repetitions  # Successful reviews in a row
+        self.lapses = lapses  # Times the card was forgotten
+
+
+class ReviewScheduler:
+    """SM-2 scheduler keeping every card's state in an append-only file and due cards in a heap.
+
+    Version 2 files also list every card not yet reviewed, so a session finds new cards without reading the deck;
+    version 1 files are still read, and seeded with the deck's unreviewed cards once.
+    """
+    MAGIC = b"FCSR"
+    VERSION = 2
+    HEADER = struct.Struct("<4sH")
+    RECORD = struct.Struct("<qdffHH")  # Card id, due, interval, ease (0 removes the card, -1 lists it as new), repetitions, lapses
+    NEW_EASE = -1.0  # Ease of the record listing a card as new
+
+    def __init__(self, deck_path, writer=None):
+        self.path = deck_path + ".srs"
+        self.writer = writer  # BackgroundWriter for file appends (None writes immediately)
+        self.cards = {}  # Card id -> CardSchedule
+        self.heap = []  # (due, card id), including stale entries for cards reviewed since they were pushed
+        self.new = {}  # Ids of cards never reviewed, oldest first (dict keys as an ordered set)
+        self.seeded = False  # Whether new lists every unreviewed card, or the file predates that
+        self.records = 0  # Records in the file, live or superseded
+        self.loaded = False
+        self.lock = threading.Lock()  # Hands unwritten records over to the writer
+        self.unwritten = []  # Records queued since the last write
+        self.rewrite = None  # Whole new file to write before them, after a compaction
+
+    def load(self):
+        """Read the schedule file (the last record of each card wins) and heapify the due times."""
+        self.loaded = True
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        if len(data) < self.HEADER.size or self.HEADER.unpack_from(data) not in ((self.MAGIC, 1), (self.MAGIC, self.VERSION)):
+            raise ValueError(f"{self.path} is not a version {self.VERSION} schedule file")
+        self.seeded = self.HEADER.unpack_from(data)[1] == self.VERSION
+        body = memoryview(data)[self.HEADER.size:]
+        body = body[:len(body) - len(body) % self.RECORD.size]  # Torn last record from an interrupted write
+        cards, new = self.cards, self.new
+        for card_id, due, interval, ease, repetitions, lapses in self.RECORD.iter_unpack(body):
+            if ease > 0:
+                cards[card_id] = CardSchedule(due, interval, ease, repetitions, lapses)
+                new.pop(card_id, None)
+            elif ease < 0:
+                if card_id not in cards:
+                    new[card_id] = None
+            else:
+                cards.pop(card_id, None)
+                new.pop(card_id, None)
+            self.records += 1
+        self.heap = [(schedule.due, card_id) for card_id, schedule in cards.items()]
+        heapq.heapify(self.heap)
+
+    def __contains__(self, card_id):
+        return card_id in self.cards
+
+    def review(self, card_id, grade, now=None):
+        """Apply an SM-2 answer (GRADE_AGAIN..GRADE_EASY) to a card and return its new schedule."""
+        now = time.time() if now is None else now
+        schedule = self.cards.get(card_id) or CardSchedule()
+        if grade < GRADE_HARD:  # Forgotten: start over and see it again soon
+            schedule.repetitions = 0
+            schedule.lapses += 1
+            schedule.interval = 0.0
+            schedule.due = now + RELEARN_DELAY
+        else:
+            schedule.repetitions += 1
+            if schedule.repetitions == 1:
+                schedule.interval = 1.0
+            elif schedule.repetitions == 2:
+                schedule.interval = 6.0
+            else:
+                schedule.interval = round(schedule.interval * schedule.ease)
+            schedule.due = now + schedule.interval * DAY
+        schedule.ease = max(MIN_EASE, schedule.ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+        self.cards[card_id] = schedule
+        self.new.pop(card_id, None)
+        self.push(card_id, schedule)
+        self.append([self.RECORD.pack(card_id, schedule.due, schedule.interval, schedule.ease,
+                                      schedule.repetitions, schedule.lapses)])
+        return schedule
+
+    def forget(self, card_ids):
+        """Drop the schedules of deleted cards (their heap entries go stale) and take them off the new list."""
+        records = []
+        for card_id in card_ids:
+            if self.cards.pop(card_id, None) is not None or card_id in self.new:
+                self.new.pop(card_id, None)
+                records.append(self.RECORD.pack(card_id, 0.0, 0.0, 0.0, 0, 0))
+        if records:
+            self.append(records)
+
+    def seed(self, card_ids):
+        """List the deck's unreviewed cards as new, given every card id in deck order; needed once per file."""
+        for card_id in card_ids:
+            if card_id and card_id not in self.cards:
+                self.new[card_id] = None
+        self.seeded = True
+        self.compact()  # Rewritten as a version 2 file holding the new list
+
+    def introduce(self, card_ids):
+        """Add cards just saved to the end of the new list (an unseeded file finds them when it is seeded)."""
+        if not self.seeded:
+            return
+        records = []
+        for card_id in card_ids:
+            if card_id is not None and card_id not in self.cards and card_id not in self.new:
+                self.new[card_id] = None
+                records.append(self.RECORD.pack(card_id, 0.0, 0.0, self.NEW_EASE, 0, 0))
+        if records:
+            self.append(records)
+
+    def next_new(self):
+        """Return the id of the oldest card never reviewed, or None; O(1)."""
+        return next(iter(self.new), None)
+
+    def merge(self, duplicates):
+        """Fold the schedules of removed duplicates ({removed id: kept id}) into the kept cards that have none."""
+        records = []
+        for removed, kept in duplicates.items():
+            schedule = self.cards.pop(removed, None)
+            if schedule is None:
+                if removed in self.new:  # Never reviewed: only its place on the new list goes
+                    del self.new[removed]
+                    records.append(self.RECORD.pack(removed, 0.0, 0.0, 0.0, 0, 0))
+                continue
+            records.append(self.RECORD.pack(removed, 0.0, 0.0, 0.0, 0, 0))
+            if kept not in self.cards:
+                self.cards[kept] = schedule
+                self.new.pop(kept, None)
+                self.push(kept, schedule)
+                records.append(self.RECORD.pack(kept, schedule.due, schedule.interval, schedule.ease,
+                                                schedule.repetitions, schedule.lapses))
+        if records:
+            self.append(records)
+
+    def push(self, card_id, schedule):
+        """Add a card's due time to the heap, rebuilding it once stale entries outnumber live ones."""
+        heapq.heappush(self.heap, (schedule.due, card_id))
+        if len(self.heap) > 2 * len(self.cards) + 1024:
+            self.heap = [(schedule.due, card_id) for card_id, schedule in self.cards.items()]
+            heapq.heapify(self.heap)
+
+    def is_current(self, entry):
+        """Whether a heap entry still matches its card's schedule."""
+        schedule = self.cards.get(entry[1])
+        return schedule is not None and schedule.due == entry[0]
+
+    def next_due(self, now=None, skip=()):
+        """Return the id of the most overdue card, or None when nothing is due; O(log n) amortized."""
+        now = time.time() if now is None else now
+        heap = self.heap
+        while heap and not self.is_current(heap[0]):
+            heapq.heappop(heap)  # Superseded by a later review or a deletion
+        if not heap or heap[0][0] > now:
+            return None
+        if heap[0][1] not in skip:
+            return heap[0][1]
+        due = self.due_cards(now)  # Rare: the caller is skipping cards it cannot show
+        return next((card_id for card_id in due if card_id not in skip), None)
+
+    def due_cards(self, now=None, limit=None):
+        """Return the ids of cards due at now, most overdue first, visiting only the due part of the heap."""
+        now = time.time() if now is None else now
+        heap, found, stack = self.heap, [], [0]
+        while stack:
+            position = stack.pop()
+            if position >= len(heap) or heap[position][0] > now:
+                continue  # Every entry below this one is due even later
+            if self.is_current(heap[position]):
+                found.append(heap[position])
+            stack += (2 * position + 1, 2 * position + 2)
+        found.sort()
+        return [card_id for _, card_id in found[:limit]]
+
+    def due_forecast(self, days, now=None):
+        """Return how many cards fall due in each of the next days, counting overdue cards on the first."""
+        now = time.time() if now is None else now
+        counts = [0] * days
+        for schedule in self.cards.values():
+            day = int((schedule.due - now) // DAY)
+            if day < days:
+                counts[max(day, 0)] += 1
+        return counts
+
+    def append(self, records):
+        """Queue records for the schedule file, compacting it once it is mostly superseded records."""
+        self.records += len(records)
+        if self.records > 2 * (len(self.cards) + len(self.new)) + 1024:
+            self.compact()
+            return
+        with self.lock:
+            self.unwritten += records
+        self.submit()
+
+    def compact(self):
+        """Queue a rewrite of the schedule file holding only live records."""
+        self.records = len(self.cards) + len(self.new)
+        data = self.header() + b"".join(
+            self.RECORD.pack(card_id, schedule.due, schedule.interval, schedule.ease, schedule.repetitions, schedule.lapses)
+            for card_id, schedule in self.cards.items()) + b"".join(
+            self.RECORD.pack(card_id, 0.0, 0.0, self.NEW_EASE, 0, 0) for card_id in self.new)
+        with self.lock:
+            self.rewrite, self.unwritten = data, []  # The new file already holds every queued change
+        self.submit()
+
+    def write(self):
+        """Write everything queued so far: the compacted file if there is one, then the records after it."""
+        with self.lock:
+            rewrite, records = self.rewrite, self.unwritten
+            self.rewrite, self.unwritten = None, []
+        if rewrite is not None:
+            write_atomic(self.path, rewrite, "wb")
+        if records:
+            new = not os.path.exists(self.path)
+            with open(self.path, "ab") as f:
+                if new:
+                    f.write(self.header())
+                f.write(b"".join(records))
+
+    def header(self):
+        """Return the file header; only a seeded file claims version 2, which promises a complete new list."""
+        return self.HEADER.pack(self.MAGIC, self.VERSION if self.seeded else 1)
+
+    def submit(self):
+        if self.writer is not None:
+            self.writer.submit(self.write, key=("schedule", self.path))  # Answers in quick succession share one write
+        else:
+            self.write()
+
+
+class ReviewLog:
+    """Append-only log of every review event as fixed-width binary records."""
+    MAGIC = b"FCRL"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHH")  # Magic, version, record size
+    RECORD = struct.Struct("<qdIBBxx")  # Card id, Unix time, latency in ms, mode, grade
+
+    def __init__(self, deck_path, writer=None):
+        self.path = deck_path + ".reviews"
+        self.writer = writer  # BackgroundWriter for file appends (None writes immediately)
+        self.lock = threading.Lock()  # Keeps the file and queued in step for readers
+        self.queued = deque()  # Packed records waiting for the writer, oldest first
+        self.appended = 0  # Events logged since the log was opened
+
+    def append(self, card_id, mode, grade, latency, now=None):
+        """Queue one review event; latency is the seconds from showing the card to the answer."""
+        now = time.time() if now is None else now
+        record = self.RECORD.pack(card_id, now, min(int(latency * 1000), 0xFFFFFFFF), mode, grade)
+        self.queued.append(record)  # Atomic, so logging never waits on a write in progress
+        self.appended += 1
+        if self.writer is not None:
+            self.writer.submit(self.write, key=("log", self.path))  # Answers in quick succession share one write
+        else:
+            self.write()
+
+    def write(self):
+        """Append every queued record to the file."""
+        with self.lock:
+            records = list(self.queued)
+            if not records:
+                return
+            new = not os.path.exists(self.path)
+            with open(self.path, "ab") as f:
+                if new:
+                    f.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.RECORD.size))
+                f.write(b"".join(records))
+            for _ in records:
+                self.queued.popleft()
+
+    def merge(self, duplicates):
+        """Reassign the logged events of removed duplicates ({removed id: kept id}) to the kept cards."""
+        if not duplicates:
+            return
+        if self.writer is not None:
+            self.writer.submit(lambda: self.remap(duplicates))
+        else:
+            self.remap(duplicates)
+
+    def remap(self, duplicates):
+        """Replace removed card ids with kept ones in the queued records and the file, rewriting it once."""
+        card_id_field = struct.Struct("<q")  # Leading field of every record
+        with self.lock:
+            for i in range(len(self.queued)):  # Appends only add on the right, so indices stay put
+                kept = duplicates.get(card_id_field.unpack_from(self.queued[i])[0])
+                if kept is not None:
+                    self.queued[i] = card_id_field.pack(kept) + self.queued[i][card_id_field.size:]
+            try:
+                with open(self.path, "rb") as f:
+                    data = bytearray(f.read())
+            except FileNotFoundError:
+                return
+            count = max(len(data) - self.HEADER.size, 0) // self.RECORD.size  # A torn last record is left as is
+            if np is not None:
+                ids = np.ndarray((count,), dtype="<i8", buffer=data, offset=self.HEADER.size, strides=(self.RECORD.size,))
+                removed = np.fromiter(duplicates.keys(), dtype=np.int64, count=len(duplicates))
+                kept = np.fromiter(duplicates.values(), dtype=np.int64, count=len(duplicates))
+                order = np.argsort(removed)
+                removed, kept = removed[order], kept[order]
+                slots = np.minimum(np.searchsorted(removed, ids), len(removed) - 1)
+                found = removed[slots] == ids
+                ids[found] = kept[slots[found]]  # Writes through to data
+                changed = bool(found.any())
+            else:
+                changed = False
+                for offset in range(self.HEADER.size, self.HEADER.size + count * self.RECORD.size, self.RECORD.size):
+                    kept = duplicates.get(card_id_field.unpack_from(data, offset)[0])
+                    if kept is not None:
+                        card_id_field.pack_into(data, offset, kept)
+                        changed = True
+            if changed:
+                write_atomic(self.path, bytes(data), "wb")
+
+    def stats(self):
+        """Open the log for statistics, queued events included; the caller closes the result."""
+        with self.lock:
+            return ReviewStats(self.path, b"".join(self.queued))
+
+
+class ReviewStats:
+    """Retention, difficulty and throughput over a memory-mapped review log, computed with NumPy."""
+    EVENT = None if np is None else np.dtype([("card_id", "<i8"), ("time", "<f8"), ("latency_ms", "<u4"),
+                                               ("mode", "u1"), ("grade", "u1"), ("padding", "V2")])
+
+    def __init__(self, path, queued=b""):
+        if np is None:
+            raise ImportError("Review statistics need NumPy")
+        self.map = None
+        self.by_card = None  # Card ids, seconds since start and recalled flags sorted by card, then by time
+        self.start = 0.0  # Unix time the sorted seconds count from
+        header = ReviewLog.HEADER
+        try:
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size > header.size:
+                    self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            size = 0
+        pending = np.frombuffer(queued, dtype=self.EVENT)  # Events not yet written, given as packed records
+        if self.map is None:
+            self.events = pending
+            return
+        if header.unpack_from(self.map) != (ReviewLog.MAGIC, ReviewLog.VERSION, self.EVENT.itemsize):
+            self.map.close()
+            raise ValueError(f"{path} is not a version {ReviewLog.VERSION} review log")
+        count = (size - header.size) // self.EVENT.itemsize  # A torn last record is left out
+        self.events = np.frombuffer(self.map, dtype=self.EVENT, count=count, offset=header.size)
+        if len(pending):
+            self.events = np.concatenate([self.events, pending])
+
+    def __len__(self):
+        return len(self.events)
+
+    def close(self):
+        self.events = self.by_card = None  # Views must go before the map can close
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+    def sorted_by_card(self):
+        """Return card ids, seconds since the first event and recalled flags ordered by card and time, sorting once."""
+        if self.by_card is None:
+            cards = self.events["card_id"]
+            times = self.events["time"]
+            recalled = self.events["grade"] >= GRADE_HARD
+            if not len(cards):
+                self.by_card = cards.copy(), times.astype(np.int64), recalled
+                return self.by_card
+            start = self.start = float(times.min())
+            seconds = (times - start).astype(np.uint64)
+            if 0 <= cards.min() and cards.max() < 1 << 30 and seconds.max() < 1 << 33:
+                # One sort of (card id, second, recalled) keys instead of a gather per column
+                keys = cards.astype(np.uint64) << np.uint64(34)
+                keys |= seconds << np.uint64(1)
+                keys |= recalled
+                keys.sort()
+                recalled = (keys & np.uint64(1)).astype(bool)
+                seconds = ((keys >> np.uint64(1)) & np.uint64((1 << 33) - 1)).astype(np.int64)
+                cards = (keys >> np.uint64(34)).astype(np.int64)
+            else:
+                order = np.lexsort((times, cards))
+                cards, seconds, recalled = cards[order], seconds[order].astype(np.int64), recalled[order]
+            self.by_card = cards, seconds, recalled
+        return self.by_card
+
+    def retention_curve(self, max_days=RETENTION_DAYS):
+        """Return (reviews, recall rate) per whole day elapsed since the card's previous review.
+
+        Bin max_days collects every longer gap; bins without reviews have a NaN rate.
+        """
+        cards, seconds, recalled = self.sorted_by_card()
+        repeat = cards[1:] == cards[:-1]  # Events with an earlier review of the same card
+        days = np.minimum((seconds[1:] - seconds[:-1])[repeat] // DAY, max_days)
+        reviews = np.bincount(days, minlength=max_days + 1)
+        kept = np.bincount(days, weights=recalled[1:][repeat], minlength=max_days + 1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return reviews, kept / reviews
+
+    def card_difficulty(self):
+        """Return card ids with their review counts, smoothed failure rates and mean latencies in ms."""
+        cards = self.events["card_id"]
+        if not len(cards):
+            empty = np.zeros(0)
+            return cards.copy(), empty.astype(np.int64), empty, empty
+        failed = self.events["grade"] < GRADE_HARD
+        latency = self.events["latency_ms"]
+        low, high = int(cards.min()), int(cards.max())
+        if low >= 0 and high < 4 * len(cards) + (1 << 20):  # Dense ids: count straight into id-indexed bins
+            reviews = np.bincount(cards)
+            ids = np.flatnonzero(reviews)
+            reviews = reviews[ids]
+            failures = np.bincount(cards, weights=failed)[ids]
+            latencies = np.bincount(cards, weights=latency)[ids]
+        else:
+            ids, slots = np.unique(cards, return_inverse=True)
+            reviews = np.bincount(slots)
+            failures = np.bincount(slots, weights=failed)
+            latencies = np.bincount(slots, weights=latency)
+        return ids, reviews, (failures + 1) / (reviews + 2), latencies / reviews
+
+    def daily_throughput(self):
+        """Return the local dates from the first review to the last with the reviews and recalls on each."""
+        times = self.events["time"]
+        if not len(times):
+            empty = np.zeros(0, dtype=np.int64)
+            return np.zeros(0, dtype="datetime64[D]"), empty, empty
+        days = ((times + time.localtime().tm_gmtoff) * (1 / DAY)).astype(np.int64)  # Truncation floors positive times
+        first = days.min()
+        days -= first
+        reviews = np.bincount(days)
+        recalled = np.bincount(days, weights=self.events["grade"] >= GRADE_HARD).astype(np.int64)
+        return np.arange(first, first + len(reviews)).astype("datetime64[D]"), reviews, recalled
+
+    def card_history(self, now=None, half_life=ERROR_HALF_LIFE):
+        """Return sorted card ids with their half-life decayed error and review counts and last review times."""
+        now = time.time() if now is None else now
+        cards, seconds, recalled = self.sorted_by_card()
+        if not len(cards):
+            empty = np.zeros(0)
+            return cards, empty, empty, empty
+        times = seconds + self.start
+        weights = 0.5 ** ((now - times) / half_life)
+        starts = np.flatnonzero(np.concatenate(([True], cards[1:] != cards[:-1])))
+        errors = np.add.reduceat(weights * ~recalled, starts)
+        reviews = np.add.reduceat(weights, starts)
+        last_seen = times[np.append(starts[1:] - 1, len(cards) - 1)]
+        return cards[starts], errors, reviews, last_seen
+
+    def summary(self):
+        """Return the event count, distinct cards, overall recall rate and mean latency in seconds."""
+        events = self.events
+        if not len(events):
+            return {"reviews": 0, "cards": 0, "recall": float("nan"), "latency": float("nan")}
+        cards = self.sorted_by_card()[0]
+        return {"reviews": len(events),
+                "cards": int(np.count_nonzero(cards[1:] != cards[:-1])) + 1,
+                "recall": float(np.count_nonzero(events["grade"] >= GRADE_HARD)) / len(events),
+                "latency": float(events["latency_ms"].mean()) / 1000}
+
+
+def sampling_weight(errors, reviews, days_unseen):
+    """Test-selection weight of a card from its decayed error and review counts and the days since it was seen.
+
+    Works on NumPy arrays too; a never-seen card has no reviews and infinite days unseen.
+    """
+    error_rate = (errors + 0.5) / (reviews + 1)  # Cards without history count as half known
+    staleness = 1 - STALE_DAYS / (days_unseen + STALE_DAYS)  # 0 just seen, approaching 1 when long unseen
+    return (1 + ERROR_BIAS * error_rate) * (1 + staleness)
+
+
+def updated_history(errors, reviews, days_unseen, failed):
+    """Fold one more answer into a card's decayed error and review counts."""
+    decay = 0.5 ** (days_unseen * DAY / ERROR_HALF_LIFE)
+    return errors * decay + failed, reviews * decay + 1
+
+
+class WeightedSampler:
+    """Draws indices in proportion to their weights from a Fenwick tree; draws and weight updates are O(log n)."""
+    def __init__(self, weights, seed=None):
+        self.rng = random.Random(seed)  # Same seed and weights give the same draws
+        if np is not None:
+            weights = np.asarray(weights, dtype=np.float64)
+            prefix = np.concatenate(([0.0], np.cumsum(weights)))
+            nodes = np.arange(1, len(weights) + 1)
+            self.tree = [0.0] + (prefix[nodes] - prefix[nodes - (nodes & -nodes)]).tolist()  # Node i sums (i - lowbit(i), i]
+            self.weights = weights.tolist()
+        else:
+            self.weights = [float(weight) for weight in weights]
+            self.tree = [0.0] + self.weights
+            for node in range(1, len(self.tree)):
+                parent = node + (node & -node)
+                if parent < len(self.tree):
+                    self.tree[parent] += self.tree[node]
+        self.size = len(self.weights)
+        self.top = 1 << (self.size.bit_length() - 1) if self.size else 0  # Largest power of two <= size
+        self.live = sum(1 for weight in self.weights if weight > 0)  # Indices that can still be drawn
+
+    def __len__(self):
+        return self.size
+
+    def total(self):
+        """Return the sum of all weights."""
+        node, total = self.size, 0.0
+        while node:
+            total += self.tree[node]
+            node &= node - 1
+        return total
+
+    def update(self, index, weight):
+        """Change the weight of index (0 stops it from being drawn)."""
+        delta = weight - self.weights[index]
+        self.live += (weight > 0) - (self.weights[index] > 0)
+        self.weights[index] = weight
+        node = index + 1
+        while node <= self.size:
+            self.tree[node] += delta
+            node += node & -node
+
+    def draw(self):
+        """Return a random index with probability proportional to its weight, or None if all weights are 0."""
+        if not self.live:
+            return None
+        total = self.total()
+        while True:
+            target = self.rng.random() * total
+            position, step = 0, self.top
+            while step:  # Descend the tree, skipping every subtree whose sum lies below target
+                node = position + step
+                if node <= self.size and self.tree[node] <= target:
+                    target -= self.tree[node]
+                    position = node
+                step >>= 1
+            if position < self.size and self.weights[position] > 0:
+                return position
+            # Rounding landed on a zero-weight index; draw again
+
+
+def downsample_minmax(values, columns):
+    """Reduce a series to exactly columns (min, max) pairs: NaN-skipping extremes per column, or stretched copies
+    when the series is shorter."""
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        values = np.full(1, np.nan)
+    if len(values) <= columns:
+        stretched = values[np.arange(columns) * len(values) // columns]
+        return stretched, stretched
+    starts = np.arange(columns) * len(values) // columns
+    with np.errstate(invalid="ignore"):
+        return np.fmin.reduceat(values, starts), np.fmax.reduceat(values, starts)
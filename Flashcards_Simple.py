@@ -1,5 +1,9 @@
+import os
 import random
 import time
+from Flashcards_Grading import AnswerGrader
+from Flashcards_Review import GRADE_GOOD, GRADE_HARD
+from Flashcards_Storage import import_cards
 
 def add_flashcard(flashcards):
         print("\nCurrent Flashcards:")
@@ -26,6 +30,23 @@ def add_flashcard(flashcards):
             flashcards.append([front, back])
         return flashcards
 
+def import_flashcards(flashcards):
+    path = input("\nEnter the path of a CSV, TSV or Front:/Back: text file: ").strip()
+    if not os.path.isfile(path):
+        print("File not found.")
+        return flashcards
+
+    def show_progress(done, total, imported, rejected):
+        print(f"\rImporting... {100 * done // max(total, 1)}% ({imported} cards)", end="", flush=True)
+
+    try:
+        imported, rejected = import_cards(path, lambda cards: flashcards.extend([front, back] for front, back in cards), show_progress)
+    except (OSError, ValueError) as error:
+        print(f"\nImport failed: {error}")
+        return flashcards
+    print(f"\nImported {imported} flashcards!" + (f" ({rejected} rows rejected)" if rejected else ""))
+    return flashcards
+
 def shuffle_flashcards(flashcards):
     if not flashcards:
         time.sleep(1)
@@ -61,17 +82,28 @@ def showknowledge(known_cards, unknown_cards):
     else:
         print("All flashcards are known!") 
 
+def check_answer(grader, user_input, card):
+    """Grade a typed answer, forgiving accents, articles, punctuation and small typos."""
+    grade = grader.grade(user_input, card[1])
+    if grade == GRADE_GOOD:
+        print("Correct!")
+    elif grade >= GRADE_HARD:
+        print(f"Close enough! The answer is: {card[1]}")
+    else:
+        print("Incorrect!")
+    return grade >= GRADE_HARD
+
 def study_review(flashcards):
     known_cards = []
     unknown_cards = []
+    grader = AnswerGrader()
+    grader.prepare(card[1] for card in flashcards)
     for card in flashcards:
         print(f"\nFront: {card[0]}")
         user_input = input("Enter the answer for the back of the flashcard: ").strip()
-        if user_input.lower() == card[1].lower():
-            print("Correct!")
+        if check_answer(grader, user_input, card):
             known_cards.append(card)
         else:
-            print("Incorrect!")
             unknown_cards.append(card)   
     showknowledge(known_cards, unknown_cards)
     while unknown_cards:
@@ -83,37 +115,44 @@ def study_review(flashcards):
         for card in temp_unknown:
             print(f"\nFront: {card[0]}")
             user_input = input("Enter the answer for the back of the flashcard: ").strip()
-            if user_input.lower() == card[1].lower():
-                print("Correct!")
+            if check_answer(grader, user_input, card):
                 known_cards.append(card)
             else:
-                print("Incorrect!")
                 unknown_cards.append(card)
         showknowledge(known_cards, unknown_cards)
     return known_cards, unknown_cards
 
 
-print("Welcome to the Flashcard Study Helper!")
-flashcards = []
-while True:
-    print("\nFlashcard Generator Menu:")
-    print("1. Add Flashcards")
-    print("2. Shuffle Flashcards")
-    print("3. Reverse Flashcards")
-    print("4. Study and Review")
-    print("5. Exit")
-    choice = input("Choose an option (num only): ")
-    if choice == '1':
-        flashcards = add_flashcard(flashcards)
-    elif choice == '2': 
-        shuffle_flashcards(flashcards)
-    elif choice == '3':
-        flashcards_reversed(flashcards)
-    elif choice == '4':
-        known, unknown = study_review(flashcards)
-    elif choice == '5':
-        print("\nExiting Flashcards; Goodbye!")
-        break
-    else:
-        print("\nInvalid option. Please choose again.")
-        continue
\ No newline at end of file
+def main():
+    """Run the study menu until the user exits."""
+    print("Welcome to the Flashcard Study Helper!")
+    flashcards = []
+    while True:
+        print("\nFlashcard Generator Menu:")
+        print("1. Add Flashcards")
+        print("2. Shuffle Flashcards")
+        print("3. Reverse Flashcards")
+        print("4. Study and Review")
+        print("5. Import Flashcards")
+        print("6. Exit")
+        choice = input("Choose an option (num only): ")
+        if choice == '1':
+            flashcards = add_flashcard(flashcards)
+        elif choice == '2': 
+            shuffle_flashcards(flashcards)
+        elif choice == '3':
+            flashcards_reversed(flashcards)
+        elif choice == '4':
+            known, unknown = study_review(flashcards)
+        elif choice == '5':
+            flashcards = import_flashcards(flashcards)
+        elif choice == '6':
+            print("\nExiting Flashcards; Goodbye!")
+            break
+        else:
+            print("\nInvalid option. Please choose again.")
+            continue
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1682 @@
+import argparse
+import codecs
+import csv
+import hashlib
+import io
+import json
+import mmap
+import multiprocessing
+import os
+import random
+import re
+import shutil
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import unicodedata
+import weakref
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from collections.abc import MutableSequence
+from concurrent.futures import ProcessPoolExecutor
+from itertools import count
+
+try:
+    import numpy as np  # Optional: shuffles and renumbers a paged deck's order in bulk
+except ImportError:
+    np = None
+
+# Deck storage shared by the flashcard apps (no pygame dependency)
+COMPACT_LOG_BYTES = 1024 * 1024  # Journal size that triggers a background compaction
+SAVE_DEBOUNCE = 0.25  # Seconds a coalescable save waits for a newer version of itself
+IMPORT_CHUNK_BYTES = 1024 * 1024  # Bytes of an import file parsed per task
+MAX_FIELD_CHARS = 10000  # Longest front or back accepted by an import
+EXPORT_BUFFER_BYTES = 4 * 1024 * 1024  # Write buffer of an export file
+EXPORT_BATCH = 20000  # Cards formatted per write (and between progress reports)
+
+
+def write_atomic(path, data, mode="w"):
+    """Write data to path through a temp file, fsync and rename so readers never see a partial file."""
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def read_snapshot(path):
+    """Return (next_id, {id: card}) from a snapshot; a legacy bare list of cards gets sequential ids."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return 1, {}
+    if isinstance(data, list):  # Legacy flashcards.json
+        data = {"cards": data}
+    cards = {}
+    for position, item in enumerate(data.get("cards", []), 1):
+        cards[item.get("id", position)] = {"front": item["front"], "back": item["back"]}
+    return max(data.get("next_id", 1), max(cards, default=0) + 1), cards
+
+
+def write_snapshot(path, next_id, cards):
+    """Atomically write {id: card} as a snapshot."""
+    records = [{"id": card_id, "front": card["front"], "back": card["back"]} for card_id, card in cards.items()]
+    write_atomic(path, json.dumps({"next_id": next_id, "cards": records}))
+
+
+def read_journal(path):
+    """Yield the change records ({"op", "id", ...}) in a journal file, skipping torn ones."""
+    try:
+        f = open(path, "r", encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Torn record from an interrupted write
+
+
+def open_journal(path):
+    """Open a journal for appending, terminating a torn last record first; returns (file, size)."""
+    torn = False
+    try:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            torn = f.read(1) != b"\n"
+    except OSError:
+        pass  # Missing or empty journal
+    log = open(path, "a", encoding="utf-8")
+    if torn:
+        log.write("\n")
+    return log, log.tell()
+
+
+def replay_journal(path, cards):
+    """Apply the records in a journal file to {id: card} in place, returning the highest id seen."""
+    highest = 0
+    for record in read_journal(path):
+        card_id = record["id"]
+        highest = max(highest, card_id)
+        if record["op"] == "del":
+            cards.pop(card_id, None)
+        else:  # "add" and "edit" both carry the whole card, so replaying twice is harmless
+            cards[card_id] = {"front": record["front"], "back": record["back"]}
+    return highest
+
+
+class JournalStore:
+    """Deck store that appends each change to a journal and folds it into the snapshot in the background."""
+    def __init__(self, path, compact_bytes=COMPACT_LOG_BYTES):
+        self.path = path  # Snapshot file
+        self.log_path = path + ".log"  # Changes made since the snapshot
+        self.sealed_path = path + ".log.compacting"  # Journal being folded into the snapshot
+        self.compact_bytes = compact_bytes  # Journal size that triggers compaction
+        self.lock = threading.Lock()  # Guards the journal against the compaction thread
+        self.log = None  # Open journal, created on first write
+        self.log_bytes = 0  # Current journal size
+        self.next_id = 1  # Id given to the next added card
+        self.loaded = False  # Whether next_id has been read from the files yet
+        self.compactor = None  # Running compaction thread
+
+    def load(self):
+        """Return the deck as a list of {"id", "front", "back"} records (snapshot plus journal replay)."""
+        with self.lock:
+            next_id, cards = read_snapshot(self.path)
+            highest = max(replay_journal(self.sealed_path, cards), replay_journal(self.log_path, cards))
+            self.next_id = max(self.next_id, next_id, highest + 1)
+            self.loaded = True
+        return [{"id": card_id, **card} for card_id, card in cards.items()]
+
+    def append(self, *records):
+        """Append records to the journal; costs one small write however big the deck is."""
+        data = "".join(json.dumps(record) + "\n" for record in records)
+        with self.lock:
+            if self.log is None:
+                self.log, self.log_bytes = open_journal(self.log_path)
+            self.log.write(data)
+            self.log.flush()
+            self.log_bytes += len(data)
+            full = self.log_bytes >= self.compact_bytes
+        if full:
+            self.compact()
+
+    def reserve_ids(self, count):
+        """Hand out ids for count cards that will be added later."""
+        if not self.loaded:
+            self.load()  # Ids already on disk must not be handed out again
+        with self.lock:
+            ids = list(range(self.next_id, self.next_id + count))
+            self.next_id += count
+        return ids
+
+    def add(self, front, back):
+        """Journal a new card and return its id."""
+        return self.add_many([(front, back)])[0]
+
+    def add_many(self, cards, ids=None):
+        """Journal (front, back) pairs in one write and return their ids (reserved ones if given)."""
+        ids = self.reserve_ids(len(cards)) if ids is None else ids
+        self.append(*({"op": "add", "id": card_id, "front": front, "back": back}
+                      for card_id, (front, back) in zip(ids, cards)))
+        return ids
+
+    def edit(self, card_id, front, back):
+        """Journal new text for an existing card."""
+        self.append({"op": "edit", "id": card_id, "front": front, "back": back})
+
+    def delete(self, card_ids):
+        """Journal the removal of cards in a single write."""
+        if card_ids:
+            self.append(*({"op": "del", "id": card_id} for card_id in card_ids))
+
+    def merge_duplicates(self, duplicates):
+        """Remove duplicate cards given as {removed id: kept id} (the journal keeps no review history)."""
+        self.delete(list(duplicates))
+
+    def save_all(self, cards):
+        """Replace the stored deck with cards ({"front", "back"} records, "id" optional), returning their ids."""
+        self.wait()  # A running compaction must not overwrite the new snapshot
+        with self.lock:
+            snapshot = {}
+            for card in cards:
+                card_id = card.get("id")
+                if card_id is None:
+                    card_id = self.next_id
+                self.next_id = max(self.next_id, card_id + 1)
+                snapshot[card_id] = card
+            write_snapshot(self.path, self.next_id, snapshot)
+            self.close_log()
+            for path in (self.log_path, self.sealed_path):
+                if os.path.exists(path):
+                    os.remove(path)  # Already part of the new snapshot
+        return list(snapshot)
+
+    def compact(self, wait=False):
+        """Fold the journal into a new snapshot on a background thread."""
+        with self.lock:
+            if self.compactor is not None and self.compactor.is_alive():
+                return  # The next append past the threshold will try again
+            self.close_log()
+            if os.path.exists(self.log_path):
+                if os.path.exists(self.sealed_path):  # Left over from an interrupted compaction
+                    with open(self.sealed_path, "a", encoding="utf-8") as sealed, \
+                            open(self.log_path, "r", encoding="utf-8") as log:
+                        sealed.write("\n" + log.read())
+                    os.remove(self.log_path)
+                else:
+                    os.replace(self.log_path, self.sealed_path)  # New changes go to a fresh journal
+            self.compactor = threading.Thread(target=self.fold_sealed, daemon=True)
+            self.compactor.start()
+        if wait:
+            self.wait()
+
+    def fold_sealed(self):
+        """Replay the sealed journal onto the snapshot and write the result atomically."""
+        next_id, cards = read_snapshot(self.path)
+        highest = replay_journal(self.sealed_path, cards)
+        write_snapshot(self.path, max(next_id, highest + 1), cards)
+        with self.lock:
+            if os.path.exists(self.sealed_path):
+                os.remove(self.sealed_path)  # Replaying it again would be harmless, but wasteful
+
+    def wait(self):
+        """Block until a running compaction has finished."""
+        compactor = self.compactor
+        if compactor is not None:
+            compactor.join()
+
+    def close_log(self):
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
+    def close(self):
+        """Finish background work and close the journal."""
+        self.wait()
+        with self.lock:
+            self.close_log()
+
+
+class SQLiteStore:
+    """Deck store backed by an indexed SQLite database (WAL mode) with paged reads for very large decks."""
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS decks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS cards (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            deck_id INTEGER NOT NULL REFERENCES decks(id),
+            front TEXT NOT NULL,
+            back TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS cards_by_deck ON cards(deck_id, id);
+        CREATE TABLE IF NOT EXISTS reviews (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            card_id INTEGER NOT NULL,
+            reviewed_at REAL NOT NULL,
+            mode TEXT NOT NULL,
+            grade INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS reviews_by_card ON reviews(card_id, reviewed_at);
+        CREATE INDEX IF NOT EXISTS reviews_by_time ON reviews(reviewed_at);
+    """
+
+    def __init__(self, path, deck="default"):
+        self.path = path
+        self.lock = threading.Lock()  # One connection shared by the UI and background threads
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")  # Readers never block the writer
+        self.db.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL, far fewer fsyncs
+        with self.db:
+            self.db.executescript(self.SCHEMA)
+            self.db.execute("INSERT OR IGNORE INTO decks (name) VALUES (?)", (deck,))
+        self.deck_id = self.db.execute("SELECT id FROM decks WHERE name = ?", (deck,)).fetchone()[0]
+        self.id_lock = threading.Lock()  # Guards next_id, so reserving ids never waits for a write in progress
+        self.next_id = self.db.execute(  # Ids are shared by every deck in the file and never reused
+            "SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'cards'), 0), "
+            "COALESCE((SELECT MAX(id) FROM cards), 0)) + 1").fetchone()[0]
+
+    def load(self):
+        """Return the whole deck as a list of {"id", "front", "back"} records."""
+        return self.page(0, -1)
+
+    def count(self):
+        """Return the number of cards in the deck."""
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM cards WHERE deck_id = ?", (self.deck_id,)).fetchone()[0]
+
+    def page(self, offset, limit, start_id=0):
+        """Return up to limit records (-1 for all) from position offset, counting from the first id >= start_id."""
+        with self.lock:
+            # Skip ahead on the (deck_id, id) index alone, then read only the rows on the page
+            rows = self.db.execute(
+                "SELECT id, front, back FROM cards WHERE deck_id = ?1 AND id >= "
+                "(SELECT id FROM cards WHERE deck_id = ?1 AND id >= ?4 ORDER BY id LIMIT 1 OFFSET ?3) "
+                "ORDER BY id LIMIT ?2",
+                (self.deck_id, limit, offset, start_id)).fetchall()
+        return [{"id": card_id, "front": front, "back": back} for card_id, front, back in rows]
+
+    def get(self, card_id):
+        """Return the record of one card by id, or None if the deck has no such card."""
+        with self.lock:
+            row = self.db.execute("SELECT id, front, back FROM cards WHERE id = ? AND deck_id = ?",
+                                  (card_id, self.deck_id)).fetchone()
+        return None if row is None else {"id": row[0], "front": row[1], "back": row[2]}
+
+    def reserve_ids(self, count):
+        """Hand out ids for count cards that will be added later."""
+        with self.id_lock:
+            ids = list(range(self.next_id, self.next_id + count))
+            self.next_id += count
+        return ids
+
+    def add(self, front, back):
+        """Insert a card and return its id."""
+        return self.add_many([(front, back)])[0]
+
+    def add_many(self, cards, ids=None):
+        """Insert (front, back) pairs in one transaction and return their ids (reserved ones if given)."""
+        ids = self.reserve_ids(len(cards)) if ids is None else ids
+        with self.lock, self.db:
+            self.db.executemany("INSERT INTO cards (id, deck_id, front, back) VALUES (?, ?, ?, ?)",
+                                [(card_id, self.deck_id, front, back) for card_id, (front, back) in zip(ids, cards)])
+        return ids
+
+    def edit(self, card_id, front, back):
+        """Replace the text of a card."""
+        with self.lock, self.db:
+            self.db.execute("UPDATE cards SET front = ?, back = ? WHERE id = ?", (front, back, card_id))
+
+    def delete(self, card_ids):
+        """Remove cards in one transaction (their review history is kept)."""
+        with self.lock, self.db:
+            self.db.executemany("DELETE FROM cards WHERE id = ?", [(card_id,) for card_id in card_ids])
+
+    def merge_duplicates(self, duplicates):
+        """Remove duplicate cards given as {removed id: kept id}, moving their reviews to the kept cards."""
+        with self.lock, self.db:
+            self.db.executemany("UPDATE reviews SET card_id = ? WHERE card_id = ?",
+                                [(kept, removed) for removed, kept in duplicates.items()])
+            self.db.executemany("DELETE FROM cards WHERE id = ?", [(removed,) for removed in duplicates])
+
+    def save_all(self, cards):
+        """Replace the deck with cards ({"front", "back"} records, "id" optional) in one transaction, returning their ids."""
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM cards WHERE deck_id = ?", (self.deck_id,))
+            ids = [self.db.execute("INSERT INTO cards (id, deck_id, front, back) VALUES (?, ?, ?, ?)",
+                                   (card.get("id"), self.deck_id, card["front"], card["back"])).lastrowid
+                   for card in cards]
+        with self.id_lock:
+            self.next_id = max(self.next_id, max(ids, default=0) + 1)
+        return ids
+
+    def record_review(self, card_id, mode, grade, reviewed_at=None):
+        """Append one review to the card's history."""
+        with self.lock, self.db:
+            self.db.execute("INSERT INTO reviews (card_id, reviewed_at, mode, grade) VALUES (?, ?, ?, ?)",
+                            (card_id, time.time() if reviewed_at is None else reviewed_at, mode, grade))
+
+    def reviews(self, card_id):
+        """Return (reviewed_at, mode, grade) rows for a card, oldest first."""
+        with self.lock:
+            return self.db.execute("SELECT reviewed_at, mode, grade FROM reviews WHERE card_id = ? ORDER BY reviewed_at",
+                                   (card_id,)).fetchall()
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class JsonLinesStore:
+    """Deck stored as one JSON card per line, read lazily through a byte-offset index."""
+    random_access = True  # page() seeks straight to any position
+    INDEX_HEADER = struct.Struct("<QQQ")  # Deck file size, deck file mtime_ns, next card id
+    ID_PATTERN = re.compile(rb'\{"id": (\d+)')  # Every line starts with the card id
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + ".idx"  # Saved offsets, reused while the deck file is unchanged
+        self.lock = threading.Lock()
+        self.offsets = array("Q", [0])  # Start of each line plus the end of the file
+        self.next_id = 1  # Id given to the next added card
+        self.id_lock = threading.Lock()  # Guards next_id, so reserving ids never waits for a rewrite
+        self.appender = None  # Open handle for appending cards
+        self.index_fresh = False  # Whether the saved index matches the deck file, so appends can extend it
+        self.in_order = None  # Whether the lines' ids ascend, checked the first time an id is not found
+        self.lines = None  # Id -> line number, built only if the lines' ids are out of order
+        if not self.read_index():
+            self.build_index()
+
+    def read_index(self):
+        """Load the saved offset index, returning False if it is missing or stale."""
+        try:
+            stat = os.stat(self.path)
+            with open(self.index_path, "rb") as f:
+                size, mtime_ns, next_id = self.INDEX_HEADER.unpack(f.read(self.INDEX_HEADER.size))
+                self.next_id = max(self.next_id, next_id)  # Even a stale index remembers ids of deleted cards
+                if (size, mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+                    return False
+                offsets = array("Q")
+                offsets.frombytes(f.read())
+        except (OSError, struct.error):
+            return False
+        if not offsets or offsets[-1] != size:
+            return False
+        self.offsets, self.index_fresh = offsets, True
+        return True
+
+    def build_index(self):
+        """Scan the deck once for line offsets and the highest id, without parsing any JSON.
+
+        next_id never goes below the one a stale index saved, so the id of a deleted last card is not reused.
+        """
+        offsets, highest, position = array("Q", [0]), 0, 0
+        try:
+            with open(self.path, "rb") as f:
+                for line in f:
+                    position += len(line)
+                    offsets.append(position)
+                    match = self.ID_PATTERN.match(line)
+                    if match:
+                        highest = max(highest, int(match.group(1)))
+        except FileNotFoundError:
+            pass
+        self.offsets, self.next_id = offsets, max(self.next_id, highest + 1)
+
+    def write_index(self):
+        """Save the offset index next to the deck file."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        header = self.INDEX_HEADER.pack(stat.st_size, stat.st_mtime_ns, self.next_id)
+        write_atomic(self.index_path, header + self.offsets.tobytes(), "wb")
+        self.index_fresh = True
+
+    def append_index(self, count):
+        """Extend the saved index with the last count offsets, so it stays fresh without being rewritten."""
+        if not self.index_fresh:
+            self.write_index()
+            return
+        try:
+            stat = os.stat(self.path)
+            with open(self.index_path, "r+b") as f:
+                f.seek(0, os.SEEK_END)
+                f.write(self.offsets[len(self.offsets) - count:].tobytes())
+                f.seek(0)  # The header goes last, so a crash in between leaves the index stale rather than wrong
+                f.write(self.INDEX_HEADER.pack(stat.st_size, stat.st_mtime_ns, self.next_id))
+        except OSError:
+            self.index_fresh = False
+
+    def count(self):
+        """Return the number of cards in the deck."""
+        return len(self.offsets) - 1
+
+    def page(self, offset, limit, start_id=0):
+        """Return up to limit records (-1 for all) from position offset, reading only their lines."""
+        with self.lock:
+            count = len(self.offsets) - 1
+            end = count if limit < 0 else min(count, offset + limit)
+            if offset >= end:
+                return []
+            self.flush()
+            with open(self.path, "rb") as f:
+                f.seek(self.offsets[offset])
+                data = f.read(self.offsets[end] - self.offsets[offset])
+        return [json.loads(line) for line in data.splitlines()]
+
+    def get(self, card_id):
+        """Return the record of one card by id, or None; ids are binary searched while the lines are in id order."""
+        with self.lock:
+            self.flush()
+            try:
+                f = open(self.path, "rb")
+            except FileNotFoundError:
+                return None
+            with f:
+                def id_at(line):
+                    f.seek(self.offsets[line])
+                    match = self.ID_PATTERN.match(f.read(32))  # The id is within the first 32 bytes of a line
+                    return int(match.group(1)) if match else 0
+
+                if self.lines is None:
+                    low, high = 0, len(self.offsets) - 1
+                    while low < high:
+                        middle = (low + high) // 2
+                        if id_at(middle) < card_id:
+                            low = middle + 1
+                        else:
+                            high = middle
+                    line = low if low < len(self.offsets) - 1 and id_at(low) == card_id else None
+                    if line is None and self.in_order is None:
+                        f.seek(0)
+                        ids = [int(match.group(1)) if match else 0 for match in map(self.ID_PATTERN.match, f)]
+                        self.in_order = all(a < b for a, b in zip(ids, ids[1:]))
+                        if not self.in_order:
+                            self.lines = {line_id: line for line, line_id in enumerate(ids)}  # Index every id once
+                            line = self.lines.get(card_id)
+                else:
+                    line = self.lines.get(card_id)
+                if line is None:
+                    return None
+                f.seek(self.offsets[line])
+                return json.loads(f.read(self.offsets[line + 1] - self.offsets[line]))
+
+    def load(self):
+        """Return the whole deck as a list of {"id", "front", "back"} records."""
+        return self.page(0, -1)
+
+    def iter_records(self):
+        """Yield records one line at a time without holding the deck in memory."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    yield json.loads(line)
+        except FileNotFoundError:
+            return
+
+    def reserve_ids(self, count):
+        """Hand out ids for count cards that will be added later."""
+        with self.id_lock:
+            ids = list(range(self.next_id, self.next_id + count))
+            self.next_id += count
+        return ids
+
+    def add(self, front, back):
+        """Append a card and return its id."""
+        return self.add_many([(front, back)])[0]
+
+    def add_many(self, cards, ids=None):
+        """Append (front, back) pairs in one write and return their ids (reserved ones if given)."""
+        ids = self.reserve_ids(len(cards)) if ids is None else ids
+        with self.lock:
+            if self.appender is None:
+                self.appender = open(self.path, "ab")
+            lines = []
+            position = self.offsets[-1]
+            if self.lines is not None:
+                self.lines.update(zip(ids, range(len(self.offsets) - 1, len(self.offsets) - 1 + len(ids))))
+            for card_id, (front, back) in zip(ids, cards):
+                line = (json.dumps({"id": card_id, "front": front, "back": back}) + "\n").encode("utf-8")
+                lines.append(line)
+                position += len(line)
+                self.offsets.append(position)
+            self.appender.write(b"".join(lines))
+            self.appender.flush()
+            self.append_index(len(lines))
+        return ids
+
+    def edit(self, card_id, front, back):
+        """Replace the text of a card (rewrites the file in one streaming pass)."""
+        self.rewrite({card_id: {"front": front, "back": back}})
+
+    def delete(self, card_ids):
+        """Remove cards in one streaming pass over the file."""
+        if card_ids:
+            self.rewrite(dict.fromkeys(card_ids))
+
+    def merge_duplicates(self, duplicates):
+        """Remove duplicate cards given as {removed id: kept id} in one pass."""
+        self.delete(list(duplicates))
+
+    def rewrite(self, changes):
+        """Copy the deck to a temp file applying {id: new card or None}, then swap it in atomically."""
+        with self.lock:
+            self.flush()
+            temp_path = self.path + ".tmp"
+            offsets, position = array("Q", [0]), 0
+            with open(self.path, "rb") as source, open(temp_path, "wb") as target:
+                for line in source:
+                    match = self.ID_PATTERN.match(line)
+                    card_id = int(match.group(1)) if match else None
+                    if card_id in changes:
+                        card = changes[card_id]
+                        if card is None:
+                            continue  # Deleted
+                        line = (json.dumps({"id": card_id, **card}) + "\n").encode("utf-8")
+                    target.write(line)
+                    position += len(line)
+                    offsets.append(position)
+                target.flush()
+                os.fsync(target.fileno())
+            os.replace(temp_path, self.path)
+            self.offsets = offsets
+            self.in_order = self.lines = None  # Line numbers moved
+            self.write_index()
+
+    def save_all(self, cards):
+        """Replace the deck with cards ({"front", "back"} records, "id" optional), returning their ids."""
+        with self.lock:
+            self.flush()
+            self.in_order = self.lines = None
+            ids, chunks, offsets, position = [], [], array("Q", [0]), 0
+            for card in cards:
+                card_id = card.get("id")
+                with self.id_lock:
+                    if card_id is None:
+                        card_id = self.next_id
+                    self.next_id = max(self.next_id, card_id + 1)
+                line = (json.dumps({"id": card_id, "front": card["front"], "back": card["back"]}) + "\n").encode("utf-8")
+                ids.append(card_id)
+                chunks.append(line)
+                position += len(line)
+                offsets.append(position)
+            write_atomic(self.path, b"".join(chunks), "wb")
+            self.offsets = offsets
+            self.write_index()
+        return ids
+
+    def flush(self):
+        if self.appender is not None:
+            self.appender.close()
+            self.appender = None
+
+    def close(self):
+        """Close the file and save the offset index for the next start."""
+        with self.lock:
+            self.flush()
+            self.write_index()
+
+
+class BinaryDeckStore:
+    """Compact deck file (header, fixed-width record table, UTF-8 string heap) read through mmap.
+
+    Changes are appended to a journal beside the file (deletes become tombstones over the table) and
+    folded into a new file once the journal grows to half the file's size, so a change never costs a rewrite.
+    """
+    random_access = True  # page() seeks straight to any position
+    MAGIC = b"FCDK"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHHQQQ")  # Magic, version, record size, card count, next id, heap offset
+    RECORD = struct.Struct("<QQIQIII")  # Id, front offset, front length, back offset, back length, color, flags
+    HAS_COLOR = 1 << 24  # Set in the packed 0xRRGGBB color when the card has a color
+    SHOWING_BACK = 1  # Flag bit: the card is reversed
+
+    def __init__(self, path, compact_bytes=COMPACT_LOG_BYTES):
+        self.path = path
+        self.log_path = path + ".log"  # Changes made since the file was written
+        self.compact_bytes = compact_bytes  # Smallest journal size that triggers a compaction
+        self.lock = threading.Lock()
+        self.file = self.map = self.view = None
+        self.log = None  # Open journal, created on first change
+        self.log_bytes = 0  # Current journal size
+        self.table_length = 0  # Records in the file's table, deleted ones included
+        self.table_next_id = 1  # Every id in the table is below this
+        self.next_id = 1  # Id given to the next added card
+        self.id_lock = threading.Lock()  # Guards next_id, so reserving ids never waits for a compaction
+        self.deleted = []  # Sorted table indices of deleted records (tombstones)
+        self.edits = {}  # Id -> (front, back) of table records edited since the file was written
+        self.added = {}  # Id -> record of cards added since the file was written, in deck order
+        self.in_order = None  # Whether the table's ids ascend, checked the first time an id is not found
+        self.indices = None  # Id -> table index, built only if the table's ids are out of order
+        self.open_map()
+        for record in read_journal(self.log_path):
+            self.apply(record)
+        if os.path.exists(self.log_path):
+            self.log_bytes = os.path.getsize(self.log_path)
+
+    def open_map(self):
+        """Map the deck file read-only and check its header; strings stay undecoded until read."""
+        try:
+            self.file = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        if os.fstat(self.file.fileno()).st_size < self.HEADER.size:
+            self.close_map()
+            return
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+        magic, version, record_size, self.table_length, next_id, _ = self.HEADER.unpack_from(self.map)
+        if magic != self.MAGIC or version != self.VERSION or record_size != self.RECORD.size:
+            self.close_map()
+            raise ValueError(f"{self.path} is not a version {self.VERSION} binary deck")
+        self.table_next_id = next_id
+        with self.id_lock:
+            self.next_id = max(self.next_id, next_id)
+
+    def count(self):
+        """Return the number of cards in the deck."""
+        return self.table_length - len(self.deleted) + len(self.added)
+
+    def page(self, offset, limit, start_id=0):
+        """Return up to limit records (-1 for all) from position offset, decoding only their strings."""
+        with self.lock:
+            length = self.count()
+            end = length if limit < 0 else min(length, offset + limit)
+            live = self.table_length - len(self.deleted)
+            records = []
+            if offset < live:
+                index = offset  # Table index of position offset: skip every tombstone at or before it
+                while True:
+                    skipped = bisect_right(self.deleted, index)
+                    if index == offset + skipped:
+                        break
+                    index = offset + skipped
+                tombstone = bisect_left(self.deleted, index)
+                while len(records) < min(end, live) - offset:
+                    if tombstone < len(self.deleted) and self.deleted[tombstone] == index:
+                        tombstone += 1
+                    else:
+                        records.append(self.record(index))
+                    index += 1
+            if end > live:
+                added = list(self.added.values())[max(0, offset - live):end - live]
+                records.extend(dict(record) for record in added)
+            return records
+
+    def record(self, index):
+        """Decode one card straight from the mapped file, with any journaled edit applied."""
+        card_id, front_at, front_len, back_at, back_len, color, flags = self.RECORD.unpack_from(
+            self.map, self.HEADER.size + index * self.RECORD.size)
+        edit = self.edits.get(card_id)
+        record = {"id": card_id,
+                  "front": edit[0] if edit else str(self.view[front_at:front_at + front_len], "utf-8"),
+                  "back": edit[1] if edit else str(self.view[back_at:back_at + back_len], "utf-8"),
+                  "showing_front": not flags & self.SHOWING_BACK}
+        if color & self.HAS_COLOR:
+            record["color"] = ((color >> 16) & 255, (color >> 8) & 255, color & 255)
+        return record
+
+    def id_at(self, index):
+        return self.RECORD.unpack_from(self.map, self.HEADER.size + index * self.RECORD.size)[0]
+
+    def get(self, card_id):
+        """Return the record of one card by id, or None if the deck has no such card."""
+        with self.lock:
+            record = self.added.get(card_id)
+            if record is not None:
+                return dict(record)
+            index = self.table_index(card_id)
+            if index is None:
+                return None
+            tombstone = bisect_left(self.deleted, index)
+            if tombstone < len(self.deleted) and self.deleted[tombstone] == index:
+                return None
+            return self.record(index)
+
+    def table_index(self, card_id):
+        """Return the table index of a card id, or None; ids are binary searched while the table is in id order."""
+        if self.map is None or card_id >= self.table_next_id:
+            return None  # Added since the file was written
+        if self.indices is None:
+            low, high = 0, self.table_length
+            while low < high:
+                middle = (low + high) // 2
+                if self.id_at(middle) < card_id:
+                    low = middle + 1
+                else:
+                    high = middle
+            if low < self.table_length and self.id_at(low) == card_id:
+                return low
+            if self.in_order is None:
+                ids = [record[0] for record in self.RECORD.iter_unpack(
+                    self.view[self.HEADER.size:self.HEADER.size + self.table_length * self.RECORD.size])]
+                self.in_order = all(a < b for a, b in zip(ids, ids[1:]))
+                if not self.in_order:
+                    self.indices = {card_id: index for index, card_id in enumerate(ids)}  # Index every id once
+                    return self.indices.get(card_id)
+            return None  # In id order, so the id is simply not in the table
+        return self.indices.get(card_id)
+
+    def apply(self, record):
+        """Apply one journal record to the in-memory changes; replaying a record twice is harmless."""
+        card_id, op = record["id"], record["op"]
+        with self.id_lock:
+            self.next_id = max(self.next_id, card_id + 1)
+        index = None if card_id in self.added else self.table_index(card_id)
+        if index is None:
+            if op == "del":
+                self.added.pop(card_id, None)
+            elif op == "add" or card_id in self.added:
+                self.added[card_id] = {"id": card_id, "front": record["front"], "back": record["back"], "showing_front": True}
+        elif op == "del":
+            position = bisect_left(self.deleted, index)
+            if position == len(self.deleted) or self.deleted[position] != index:
+                self.deleted.insert(position, index)
+            self.edits.pop(card_id, None)
+        else:  # An add of a card already in the table is a journal replayed over its own compaction
+            self.edits[card_id] = (record["front"], record["back"])
+
+    def journal(self, records):
+        """Append change records to the journal and apply them, compacting once the journal is large."""
+        data = "".join(json.dumps(record) + "\n" for record in records)
+        with self.lock:
+            if self.log is None:
+                self.log, self.log_bytes = open_journal(self.log_path)
+            self.log.write(data)
+            self.log.flush()
+            self.log_bytes += len(data)
+            for record in records:
+                self.apply(record)
+            # A compaction rewrites the whole file, so waiting for half its size keeps changes amortized O(1)
+            full = self.log_bytes >= max(self.compact_bytes, len(self.map or b"") // 2)
+        if full:
+            self.compact()
+
+    def compact(self):
+        """Fold the journal into a new deck file."""
+        self.save_all(self.load())
+
+    def load(self):
+        """Return the whole deck as a list of records."""
+        return self.page(0, -1)
+
+    def reserve_ids(self, count):
+        """Hand out ids for count cards that will be added later."""
+        with self.id_lock:
+            ids = list(range(self.next_id, self.next_id + count))
+            self.next_id += count
+        return ids
+
+    def add(self, front, back):
+        """Add a card and return its id."""
+        return self.add_many([(front, back)])[0]
+
+    def add_many(self, cards, ids=None):
+        """Journal (front, back) pairs in one write and return their ids (reserved ones if given)."""
+        ids = self.reserve_ids(len(cards)) if ids is None else ids
+        self.journal([{"op": "add", "id": card_id, "front": front, "back": back} for card_id, (front, back) in zip(ids, cards)])
+        return ids
+
+    def edit(self, card_id, front, back):
+        """Journal new text for a card."""
+        self.journal([{"op": "edit", "id": card_id, "front": front, "back": back}])
+
+    def delete(self, card_ids):
+        """Journal the removal of cards in a single write."""
+        if card_ids:
+            self.journal([{"op": "del", "id": card_id} for card_id in card_ids])
+
+    def merge_duplicates(self, duplicates):
+        """Remove duplicate cards given as {removed id: kept id}."""
+        self.delete(list(duplicates))
+
+    def save_all(self, cards):
+        """Replace the deck with cards ({"front", "back"} records; "id", "color", "showing_front" optional)."""
+        with self.lock:
+            table, heap, ids = bytearray(), bytearray(), []
+            heap_at = self.HEADER.size + len(cards) * self.RECORD.size
+            next_id = self.next_id
+            for card in cards:
+                card_id = card.get("id")
+                if card_id is None:
+                    card_id = next_id
+                next_id = max(next_id, card_id + 1)
+                front, back = card["front"].encode("utf-8"), card["back"].encode("utf-8")
+                color = card.get("color")
+                packed = self.HAS_COLOR | (color[0] << 16) | (color[1] << 8) | color[2] if color else 0
+                flags = 0 if card.get("showing_front", True) else self.SHOWING_BACK
+                front_at = heap_at + len(heap)
+                table += self.RECORD.pack(card_id, front_at, len(front), front_at + len(front), len(back), packed, flags)
+                heap += front + back
+                ids.append(card_id)
+            header = self.HEADER.pack(self.MAGIC, self.VERSION, self.RECORD.size, len(cards), next_id, heap_at)
+            self.close_map()  # The old mapping must go before the file is replaced
+            write_atomic(self.path, bytes(header + table + heap), "wb")
+            self.close_log()
+            if os.path.exists(self.log_path):
+                os.remove(self.log_path)  # Already part of the new file
+            with self.id_lock:
+                self.next_id = max(self.next_id, next_id)  # Ids reserved meanwhile stay reserved
+            self.deleted, self.edits, self.added, self.in_order, self.indices = [], {}, {}, None, None
+            self.open_map()
+        return ids
+
+    def close_map(self):
+        if self.view is not None:
+            self.view.release()
+        if self.map is not None:
+            self.map.close()
+        if self.file is not None:
+            self.file.close()
+        self.file = self.map = self.view = None
+        self.table_length = 0
+
+    def close_log(self):
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+        self.log_bytes = 0
+
+    def close(self):
+        with self.lock:
+            self.close_map()
+            self.close_log()
+
+
+def stream_records(store, page_size=EXPORT_BATCH):
+    """Yield a store's records a page at a time where the store can page, otherwise from one load."""
+    if not hasattr(store, "page"):
+        yield from store.load()
+        return
+    random_access = getattr(store, "random_access", False)
+    offset, start_id = 0, 0
+    while True:
+        # Random-access stores seek by position; the others continue from the id after the last page
+        records = store.page(offset, page_size) if random_access else store.page(0, page_size, start_id)
+        yield from records
+        if len(records) < page_size:
+            return
+        offset += len(records)
+        start_id = records[-1]["id"] + 1
+
+
+def convert_deck(source_path, target_path):
+    """Copy a deck between storage formats, keeping card ids, and return the number of cards."""
+    source, target = open_store(source_path), open_store(target_path)
+    count = len(target.save_all(source.load()))
+    source.close()
+    target.close()
+    return count
+
+
+def open_store(path):
+    """Return the deck store for path, picking the backend from the file extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".db", ".sqlite", ".sqlite3"):
+        return SQLiteStore(path)
+    if extension == ".deck":
+        return BinaryDeckStore(path)
+    if extension == ".jsonl":
+        store = JsonLinesStore(path)
+        legacy_path = os.path.splitext(path)[0] + ".json"
+        if not os.path.exists(path) and os.path.exists(legacy_path):
+            store.save_all(JournalStore(legacy_path).load())  # One-time conversion of the old JSON deck
+        return store
+    return JournalStore(path)
+
+
+class PagedCards(MutableSequence):
+    """List-like view of a store's deck that loads cards a page at a time, keeping only recent pages in memory.
+
+    The deck is append-only: new cards go after the last one, since stored order is insertion order.
+    """
+    def __init__(self, store, factory, page_size=256, max_pages=64, writer=None):
+        self.store = store  # Store providing count/page/add/delete
+        self.factory = factory  # Builds a card object from a {"id", "front", "back"} record
+        self.writer = writer  # Optional BackgroundWriter that runs store changes
+        self.page_size = page_size  # Cards fetched per query
+        self.max_pages = max_pages  # Pages kept before LRU eviction
+        self.length = store.count()
+        self.stored = self.length  # Stored positions below this are the store's cards; the rest are appended
+        self.lock = threading.Lock()  # Guards pending and page reads against a queued delete landing
+        self.pending = []  # Sorted store rows of cards deleted here whose queued delete has not landed yet
+        self.batches = []  # Store rows of each queued delete still to land; together they make up pending
+        self.pages = OrderedDict()  # Page number -> list of card objects
+        self.anchors = {}  # Page number -> id of its first card, where known
+        self.live = weakref.WeakValueDictionary()  # Card id -> card object still referenced elsewhere
+        self.overrides = {}  # Stored position -> card held in memory instead (appended, or assigned)
+        self.order = None  # Position -> stored position once shuffled (None while in stored order)
+        self.reversed = False  # Deck-wide side flip, applied to each card as it is loaded
+        self.color_changes = []  # Deck-wide color transforms, applied in order to each card as it is loaded
+        self.pinned = {}  # Card id -> card changed in memory only, kept alive so eviction cannot drop the change
+        self.deleting = set()  # Ids of cards deleted here whose queued delete has not landed yet
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("card index out of range")
+        return self.card_at(index if self.order is None else self.order[index])
+
+    def __iter__(self):
+        """Yield the cards in deck order, loading each page once per block of positions even when shuffled."""
+        block = self.page_size * self.max_pages  # Cards held at once, as many as the page cache holds
+        for start in range(0, self.length, block):
+            positions = range(start, min(start + block, self.length)) if self.order is None else self.order[start:start + block]
+            pages = {page: self.load_page(page) for page in sorted({position // self.page_size for position in positions})}
+            for position in positions:
+                card = self.overrides.get(position)
+                yield card if card is not None else pages[position // self.page_size][position % self.page_size]
+
+    def card_at(self, position):
+        """Return the card at a stored position."""
+        card = self.overrides.get(position)
+        if card is None:
+            page, offset = divmod(position, self.page_size)
+            card = self.load_page(page)[offset]
+        return card
+
+    def load_page(self, page):
+        """Return the cards on a page, querying the store on a miss."""
+        cards = self.pages.get(page)
+        if cards is not None:
+            self.pages.move_to_end(page)  # Mark as most recently used
+            return cards
+        start = page * self.page_size
+        records = []
+        if start < self.stored:
+            with self.lock:
+                records = self.read_records(start, min(self.page_size, self.stored - start))
+        loaded = []  # Cards built from their records, which still need the deck-wide changes
+        cards = [self.materialize(record, loaded) for record in records]
+        self.apply_deck_changes(loaded)
+        self.pages[page] = cards
+        if len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False)  # Evict least recently used page
+        return cards
+
+    def store_row(self, position):
+        """Return the store's row for a stored position, stepping over rows whose delete is still queued."""
+        row = position
+        while True:
+            skipped = bisect_right(self.pending, row)
+            if row == position + skipped:
+                return row
+            row = position + skipped
+
+    def read_records(self, start, count):
+        """Return the records at count stored positions from start (call with the lock held)."""
+        first = self.store_row(start)
+        rows = self.store_row(start + count - 1) + 1 - first
+        # Count forward from the nearest page whose first id is known instead of from the start of the deck
+        known = max((known for known in self.anchors if known * self.page_size <= start), default=None)
+        if known is None or getattr(self.store, "random_access", False):
+            records = self.store.page(first, rows)
+        else:
+            records = self.store.page(first - self.store_row(known * self.page_size), rows, self.anchors[known])
+        skipped = set(self.pending[bisect_left(self.pending, first):bisect_left(self.pending, first + rows)])
+        if skipped:
+            records = [record for row, record in enumerate(records, first) if row not in skipped]
+        for page in range(-(-start // self.page_size), (start + len(records) - 1) // self.page_size + 1):
+            self.anchors[page] = records[page * self.page_size - start]["id"]
+        return records
+
+    def retire(self, batch):
+        """Drop a queued delete's rows from pending once the store has removed them (call with the lock held)."""
+        self.batches = [rows for rows in self.batches if rows is not batch]
+        for rows in self.batches:
+            rows[:] = [row - bisect_left(batch, row) for row in rows]  # Later rows move up past the removed ones
+        self.pending = sorted(row for rows in self.batches for row in rows)
+
+    def card_ids(self):
+        """Return the card ids in deck order, reading the store a block at a time without building cards."""
+        ids = array("q")
+        block = self.page_size * self.max_pages
+        for start in range(0, self.stored, block):
+            with self.lock:
+                ids.extend(record["id"] for record in self.read_records(start, min(block, self.stored - start)))
+        ids.extend([0] * (self.length - self.stored))
+        for position, card in self.overrides.items():
+            ids[position] = card.card_id or 0
+        return ids if self.order is None else array("q", (ids[position] for position in self.order))
+
+    def card_with_id(self, card_id):
+        """Return the deck's card with a store id, or None, reading only that card from the store if it is not held."""
+        if card_id in self.deleting:
+            return None
+        card = self.live.get(card_id)
+        if card is None:
+            record = self.store.get(card_id)
+            if record is None:
+                return None
+            loaded = []
+            card = self.materialize(record, loaded)
+            self.apply_deck_changes(loaded)
+        return card
+
+    def materialize(self, record, loaded):
+        """Return the card object for a record, reusing one that is still alive (new ones are added to loaded)."""
+        card = self.live.get(record["id"])
+        if card is None:
+            card = self.live[record["id"]] = self.factory(record)
+            loaded.append(card)
+        return card
+
+    def pin(self, cards):
+        """Keep cards changed in memory only (such as newly colored ones) from being reloaded without the change."""
+        for card in cards:
+            if card.card_id is not None:
+                self.pinned[card.card_id] = card
+
+    def cards_in_memory(self):
+        """Return every card object currently held: loaded pages, cards still referenced elsewhere and appended cards."""
+        cards = {id(card): card for card in self.live.values()}
+        cards.update((id(card), card) for card in self.overrides.values())
+        return list(cards.values())
+
+    def apply_deck_changes(self, cards):
+        """Bring freshly loaded cards in line with the deck-wide flip and color transforms."""
+        if self.reversed:
+            for card in cards:
+                card.flip()
+        for change in self.color_changes:
+            for card, color in zip(cards, change([card.color for card in cards])):
+                card.color = color
+
+    def flip_all(self):
+        """Show the other side of every card; cards not yet loaded are flipped as they load."""
+        self.reversed = not self.reversed
+        for card in self.cards_in_memory():
+            card.flip()
+
+    def recolor_all(self, change):
+        """Replace every card's color with change(colors); cards not yet loaded are recolored as they load."""
+        self.color_changes.append(change)
+        cards = self.cards_in_memory()
+        for card, color in zip(cards, change([card.color for card in cards])):
+            card.color = color
+
+    def shuffle(self):
+        """Shuffle by permuting the order array; no card is loaded and the store keeps its order."""
+        if np is not None and self.length:
+            order = np.arange(self.length, dtype=np.uint32) if self.order is None else np.frombuffer(self.order, dtype=np.uint32).copy()
+            np.random.default_rng(random.getrandbits(64)).shuffle(order)
+            self.order = array("I", order.tobytes())
+        else:
+            order = array("I", range(self.length)) if self.order is None else self.order
+            random.shuffle(order)
+            self.order = order
+
+    def __setitem__(self, index, card):
+        if index < 0:
+            index += self.length
+        self.overrides[index if self.order is None else self.order[index]] = card  # Reordering stays in memory
+
+    def __delitem__(self, index):
+        self.remove_many([index])
+
+    def remove_many(self, indices):
+        """Delete the cards at many positions with one queued store change."""
+        indices = sorted({index + self.length if index < 0 else index for index in indices})
+        if not indices:
+            return
+        cards = [self[index] for index in indices]
+        positions = sorted(indices if self.order is None else (self.order[index] for index in indices))
+        ids = [card.card_id for card in cards if card.card_id is not None]
+        with self.lock:
+            batch = sorted(self.store_row(position) for position in positions if position < self.stored)
+            self.batches.append(batch)
+            self.pending = sorted(self.pending + batch)
+            self.deleting.update(ids)
+        for card_id in ids:
+            self.live.pop(card_id, None)
+
+        def delete():
+            with self.lock:  # No page is read while the store's rows and pending disagree
+                self.store.delete(ids)
+                self.retire(batch)
+                self.deleting.difference_update(ids)
+            for card in cards:
+                card.card_id = None  # No longer stored
+        self.write(delete)
+        if self.order is not None:  # Later stored positions move down past the removed ones
+            if np is not None:
+                order = np.delete(np.frombuffer(self.order, dtype=np.uint32), indices)
+                order -= np.searchsorted(np.array(positions, dtype=np.uint32), order).astype(np.uint32)
+                self.order = array("I", order.tobytes())
+            else:
+                removed = set(indices)
+                self.order = array("I", (p - bisect_left(positions, p) for i, p in enumerate(self.order) if i not in removed))
+        self.length -= len(positions)
+        self.stored -= len(batch)
+        first_stale = positions[0] // self.page_size
+        for page in [page for page in self.pages if page >= first_stale]:
+            del self.pages[page]
+        self.anchors = {page: first_id for page, first_id in self.anchors.items() if page < first_stale}
+        removed = set(positions)
+        self.overrides = {p - bisect_left(positions, p): c for p, c in self.overrides.items() if p not in removed}
+
+    def insert(self, index, card):
+        """Append a card to the store; raises ValueError for any index before the end, as the deck is append-only."""
+        if index < self.length:
+            raise ValueError("cards can only be appended to a paged deck")
+        self.extend([card])
+
+    def extend(self, cards):
+        """Append many cards with a single batched store insert, giving new cards their ids now."""
+        cards = list(cards)
+        new = [card for card in cards if card.card_id is None]
+        for card, card_id in zip(new, self.store.reserve_ids(len(new))):
+            card.card_id = card_id
+        for card in cards:
+            self.append_position(card)
+        if new:
+            ids = [card.card_id for card in new]
+            self.write(lambda: self.store.add_many([(card.front, card.back) for card in new], ids))
+
+    def append_position(self, card):
+        """Put a card after the last one, served from memory until the store has it."""
+        self.overrides[self.length] = card
+        if card.card_id is not None:
+            self.live[card.card_id] = card  # Found by id before the store has it
+        self.pages.pop(self.length // self.page_size, None)  # The last page grows
+        if self.order is not None:
+            self.order.append(self.length)
+        self.length += 1
+
+    def write(self, change):
+        """Run a store change through the writer, or immediately without one."""
+        if self.writer is not None:
+            self.writer.submit(change)
+        else:
+            change()
+
+
+class BackgroundWriter:
+    """Runs persistence jobs in order on a worker thread so callers only ever enqueue work."""
+    def __init__(self, notify=None, debounce=SAVE_DEBOUNCE):
+        self.notify = notify  # notify(label, error) is called from the worker after each labeled or failed job
+        self.debounce = debounce  # Delay before a keyed job runs, so rapid saves collapse into one
+        self.jobs = OrderedDict()  # Key -> (run at, label, function), oldest first
+        self.condition = threading.Condition()
+        self.sequence = count()  # Unique keys for jobs that must never be coalesced
+        self.busy = False  # Whether the worker is running a job
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, function, label=None, key=None):
+        """Queue function after every job queued before it; a pending job with the same key is replaced.
+
+        Keyed jobs wait out the debounce, restarted by each replacement, so they must write whatever is
+        current when they run rather than a copy taken when they were queued.
+        """
+        with self.condition:
+            if key is None:
+                key, run_at = ("job", next(self.sequence)), time.monotonic()
+            else:
+                self.jobs.pop(key, None)  # Superseded by this newer save
+                run_at = time.monotonic() + self.debounce
+            self.jobs[key] = (run_at, label, function)
+            self.condition.notify_all()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while True:
+                    if self.jobs:
+                        key, (run_at, label, function) = next(iter(self.jobs.items()))
+                        delay = 0 if self.stopped else run_at - time.monotonic()
+                        if delay <= 0:
+                            del self.jobs[key]
+                            self.busy = True
+                            break
+                        self.condition.wait(delay)
+                    elif self.stopped:
+                        return
+                    else:
+                        self.condition.wait()
+            error = None
+            try:
+                function()
+            except Exception as e:  # Reported to the UI instead of killing the worker
+                error = e
+            with self.condition:
+                self.busy = False
+                self.condition.notify_all()
+            if self.notify and (label or error):
+                self.notify(label, error)
+
+    def pending(self):
+        """Return whether any job is queued or running."""
+        with self.condition:
+            return bool(self.jobs) or self.busy
+
+    def flush(self):
+        """Block until every queued job has run (debounced jobs run immediately)."""
+        with self.condition:
+            for key, (run_at, label, function) in list(self.jobs.items()):
+                self.jobs[key] = (0, label, function)
+            self.condition.notify_all()
+            while self.jobs or self.busy:
+                self.condition.wait()
+
+    def close(self):
+        """Run the remaining jobs and stop the worker."""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        self.thread.join()
+
+
+# Duplicate detection
+def normalize_card_text(text):
+    """Fold a card side to the form compared for duplicates: NFKC, casefolded, single-spaced."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def card_key(front, back):
+    """Return a 64-bit hash of a card's normalized front and back."""
+    text = normalize_card_text(front) + "\x1f" + normalize_card_text(back)
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class DuplicateIndex:
+    """Count of every card_key in the deck, saved beside the deck file so it is not rebuilt on every start."""
+    MAGIC = b"FCDH"
+    VERSION = 1
+    HEADER = struct.Struct("<4sH6QQ")  # Magic, version, (size, mtime) of the deck files it matches, key count
+    DECK_FILE_SUFFIXES = ("", ".log", "-wal")  # Deck file, journal, SQLite write-ahead log
+
+    def __init__(self, deck_path):
+        self.deck_path = deck_path
+        self.path = deck_path + ".dups"
+        self.counts = {}  # card_key -> number of cards with it
+        self.ready = False  # Whether counts reflect the deck yet
+        self.lock = threading.Lock()  # Guards the switch from backlog to counts
+        self.backlog = None  # (card_key, +1 or -1) of changes made while a queued open() has yet to finish
+        self.opened = threading.Event()  # Set once a queued open() has finished
+
+    def __contains__(self, key):
+        return key in self.counts
+
+    def add(self, key):
+        """Count a card and return True if the deck already had one like it."""
+        if not self.ready and self.note(key, 1):
+            return False
+        count = self.counts.get(key, 0)
+        self.counts[key] = count + 1
+        return count > 0
+
+    def remove(self, key):
+        """Stop counting a removed card."""
+        if not self.ready and self.note(key, -1):
+            return
+        count = self.counts.get(key, 0)
+        if count > 1:
+            self.counts[key] = count - 1
+        else:
+            self.counts.pop(key, None)
+
+    def note(self, key, change):
+        """Keep a change for the queued open() to replay, returning False once the counts are ready instead."""
+        with self.lock:
+            if self.ready:
+                return False
+            if self.backlog is not None:
+                self.backlog.append((key, change))
+            return True  # With no open() queued the counts are rebuilt from the store when needed
+
+    def open_later(self, writer, records):
+        """Queue open() on writer; changes made before it runs are replayed over what it reads.
+
+        Queue it before any change to the deck, so the store it reads holds none of the changes being kept.
+        """
+        self.opened = threading.Event()
+        self.backlog = []
+        writer.submit(lambda: self.open(records))
+
+    def wait(self):
+        """Block until a queued open() has finished (at once if none was queued)."""
+        if self.backlog is not None:
+            self.opened.wait()
+
+    def duplicate_count(self):
+        """Return how many cards repeat an earlier one."""
+        return sum(self.counts.values()) - len(self.counts)
+
+    def fingerprint(self):
+        """Return (size, mtime) of each deck file, so a saved index is only trusted for an unchanged deck."""
+        values = []
+        for suffix in self.DECK_FILE_SUFFIXES:
+            try:
+                stat = os.stat(self.deck_path + suffix)
+                values += [stat.st_size, stat.st_mtime_ns]
+            except FileNotFoundError:
+                values += [0, 0]
+        return values
+
+    def rebuild(self, records):
+        """Recount from {"front", "back"} records in one pass."""
+        counts = {}
+        for record in records:
+            key = card_key(record["front"], record["back"])
+            counts[key] = counts.get(key, 0) + 1
+        self.use(counts)
+
+    def use(self, counts):
+        """Adopt freshly read counts, replaying any changes kept meanwhile."""
+        with self.lock:
+            self.counts = counts
+            self.ready = True
+            for key, change in self.backlog or ():
+                (self.add if change > 0 else self.remove)(key)
+            self.backlog = None
+        self.opened.set()
+
+    def open(self, records):
+        """Load the saved index if it still matches the deck files, otherwise rebuild it from records()."""
+        try:
+            try:
+                with open(self.path, "rb") as f:
+                    data = f.read()
+                magic, version, *fingerprint, size = self.HEADER.unpack_from(data)
+                if magic == self.MAGIC and version == self.VERSION and fingerprint == self.fingerprint():
+                    keys = array("Q", data[self.HEADER.size:self.HEADER.size + 8 * size])
+                    counts = array("I", data[self.HEADER.size + 8 * size:])
+                    if len(keys) == len(counts) == size:
+                        self.use(dict(zip(keys, counts)))
+                        return
+            except (OSError, struct.error):
+                pass
+            self.rebuild(records())
+        except Exception:
+            with self.lock:
+                self.backlog = None  # Stop keeping changes; the rebuild the caller retries reads them from the store
+            raise  # Reported by the writer
+        finally:
+            self.opened.set()  # A failed open leaves ready False, so the caller can rebuild
+
+    def save(self):
+        """Write the index beside the deck; call once the deck files are final (after the store is closed)."""
+        if self.ready:
+            keys, counts = array("Q", self.counts.keys()), array("I", self.counts.values())
+            header = self.HEADER.pack(self.MAGIC, self.VERSION, *self.fingerprint(), len(keys))
+            write_atomic(self.path, header + keys.tobytes() + counts.tobytes(), "wb")
+
+
+# Export
+EXPORT_FORMATS = {".txt": "text", ".csv": "csv", ".tsv": "tsv", ".jsonl": "jsonl", ".deck": "binary"}
+APPENDABLE_FORMATS = {"text", "csv", "tsv"}  # Formats where appending keeps the file valid
+
+
+def detect_export_format(path):
+    """Return the export format for a file's extension (plain text for unknown ones)."""
+    return EXPORT_FORMATS.get(os.path.splitext(path)[1].lower(), "text")
+
+
+def format_text_batch(batch, start_id):
+    return "".join(f"Front: {front}\nBack:  {back}\n\n" for front, back in batch)
+
+
+def format_jsonl_batch(batch, start_id):
+    # Same line layout as JsonLinesStore, so an exported .jsonl file opens as a deck
+    encode = json.encoder.encode_basestring_ascii
+    return "".join(f'{{"id": {card_id}, "front": {encode(front)}, "back": {encode(back)}}}\n'
+                   for card_id, (front, back) in enumerate(batch, start_id))
+
+
+def binary_heap_offset(count):
+    """Return where the string heap of a binary deck with count cards starts."""
+    return BinaryDeckStore.HEADER.size + count * BinaryDeckStore.RECORD.size
+
+
+def write_binary_batch(table, heap, heap_at, batch, start_id):
+    """Add a batch to the record table and string heap of a binary deck whose heap starts at heap_at."""
+    pack = BinaryDeckStore.RECORD.pack
+    for card_id, (front, back) in enumerate(batch, start_id):
+        front, back = front.encode("utf-8"), back.encode("utf-8")
+        front_at = heap_at + len(heap)
+        table += pack(card_id, front_at, len(front), front_at + len(front), len(back), 0, 0)
+        heap += front + back
+
+
+def rebase_binary_table(table, shift):
+    """Move every string offset in a binary deck record table by shift bytes."""
+    record = BinaryDeckStore.RECORD
+    for index, (card_id, front_at, front_len, back_at, back_len, color, flags) in enumerate(record.iter_unpack(bytes(table))):
+        record.pack_into(table, index * record.size, card_id, front_at + shift, front_len, back_at + shift, back_len, color, flags)
+
+
+def export_cards(path, cards, total=None, file_format=None, mode="w", on_progress=None, cancelled=None):
+    """Stream (front, back) pairs to a text, CSV, TSV, JSON Lines or binary deck file.
+
+    The file is written to a temporary copy and only replaces path once complete, so a cancelled or failed
+    export leaves it untouched. on_progress(done, total) is called after every batch; returns the number of
+    cards written, or None if cancelled() returned True.
+    """
+    file_format = file_format or detect_export_format(path)
+    if mode == "a" and file_format not in APPENDABLE_FORMATS:
+        raise ValueError(f"cannot append to a {file_format} export")
+    temp_path = path + ".tmp"
+    appending = mode == "a" and os.path.exists(path)
+    if appending:
+        shutil.copyfile(path, temp_path)  # Appending works on a copy, like any other export
+    temp_mode = "a" if appending else "w"  # Truncates any stale temporary copy left by a crashed export
+    written = 0
+    table, heap = bytearray(), bytearray()  # Binary decks need the whole record table before the heap
+    heap_at = binary_heap_offset(total or 0)  # Offsets are rebased at the end if total was wrong
+    try:
+        with open(temp_path, temp_mode + "b" if file_format == "binary" else temp_mode, encoding=None if file_format == "binary" else "utf-8",
+                  newline="" if file_format in ("csv", "tsv") else None, buffering=EXPORT_BUFFER_BYTES) as f:
+            if file_format in ("csv", "tsv"):
+                writer = csv.writer(f, delimiter="," if file_format == "csv" else "\t")
+            cards = iter(cards)
+            while True:
+                batch = [card for _, card in zip(range(EXPORT_BATCH), cards)]
+                if not batch:
+                    break
+                if cancelled and cancelled():
+                    raise InterruptedError
+                if file_format == "binary":
+                    write_binary_batch(table, heap, heap_at, batch, written + 1)
+                elif file_format in ("csv", "tsv"):
+                    writer.writerows(batch)
+                else:
+                    f.write((format_jsonl_batch if file_format == "jsonl" else format_text_batch)(batch, written + 1))
+                written += len(batch)
+                if on_progress:
+                    on_progress(written, total or written)
+            if file_format == "binary":
+                if binary_heap_offset(written) != heap_at:
+                    rebase_binary_table(table, binary_heap_offset(written) - heap_at)
+                f.write(BinaryDeckStore.HEADER.pack(BinaryDeckStore.MAGIC, BinaryDeckStore.VERSION, BinaryDeckStore.RECORD.size,
+                                                    written, written + 1, binary_heap_offset(written)))
+                f.write(table)
+                f.write(heap)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        return written
+    except InterruptedError:
+        return None
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+# Bulk import
+TEXT_RECORD = re.compile(r"Front: (.*?)\nBack: ?(.*?)(?:\n\n|\n*\Z)", re.S)  # Layout written by text exports
+
+
+def detect_import_format(path):
+    """Return "csv", "tsv" or "text" from a file's extension."""
+    extension = os.path.splitext(path)[1].lower()
+    return {".csv": "csv", ".tsv": "tsv", ".tab": "tsv"}.get(extension, "text")
+
+
+def record_boundary(text, file_format):
+    """Return the length of the longest prefix of text made of complete records."""
+    if file_format == "text":
+        end = text.rfind("\n\nFront: ")
+        return 0 if end < 0 else end + 2
+    # CSV/TSV: cut after a newline that is outside quotes (quotes before it balance out)
+    quotes_after, end = 0, len(text)
+    while True:
+        newline = text.rfind("\n", 0, end)
+        if newline < 0:
+            return 0
+        quotes_after += text.count('"', newline, end)
+        if (text.count('"') - quotes_after) % 2 == 0:
+            return newline + 1
+        end = newline
+
+
+def read_import_chunks(path, file_format, chunk_bytes=IMPORT_CHUNK_BYTES):
+    """Stream a file as (text of whole records, bytes read so far), decoding UTF-8 incrementally."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    carry, done = "", 0
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(chunk_bytes)
+            done += len(data)
+            text = carry + decoder.decode(data, final=not data)
+            if not data:
+                if text.strip():
+                    yield text, done
+                return
+            cut = record_boundary(text, file_format)
+            carry = text[cut:]
+            if cut:
+                yield text[:cut], done
+
+
+def normalize_field(text):
+    """Normalize an imported front or back: NFC Unicode, Unix newlines, no surrounding whitespace."""
+    return unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n").strip()
+
+
+def parse_import_chunk(file_format, text, first_chunk=False):
+    """Parse one chunk of an import file into ([(front, back), ...], rejected row count)."""
+    if file_format == "text":
+        rows = [match.groups() for match in TEXT_RECORD.finditer(text)]
+    else:
+        try:
+            rows = [row for row in csv.reader(io.StringIO(text), delimiter="," if file_format == "csv" else "\t") if row]
+        except csv.Error as error:  # Such as an unterminated quote swallowing the rest of the file
+            raise ValueError(f"Malformed {file_format.upper()} file: {error}") from None
+        if first_chunk and rows and [field.strip().lower() for field in rows[0][:2]] == ["front", "back"]:
+            rows = rows[1:]  # Header row
+    cards, rejected = [], 0
+    for row in rows:
+        if len(row) < 2:
+            rejected += 1
+            continue
+        front, back = normalize_field(row[0]), normalize_field(row[1])
+        if front and back and len(front) <= MAX_FIELD_CHARS and len(back) <= MAX_FIELD_CHARS:
+            cards.append((front, back))
+        else:
+            rejected += 1
+    return cards, rejected
+
+
+def import_context():
+    """Return a start method for import workers that is safe while the app runs other threads.
+
+    Forking a threaded process can copy a lock mid-use, so workers come from a forkserver (with this
+    module preloaded) where the platform has one, and are spawned otherwise.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def import_cards(path, on_batch, on_progress=None, cancelled=None, workers=None):
+    """Stream an import file through a process pool, passing each parsed batch to on_batch in file order.
+
+    on_progress(bytes_done, total_bytes, imported, rejected) is called after every batch, and the import
+    stops early once cancelled() returns True. Returns (imported, rejected).
+    """
+    file_format = detect_import_format(path)
+    total = os.path.getsize(path)
+    imported = rejected = 0
+
+    def finish(result, done):
+        nonlocal imported, rejected
+        cards, bad = result
+        if cards:
+            on_batch(cards)
+        imported += len(cards)
+        rejected += bad
+        if on_progress:
+            on_progress(done, total, imported, rejected)
+
+    chunks = read_import_chunks(path, file_format)
+    if total <= 2 * IMPORT_CHUNK_BYTES:  # Small files are not worth starting processes for
+        for index, (text, done) in enumerate(chunks):
+            if cancelled and cancelled():
+                break
+            finish(parse_import_chunk(file_format, text, index == 0), done)
+        return imported, rejected
+
+    workers = workers or os.cpu_count() or 2
+    in_flight = deque()  # (future, bytes done) in file order
+    with ProcessPoolExecutor(workers, mp_context=import_context()) as pool:
+        for index, (text, done) in enumerate(chunks):
+            if cancelled and cancelled():
+                pool.shutdown(cancel_futures=True)
+                return imported, rejected
+            in_flight.append((pool.submit(parse_import_chunk, file_format, text, index == 0), done))
+            if len(in_flight) >= 2 * workers:  # Bound memory: wait for the oldest chunk
+                future, done_then = in_flight.popleft()
+                finish(future.result(), done_then)
+        while in_flight:
+            future, done_then = in_flight.popleft()
+            finish(future.result(), done_then)
+    return imported, rejected
+
+
+def main():
+    """Command-line entry point: python Flashcards_Storage.py convert SOURCE TARGET."""
+    parser = argparse.ArgumentParser(description="Flashcard deck storage tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("convert", help="copy a deck between formats (.json, .jsonl, .deck, .db)")
+    convert.add_argument("source")
+    convert.add_argument("target")
+    export = commands.add_parser("export", help="write a deck as text, CSV, TSV, JSON Lines or a binary deck")
+    export.add_argument("source", help="deck file (.json, .jsonl, .deck, .db)")
+    export.add_argument("target", help="export file; the format comes from its extension unless --format is given")
+    export.add_argument("--format", choices=sorted(set(EXPORT_FORMATS.values())))
+    export.add_argument("--append", action="store_true", help="append to the file instead of replacing it")
+    args = parser.parse_args()
+    if args.command == "convert":
+        print(f"Converted {convert_deck(args.source, args.target)} cards.")
+    elif args.command == "export":
+        store = open_store(args.source)
+        total = store.count() if hasattr(store, "count") else None
+        records = stream_records(store)
+        count = export_cards(args.target, ((record["front"], record["back"]) for record in records), total, args.format,
+                             "a" if args.append else "w",
+                             lambda done, total: print(f"\rExported {done} of {total} cards", end="", file=sys.stderr))
+        store.close()
+        print(f"\nExported {count} cards to {args.target}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Flashcards_Storage import IMPORT_CHUNK_BYTES, import_cards
+
+
+class MalformedCsvImportTest(unittest.TestCase):
+    def write_csv(self, text):
+        handle, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(handle, "w", encoding="utf-8") as f:
+            f.write(text)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_unterminated_quote_raises_value_error(self):
+        path = self.write_csv('front,back\nq1,a1\n"' + "x" * 200000 + ",a2\n")
+        with self.assertRaises(ValueError):
+            import_cards(path, lambda cards: None)
+
+    def test_unterminated_quote_in_a_worker_raises_value_error(self):
+        rows = "".join(f"q{i},a{i}\n" for i in range(3 * IMPORT_CHUNK_BYTES // 10))  # Large enough for the process pool
+        path = self.write_csv(rows + '"' + "x" * 200000 + ",a\n")
+        with self.assertRaises(ValueError):
+            import_cards(path, lambda cards: None, workers=2)
+
+    def test_well_formed_csv_still_imports(self):
+        path = self.write_csv('front,back\nq1,a1\n"q, 2","a ""2"""\n')
+        batches = []
+        self.assertEqual(import_cards(path, batches.extend), (2, 0))
+        self.assertEqual(batches, [("q1", "a1"), ("q, 2", 'a "2"')])
+
+
+if __name__ == "__main__":
+    unittest.main()